@@ -1,5 +1,9 @@
 import streamlit as st
-from utils.data_loader import cargar_datos_github, cargar_datos_local
+from utils.data_loader import cargar_datos_github, cargar_datos_local, cargar_datos_multiliga, obtener_datos, iniciar_traza_pagina, mostrar_traza_pagina
+from utils.tracing import seccion
+from utils.registry import estadisticas_registro
+from utils.http_client import cliente as cliente_http
+from utils.result_cache import estadisticas as estadisticas_resultados
 
 # Configuración de la página
 st.set_page_config(
@@ -9,6 +13,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Trazas de tiempos del rerun (ver utils.tracing)
+iniciar_traza_pagina("Análisis de Jugadores")
+
 # Crear sesión para almacenar datos si no existe
 if 'data' not in st.session_state:
     st.session_state['data'] = None
@@ -20,7 +27,7 @@ st.title("Aplicación de Análisis de Jugadores")
 st.markdown("""
 Esta aplicación te permite analizar datos de jugadores de fútbol con múltiples herramientas:
 
-- **Cargar Datos**: Carga datos desde GitHub o archivos locales
+- **Cargar Datos**: Carga datos desde GitHub, varias ligas y temporadas a la vez o archivos locales
 - **Buscar Jugador**: Encuentra y analiza jugadores individuales
 - **Comparar Jugadores**: Compara estadísticas entre dos jugadores
 - **Jugadores Similares**: Encuentra jugadores con perfiles similares
@@ -34,21 +41,25 @@ Usa la barra lateral para navegar entre las diferentes páginas.
 st.markdown("---")
 
 # Sección de carga de datos
+seccion("Carga de datos")
 st.header("Cargar Datos")
 
 # Opciones para cargar datos
 opcion_carga = st.radio(
     "Selecciona una fuente de datos:",
-    ["Cargar desde GitHub", "Cargar desde archivo local"]
+    ["Cargar desde GitHub", "Cargar varias ligas y temporadas", "Cargar desde archivo local"]
 )
 
 if opcion_carga == "Cargar desde GitHub":
     cargar_datos_github()
+elif opcion_carga == "Cargar varias ligas y temporadas":
+    cargar_datos_multiliga()
 else:
     cargar_datos_local()
 
 # Información sobre datos cargados
-if 'data' in st.session_state and st.session_state['data'] is not None:
+seccion("Barra lateral")
+if obtener_datos() is not None:
     st.sidebar.success("✅ Datos cargados correctamente")
     
     # Mostrar información sobre los datos cargados
@@ -60,6 +71,28 @@ if 'data' in st.session_state and st.session_state['data'] is not None:
 else:
     st.sidebar.warning("⚠️ No hay datos cargados")
 
+# Datasets compartidos por todas las sesiones de este proceso
+registro = estadisticas_registro()
+if not registro.empty:
+    with st.sidebar.expander("Datasets en memoria"):
+        st.dataframe(registro, hide_index=True)
+        st.caption(f"Total: {registro['Memoria (MB)'].sum():.1f} MB")
+
+# Estadísticas del cliente HTTP compartido
+estadisticas_http = cliente_http().estadisticas()
+if estadisticas_http["peticiones"] > 0:
+    with st.sidebar.expander("Peticiones HTTP"):
+        st.json(estadisticas_http)
+
+# Resultados derivados guardados por huella del dataset
+estadisticas_cache = estadisticas_resultados()
+if estadisticas_cache["aciertos"] + estadisticas_cache["fallos"] > 0:
+    with st.sidebar.expander("Caché de resultados"):
+        st.json(estadisticas_cache)
+
 # Información en el pie de página
 st.markdown("---")
 st.markdown("Desarrollado con Streamlit y Python")
+
+# Desglose de tiempos del rerun en la barra lateral
+mostrar_traza_pagina()
@@ -145,7 +145,7 @@ PLAYER_CATEGORIES = {
 POSITION_GROUPS = {
     "Porteros": ["GK", "Goalkeeper"],
     "Defensas": ["CB", "RB", "LB", "RWB", "LWB", "Defender"],
-    "Centrocampistas": ["CM", "CDM", "CAM", "RM", "LM", "Midfielder"],
+    "Centrocampistas": ["CM", "CDM", "CAM", "RM", "LM", "DMF", "AMF", "Midfielder"],
     "Atacantes": ["CF", "ST", "RW", "LW", "SS", "Forward", "Attacker"]
 }
 
@@ -172,3 +172,113 @@ POSITION_MAPPINGS = {
         "percentiles": "percentiles_ofensivos"
     }
 }
+
+# Manifiesto del catálogo y estadísticas por columna (generados con `python -m utils.catalog`)
+MANIFEST_FILE = "manifest.json"
+MANIFEST_STATS_FILE = "manifest_columnas.parquet"
+
+# Índice de archivos por temporada (una línea por archivo, en cada carpeta de temporada)
+SEASON_INDEX_FILE = "index.txt"
+
+# Número máximo de datasets compartidos en memoria por el proceso (se liberan los menos usados)
+REGISTRY_MAX_DATASETS = 20
+
+# Caché en disco de las descargas de GitHub (relativa a la raíz del repositorio)
+DOWNLOAD_CACHE_DIR = ".cache/descargas"
+# Segundos durante los que una descarga verificada se reutiliza sin consultar al servidor
+DOWNLOAD_CACHE_MAX_AGE = 300
+
+# Cliente HTTP compartido: conexiones simultáneas, reintentos, backoff base (s) y timeout (s)
+HTTP_MAX_CONCURRENCY = 8
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_TIMEOUT = 30
+# Espera máxima (s) que se acepta de un Retry-After; si el servidor pide más, no se reintenta
+HTTP_MAX_RETRY_AFTER = 30
+
+# Lectura remota de Parquet con peticiones Range: bytes finales leídos al abrir
+# (incluyen el pie del archivo) y distancia máxima para unir fragmentos de columna
+REMOTE_PARQUET_FOOTER_BYTES = 128 * 1024
+REMOTE_PARQUET_COALESCE_BYTES = 16 * 1024
+
+# Tipos compactos al cargar: opción activada por defecto y proporción máxima de
+# valores distintos para convertir una columna de texto en categoría
+COMPACT_DTYPES_DEFAULT = True
+COMPACT_CATEGORY_RATIO = 0.5
+
+# Caché en disco de los archivos subidos convertidos a Parquet y su tamaño máximo (bytes)
+UPLOAD_CACHE_DIR = ".cache/subidas"
+UPLOAD_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# Índice de similitud de todo el corpus (generado con `python -m utils.ann_index`):
+# directorio, minutos mínimos por temporada, listas por raíz del número de
+# jugadores y listas recorridas por consulta
+ANN_INDEX_DIR = ".cache/indice_similitud"
+ANN_MIN_MINUTES = 300
+ANN_LISTS_PER_SQRT = 2
+ANN_NPROBE = 32
+
+# Cubo de percentiles por temporada, liga y grupo de posiciones (generado con
+# `python -m utils.percentile_cube`) y umbrales de minutos mínimos del cubo
+PERCENTILE_CUBE_FILE = ".cache/percentiles_cubo.parquet"
+PERCENTILE_MINUTES_BUCKETS = [0, 450, 900, 1800]
+
+# Buscador de nombres de todas las ligas (generado con `python -m utils.name_search`):
+# directorio y número máximo de resultados por búsqueda
+NAME_SEARCH_DIR = ".cache/buscador_nombres"
+NAME_SEARCH_MAX_RESULTS = 25
+
+# Número máximo de jugadores en la comparación de una lista corta
+SHORTLIST_MAX_PLAYERS = 15
+
+# Informes en lote: directorio de los informes guardados, procesos del pool (None:
+# uno por CPU), jugadores por lote y mínimo de informes pendientes para usar el pool
+REPORTS_DIR = ".cache/informes"
+REPORTS_PROCESSES = None
+REPORTS_BATCH_SIZE = 25
+REPORTS_MIN_PARALLEL = 50
+
+# Reconstrucción incremental de los artefactos (`python -m utils.pipeline`):
+# directorio de las partes por archivo y del estado, y procesos del pool (None: uno por CPU)
+PIPELINE_DIR = ".cache/pipeline"
+PIPELINE_PROCESSES = None
+
+# Memoria máxima (bytes) de la caché de resultados derivados por huella del dataset
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Benchmarks (`python -m utils.benchmarks`): archivo de resultados versionado
+# y ejecuciones cronometradas de cada caso
+BENCHMARKS_FILE = "benchmarks.json"
+BENCHMARK_REPEATS = 3
+
+# Trazas de tiempos por rerun: panel en la barra lateral, si se permite activarlo
+# con `?debug=1` en la URL, y archivo con una línea JSON por tramo (al superar el
+# tamaño máximo se renombra a `.1` y se empieza uno nuevo)
+TRACING_ENABLED = False
+TRACING_URL_FLAG = False
+TRACES_FILE = ".cache/trazas.jsonl"
+TRACES_MAX_BYTES = 20 * 1024 * 1024
+
+# Servidor HTTP de consultas (`python -m utils.api_server`): dirección, puerto e
+# hilos que ejecutan las consultas
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_THREADS = 4
+
+# Escaneo de similitud de una lista de objetivos (`python -m utils.similarity_scan`):
+# directorio de las partes por archivo, minutos mínimos, similares por objetivo y
+# procesos del pool (None: uno por CPU)
+SIMILARITY_SCAN_DIR = ".cache/escaneos"
+SIMILARITY_SCAN_MIN_MINUTES = 900
+SIMILARITY_SCAN_K = 20
+SIMILARITY_SCAN_PROCESSES = None
+
+# Almacén de métricas estandarizadas por dataset (`utils.feature_store`): directorio,
+# huellas de dataset que se conservan en disco y matrices abiertas por proceso
+FEATURE_STORE_DIR = ".cache/caracteristicas"
+FEATURE_STORE_MAX_DATASETS = 20
+FEATURE_STORE_MAX_OPEN = 16
+
+# Columnas numéricas de contexto que no entran en la similitud de los informes
+SIMILARITY_EXCLUDED_COLUMNS = ["Wyscout id", "Age", "Market value", "Matches played", "Minutes played",
+                               "Height", "Weight"]
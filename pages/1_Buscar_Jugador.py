@@ -1,8 +1,11 @@
+import time
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from utils.data_loader import verificar_datos_cargados, obtener_datos
+from utils.data_loader import verificar_datos_cargados, obtener_datos, obtener_buscador_nombres, iniciar_traza_pagina, mostrar_traza_pagina
+from utils.tracing import seccion
 from utils.visualization import grafico_radar_jugador
+from utils.lazy_frame import a_dataframe
 import config
 
 # Configuración de la página
@@ -12,14 +15,39 @@ st.set_page_config(
     layout="wide"
 )
 
+# Trazas de tiempos del rerun (ver utils.tracing)
+iniciar_traza_pagina("Buscar Jugador")
+
 # Título de la página
 st.title("Buscar Jugador")
 
+# Búsqueda por nombre en todas las ligas y temporadas (no necesita datos cargados)
+seccion("Búsqueda en todas las ligas")
+buscador = obtener_buscador_nombres()
+if buscador is not None:
+    with st.expander("Buscar en todas las ligas y temporadas", expanded=False):
+        busqueda_global = st.text_input("Nombre del jugador (admite erratas y nombres sin tildes):", key="busqueda_global")
+        if busqueda_global:
+            inicio = time.perf_counter()
+            encontrados = buscador.buscar(busqueda_global)
+            segundos = time.perf_counter() - inicio
+            if encontrados.empty:
+                st.warning(f"No se encontraron jugadores parecidos a '{busqueda_global}'.")
+            else:
+                encontrados = encontrados.rename(columns={
+                    "Player": "Jugador", "Full name": "Nombre completo", "Team": "Equipo",
+                    "league": "Liga", "season": "Temporada"
+                })
+                encontrados.index = encontrados.index + 1
+                st.dataframe(encontrados.drop(columns=["Wyscout id"]))
+                st.caption(f"{buscador.info['nombres']} nombres indexados · búsqueda en {segundos * 1000:.0f} ms")
+
 # Verificar si hay datos cargados
 if not verificar_datos_cargados():
     st.stop()
 
 # Obtener datos
+seccion("Datos")
 data = obtener_datos()
 
 # Determinar la columna de nombres de jugadores
@@ -30,6 +58,7 @@ col_nombres = st.selectbox(
 )
 
 # Sidebar para filtros
+seccion("Filtros")
 st.sidebar.header("Filtros de búsqueda")
 
 # Filtro por posición si está disponible
@@ -91,6 +120,7 @@ if "Team" in data.columns:
 st.sidebar.info(f"Jugadores disponibles: {len(data_filtrada)}")
 
 # Crear campo de búsqueda
+seccion("Resultados")
 busqueda = st.text_input("Buscar jugador por nombre:")
 
 if busqueda:
@@ -165,14 +195,14 @@ if busqueda:
             if cols_mostrar:
                 st.dataframe(ficha_jugador[cols_mostrar])
             else:
-                st.dataframe(ficha_jugador)
+                st.dataframe(a_dataframe(ficha_jugador))
         
         with tabs[1]:
             # Perfil ofensivo
             st.subheader("Perfil ofensivo")
             
             # Obtener columnas numéricas
-            num_cols = ficha_jugador.select_dtypes(include=['float64', 'int64']).columns.tolist()
+            num_cols = ficha_jugador.select_dtypes(include='number').columns.tolist()
             
             # Columnas ofensivas para radar
             radar_cols = [col for col in config.DEFAULT_COLUMNS["radar_ofensivo"] if col in num_cols]
@@ -233,9 +263,9 @@ if busqueda:
             else:
                 st.info("No hay suficientes columnas de pases para generar un perfil.")
         
-        # Mostrar todos los datos disponibles (expandible)
-        with st.expander("Ver todos los datos disponibles"):
-            st.dataframe(ficha_jugador)
+        # Mostrar todos los datos disponibles (solo se leen todas las columnas si se pide)
+        if st.checkbox("Ver todos los datos disponibles"):
+            st.dataframe(a_dataframe(ficha_jugador))
     else:
         st.warning(f"No se encontraron jugadores con el nombre '{busqueda}'")
 else:
@@ -252,7 +282,10 @@ else:
     if cols_basicas:
         st.dataframe(data_filtrada[cols_basicas].head(max_jugadores))
     else:
-        st.dataframe(data_filtrada.head(max_jugadores))
+        st.dataframe(a_dataframe(data_filtrada).head(max_jugadores))
     
     if len(data_filtrada) > max_jugadores:
         st.info(f"Mostrando {max_jugadores} de {len(data_filtrada)} jugadores. Usa la búsqueda para encontrar jugadores específicos.")
+
+# Desglose de tiempos del rerun en la barra lateral
+mostrar_traza_pagina()
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import verificar_datos_cargados, obtener_datos
+from utils.data_loader import verificar_datos_cargados, obtener_datos, obtener_indice_jugadores, memoizar_resultado, iniciar_traza_pagina, mostrar_traza_pagina
+from utils.tracing import seccion
 from utils.data_processing import comparar_jugadores_datos
-from utils.visualization import grafico_comparacion_barras, grafico_radar_comparacion
+from utils.visualization import grafico_comparacion_barras, grafico_radar_comparacion, grafico_radar_lista
+from utils.comparison import ComparacionJugadores
 import config
 
 # Configuración de la página
@@ -12,6 +14,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Trazas de tiempos del rerun (ver utils.tracing)
+iniciar_traza_pagina("Comparar Jugadores")
+
 # Título de la página
 st.title("Comparar Jugadores")
 
@@ -20,6 +25,7 @@ if not verificar_datos_cargados():
     st.stop()
 
 # Obtener datos
+seccion("Datos")
 data = obtener_datos()
 
 # Determinar la columna de nombres de jugadores
@@ -30,6 +36,7 @@ col_nombres = st.selectbox(
 )
 
 # Filtros para ayudar a encontrar jugadores para comparar
+seccion("Filtros")
 with st.expander("Filtros para selección de jugadores", expanded=False):
     # Filtro por posición si está disponible
     posicion_filtro = None
@@ -74,15 +81,18 @@ with st.expander("Filtros para selección de jugadores", expanded=False):
     # Mostrar número de jugadores disponibles
     st.info(f"Jugadores disponibles: {len(data_filtrada)}")
 
-# Seleccionar jugadores a comparar
-nombres_jugadores = data_filtrada[col_nombres].unique().tolist()
+# Seleccionar jugadores a comparar (los nombres repetidos se distinguen por equipo y nacimiento)
+seccion("Selección de jugadores")
+indice_jugadores = obtener_indice_jugadores(col_nombres)
+nombres_jugadores = indice_jugadores.etiquetas(data_filtrada.index)
 
 col1, col2 = st.columns(2)
 with col1:
     jugador1 = st.selectbox("Selecciona el primer jugador:", nombres_jugadores)
     
     # Mostrar información básica del primer jugador
-    jugador1_info = data[data[col_nombres] == jugador1].iloc[0]
+    cols_info = [c for c in ["Team", "Position", "Age"] if c in data.columns]
+    jugador1_info = indice_jugadores.fila(data, jugador1, cols_info)
     
     # Crear tabla con información básica
     info_basica = []
@@ -104,7 +114,7 @@ with col2:
                            [j for j in nombres_jugadores if j != jugador1])
     
     # Mostrar información básica del segundo jugador
-    jugador2_info = data[data[col_nombres] == jugador2].iloc[0]
+    jugador2_info = indice_jugadores.fila(data, jugador2, cols_info)
     
     # Crear tabla con información básica
     info_basica = []
@@ -125,8 +135,8 @@ posicion_j1 = None
 posicion_j2 = None
 
 if "Position" in data.columns:
-    pos1 = data[data[col_nombres] == jugador1]["Position"].values[0]
-    pos2 = data[data[col_nombres] == jugador2]["Position"].values[0]
+    pos1 = jugador1_info["Position"]
+    pos2 = jugador2_info["Position"]
     
     # Determinar grupo de posición para cada jugador
     for grupo, posiciones in config.POSITION_GROUPS.items():
@@ -136,15 +146,23 @@ if "Position" in data.columns:
             if p in pos2:
                 posicion_j2 = grupo
 
+def comparar(metricas):
+    """Compara a los dos jugadores seleccionados; se calcula una vez por dataset, jugadores y métricas."""
+    return memoizar_resultado(
+        "comparacion", (jugador1, jugador2, metricas, col_nombres),
+        lambda: comparar_jugadores_datos(data, jugador1, jugador2, metricas, col_nombres, indice_jugadores)
+    )
+
 # Crear pestañas para diferentes categorías de comparación
-tabs = st.tabs(["General", "Ofensivo", "Defensivo", "Pases", "Personalizado"])
+seccion("Pestañas de comparación")
+tabs = st.tabs(["General", "Ofensivo", "Defensivo", "Pases", "Personalizado", "Lista corta"])
 
 with tabs[0]:
     # Comparación general
     st.header(f"Comparación General: {jugador1} vs {jugador2}")
     
     # Obtener columnas numéricas
-    num_cols = data.select_dtypes(include=['float64', 'int64']).columns.tolist()
+    num_cols = data.select_dtypes(include='number').columns.tolist()
     
     # Sugerir métricas generales
     metricas_sugeridas = [
@@ -157,7 +175,7 @@ with tabs[0]:
     
     if metricas_general:
         # Generar la comparación
-        comp_data = comparar_jugadores_datos(data, jugador1, jugador2, metricas_general, col_nombres)
+        comp_data = comparar(metricas_general)
         
         # Mostrar comparación en gráfico de barras
         fig_barras = grafico_comparacion_barras(comp_data, jugador1, jugador2)
@@ -190,7 +208,7 @@ with tabs[1]:
         
         if metricas_ofensivas:
             # Generar la comparación
-            comp_data = comparar_jugadores_datos(data, jugador1, jugador2, metricas_ofensivas, col_nombres)
+            comp_data = comparar(metricas_ofensivas)
             
             # Mostrar comparación en gráfico de barras
             fig_barras = grafico_comparacion_barras(comp_data, jugador1, jugador2)
@@ -223,7 +241,7 @@ with tabs[2]:
         
         if metricas_defensivas:
             # Generar la comparación
-            comp_data = comparar_jugadores_datos(data, jugador1, jugador2, metricas_defensivas, col_nombres)
+            comp_data = comparar(metricas_defensivas)
             
             # Mostrar comparación en gráfico de barras
             fig_barras = grafico_comparacion_barras(comp_data, jugador1, jugador2)
@@ -256,7 +274,7 @@ with tabs[3]:
         
         if metricas_pases:
             # Generar la comparación
-            comp_data = comparar_jugadores_datos(data, jugador1, jugador2, metricas_pases, col_nombres)
+            comp_data = comparar(metricas_pases)
             
             # Mostrar comparación en gráfico de barras
             fig_barras = grafico_comparacion_barras(comp_data, jugador1, jugador2)
@@ -281,7 +299,7 @@ with tabs[4]:
     
     if metricas:
         # Generar la comparación
-        comp_data = comparar_jugadores_datos(data, jugador1, jugador2, metricas, col_nombres)
+        comp_data = comparar(metricas)
         
         # Mostrar comparación en gráfico de barras
         fig_barras = grafico_comparacion_barras(comp_data, jugador1, jugador2)
@@ -297,7 +315,41 @@ with tabs[4]:
     else:
         st.info("Selecciona al menos una métrica para comparar a los jugadores.")
 
+with tabs[5]:
+    # Comparación de una lista corta de jugadores
+    st.header("Comparación de una lista corta")
+    
+    lista_corta = st.multiselect(
+        f"Selecciona hasta {config.SHORTLIST_MAX_PLAYERS} jugadores:",
+        nombres_jugadores,
+        default=[jugador1, jugador2],
+        max_selections=config.SHORTLIST_MAX_PLAYERS
+    )
+    metricas_lista = st.multiselect(
+        "Selecciona métricas para la lista corta:",
+        num_cols,
+        default=metricas_general
+    )
+    
+    if len(lista_corta) >= 2 and metricas_lista:
+        # Una sola extracción de la matriz jugadores × métricas
+        comparacion = ComparacionJugadores(data, lista_corta, metricas_lista, col_nombres, indice_jugadores)
+        
+        if len(metricas_lista) >= 3:
+            fig_radar = grafico_radar_lista(comparacion.normalizados())
+            st.plotly_chart(fig_radar, use_container_width=True)
+        
+        st.subheader("Valores")
+        st.dataframe(comparacion.valores)
+        
+        referencia = st.selectbox("Jugador de referencia para las diferencias:", lista_corta)
+        st.subheader(f"Diferencias con {referencia}")
+        st.dataframe(comparacion.diferencias(referencia))
+    else:
+        st.info("Selecciona al menos dos jugadores y una métrica para comparar la lista corta.")
+
 # Agregar análisis detallado de la comparación
+seccion("Análisis detallado")
 if st.checkbox("Mostrar análisis detallado de las diferencias"):
     st.subheader("Análisis de Diferencias")
     
@@ -318,7 +370,7 @@ if st.checkbox("Mostrar análisis detallado de las diferencias"):
     
     if todas_metricas:
         # Generar la comparación completa
-        comp_data_completa = comparar_jugadores_datos(data, jugador1, jugador2, todas_metricas, col_nombres)
+        comp_data_completa = comparar(todas_metricas)
         
         # Para cada métrica, determinar quién es mejor
         ventajas_j1 = []
@@ -444,3 +496,6 @@ if st.checkbox("Mostrar análisis detallado de las diferencias"):
             st.dataframe(top_diff)
     else:
         st.info("Selecciona métricas en las pestañas anteriores para ver un análisis detallado.")
+
+# Desglose de tiempos del rerun en la barra lateral
+mostrar_traza_pagina()
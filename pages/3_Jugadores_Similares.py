@@ -1,8 +1,11 @@
+import time
 import streamlit as st
 import pandas as pd
-from utils.data_loader import verificar_datos_cargados, obtener_datos
+from utils.data_loader import verificar_datos_cargados, obtener_datos, obtener_indice_similitud, obtener_indice_jugadores, obtener_caracteristicas, memoizar_resultado, iniciar_traza_pagina, mostrar_traza_pagina
+from utils.tracing import seccion
 from utils.data_processing import encontrar_jugadores_similares, comparar_jugadores_datos
 from utils.visualization import grafico_similitud_barras, grafico_radar_comparacion
+from utils.ann_index import similares_jugador
 import config
 
 # Configuración de la página
@@ -12,6 +15,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Trazas de tiempos del rerun (ver utils.tracing)
+iniciar_traza_pagina("Jugadores Similares")
+
 # Título de la página
 st.title("Encontrar Jugadores Similares")
 
@@ -20,6 +26,7 @@ if not verificar_datos_cargados():
     st.stop()
 
 # Obtener datos
+seccion("Datos")
 data = obtener_datos()
 
 # Determinar la columna de nombres de jugadores
@@ -29,14 +36,16 @@ col_nombres = st.selectbox(
     index=data.columns.get_loc(config.DEFAULT_COLUMNS["nombres"]) if config.DEFAULT_COLUMNS["nombres"] in data.columns else 0
 )
 
-# Seleccionar jugador de referencia
-nombres_jugadores = data[col_nombres].unique().tolist()
+# Seleccionar jugador de referencia (los nombres repetidos se distinguen por equipo y nacimiento)
+seccion("Selección")
+indice_jugadores = obtener_indice_jugadores(col_nombres)
+nombres_jugadores = indice_jugadores.etiquetas()
 jugador_ref = st.selectbox("Selecciona el jugador de referencia:", nombres_jugadores)
 
 # Seleccionar características para la comparación
 st.subheader("Selecciona características para encontrar similitud")
 # Obtener columnas numéricas
-num_cols = data.select_dtypes(include=['float64', 'int64']).columns.tolist()
+num_cols = data.select_dtypes(include='number').columns.tolist()
 
 # Sugerir métricas preconfiguradas si están disponibles
 features_sugeridas = [col for col in config.DEFAULT_COLUMNS["comparacion_ofensiva"] if col in num_cols]
@@ -50,12 +59,17 @@ else:
     features = st.multiselect("Características a considerar:", num_cols)
 
 # Número de jugadores similares a mostrar
+seccion("Similares en el dataset")
 num_similares = st.slider("Número de jugadores similares a mostrar:", 1, 10, 5)
 
 if features:
     try:
-        # Encontrar jugadores similares
-        similarity_df = encontrar_jugadores_similares(data, jugador_ref, features, num_similares, col_nombres)
+        # Encontrar jugadores similares (una vez por dataset, jugador y métricas)
+        similarity_df = memoizar_resultado(
+            "similares", (jugador_ref, features, num_similares, col_nombres),
+            lambda: encontrar_jugadores_similares(data[[col_nombres]], jugador_ref, features, num_similares, col_nombres, indice_jugadores,
+                                                  obtener_caracteristicas(features))
+        )
         
         if not similarity_df.empty:
             # Mostrar los jugadores más similares
@@ -76,7 +90,10 @@ if features:
                 jugador_similar = similarity_df['Jugador'].iloc[0]
                 
                 # Crear tabla comparativa
-                comp_data = comparar_jugadores_datos(data, jugador_ref, jugador_similar, features, col_nombres)
+                comp_data = memoizar_resultado(
+                    "comparacion", (jugador_ref, jugador_similar, features, col_nombres),
+                    lambda: comparar_jugadores_datos(data, jugador_ref, jugador_similar, features, col_nombres, indice_jugadores)
+                )
                 
                 # Mostrar tabla
                 st.dataframe(comp_data)
@@ -97,7 +114,10 @@ if features:
                     
                     if st.button(f"Comparar con {otro_similar}"):
                         # Crear tabla comparativa
-                        comp_data_alt = comparar_jugadores_datos(data, jugador_ref, otro_similar, features, col_nombres)
+                        comp_data_alt = memoizar_resultado(
+                            "comparacion", (jugador_ref, otro_similar, features, col_nombres),
+                            lambda: comparar_jugadores_datos(data, jugador_ref, otro_similar, features, col_nombres, indice_jugadores)
+                        )
                         
                         # Mostrar tabla
                         st.dataframe(comp_data_alt)
@@ -113,3 +133,38 @@ if features:
         st.error(f"Error al calcular la similitud: {e}")
 else:
     st.info("Selecciona al menos una característica para encontrar jugadores similares.")
+
+# Búsqueda en todas las ligas y temporadas con el índice de similitud
+seccion("Similares en todas las ligas")
+st.subheader("Jugadores similares en todas las ligas")
+indice = obtener_indice_similitud()
+if indice is None:
+    st.info("El índice de similitud no está construido. Genéralo con `python -m utils.ann_index`.")
+elif st.checkbox(f"Buscar jugadores similares a {jugador_ref} en todas las ligas y temporadas"):
+    # Solo las columnas que usa el índice (posición, identificador y métricas)
+    metricas_indice = [c for g in indice.grupos for c in indice.features(g)]
+    columnas_ref = [c for c in dict.fromkeys([col_nombres, "Wyscout id", "Primary position", "Position"] + metricas_indice)
+                    if c in data.columns]
+    fila_ref = indice_jugadores.fila(data, jugador_ref, columnas_ref)
+    inicio = time.perf_counter()
+    grupo, similares_corpus = similares_jugador(
+        indice, fila_ref, num_similares,
+        temporada=st.session_state.get('temporada_actual'),
+        liga=st.session_state.get('liga_actual')
+    )
+    segundos = time.perf_counter() - inicio
+    
+    if grupo is None:
+        st.warning(f"No se puede buscar a {jugador_ref} en el índice: falta su posición o sus métricas.")
+    else:
+        info_grupo = indice.info["grupos"][grupo]
+        similares_corpus.index = similares_corpus.index + 1
+        st.dataframe(similares_corpus.drop(columns=["Wyscout id"]))
+        st.caption(
+            f"{grupo}: {info_grupo['filas']} jugadores indexados · "
+            f"recall@10 {info_grupo['recall']:.2f} frente a la búsqueda exacta · "
+            f"consulta en {segundos * 1000:.0f} ms"
+        )
+
+# Desglose de tiempos del rerun en la barra lateral
+mostrar_traza_pagina()
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import verificar_datos_cargados, obtener_datos
-from utils.data_processing import calcular_percentiles
+from utils.data_loader import verificar_datos_cargados, obtener_datos, obtener_percentiles, obtener_cubo_percentiles, obtener_indice_jugadores, memoizar_resultado, iniciar_traza_pagina, mostrar_traza_pagina
+from utils.tracing import seccion
+from utils.data_processing import calcular_percentiles, calcular_percentiles_contexto
 from utils.visualization import grafico_percentiles_barras, grafico_distribucion_metrica
 import config
 
@@ -12,6 +13,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Trazas de tiempos del rerun (ver utils.tracing)
+iniciar_traza_pagina("Análisis de Percentiles")
+
 # Título de la página
 st.title("Análisis de Percentiles")
 
@@ -20,6 +24,7 @@ if not verificar_datos_cargados():
     st.stop()
 
 # Obtener datos
+seccion("Datos")
 data = obtener_datos()
 
 # Determinar la columna de nombres de jugadores
@@ -29,14 +34,16 @@ col_nombres = st.selectbox(
     index=data.columns.get_loc(config.DEFAULT_COLUMNS["nombres"]) if config.DEFAULT_COLUMNS["nombres"] in data.columns else 0
 )
 
-# Seleccionar jugador
-nombres_jugadores = data[col_nombres].unique().tolist()
+# Seleccionar jugador (los nombres repetidos se distinguen por equipo y nacimiento)
+seccion("Selección")
+indice_jugadores = obtener_indice_jugadores(col_nombres)
+nombres_jugadores = indice_jugadores.etiquetas()
 jugador = st.selectbox("Selecciona un jugador:", nombres_jugadores)
 
 # Seleccionar métricas para analizar
 st.subheader("Selecciona métricas para el análisis de percentiles")
 # Obtener columnas numéricas
-num_cols = data.select_dtypes(include=['float64', 'int64']).columns.tolist()
+num_cols = data.select_dtypes(include='number').columns.tolist()
 
 # Sugerir métricas preconfiguradas si están disponibles
 metricas_sugeridas = [col for col in config.DEFAULT_COLUMNS["percentiles_general"] if col in num_cols]
@@ -49,9 +56,45 @@ if len(metricas_sugeridas) > 0:
 else:
     metricas = st.multiselect("Métricas a analizar:", num_cols)
 
+# Grupo de comparación: todo el dataset cargado o, con el cubo de percentiles,
+# los jugadores de su misma posición, liga y temporada
+seccion("Percentiles")
+cubo = obtener_cubo_percentiles()
+por_contexto = False
+if cubo is not None:
+    referencia = st.radio(
+        "Comparar con:",
+        ["Todos los jugadores cargados", "Jugadores de su posición en su liga y temporada"],
+        horizontal=True
+    )
+    por_contexto = referencia != "Todos los jugadores cargados"
+    if por_contexto:
+        min_minutos = st.select_slider("Minutos mínimos jugados:", config.PERCENTILE_MINUTES_BUCKETS, value=config.PERCENTILE_MINUTES_BUCKETS[1])
+
 if metricas:
-    # Calcular percentiles
-    percentiles_df = calcular_percentiles(data, jugador, metricas, col_nombres)
+    # Percentiles precalculados del dataset (se calculan una sola vez)
+    matriz_percentiles = obtener_percentiles()
+    percentiles_df = None
+    
+    if por_contexto:
+        columnas_jugador = [c for c in dict.fromkeys([col_nombres, "Wyscout id", "Primary position", "Position", "season", "league"] + metricas)
+                            if c in data.columns]
+        fila_jugador = indice_jugadores.fila(data, jugador, columnas_jugador)
+        grupo, percentiles_df = calcular_percentiles_contexto(
+            cubo, fila_jugador, metricas, min_minutos,
+            temporada=st.session_state.get('temporada_actual'),
+            liga=st.session_state.get('liga_actual')
+        )
+        if percentiles_df is None:
+            st.warning(f"{jugador} no está en el cubo de percentiles con al menos {min_minutos} minutos; se compara con todos los jugadores cargados.")
+        else:
+            st.caption(f"Percentiles frente a {grupo.lower()} de su liga y temporada con al menos {min_minutos} minutos.")
+    
+    if percentiles_df is None:
+        percentiles_df = memoizar_resultado(
+            "percentiles", (jugador, metricas, col_nombres),
+            lambda: calcular_percentiles(data, jugador, metricas, col_nombres, matriz_percentiles)
+        )
     
     # Mostrar tabla de percentiles
     st.subheader(f"Percentiles de {jugador}")
@@ -99,10 +142,10 @@ if metricas:
     
     if metrica_detalle:
         # Obtener valor del jugador para la métrica seleccionada
-        valor_jugador = data[data[col_nombres] == jugador][metrica_detalle].values[0]
+        valor_jugador = indice_jugadores.fila(data, jugador, [metrica_detalle])[metrica_detalle]
         
         # Crear gráfico de distribución
-        fig_dist = grafico_distribucion_metrica(data, metrica_detalle, valor_jugador, jugador)
+        fig_dist = grafico_distribucion_metrica(data[[metrica_detalle]], metrica_detalle, valor_jugador, jugador)
         st.plotly_chart(fig_dist, use_container_width=True)
         
         # Mostrar estadísticas básicas
@@ -125,8 +168,10 @@ if metricas:
         st.table(stats_df)
         
         # Mostrar ranking
-        ranking = (data[metrica_detalle] > valor_jugador).sum() + 1
-        total = len(data)
+        ranking, total = matriz_percentiles.ranking(jugador, col_nombres, metrica_detalle)
         st.write(f"**Ranking**: {jugador} está en la posición **{ranking}** de **{total}** jugadores en {metrica_detalle}.")
 else:
     st.info("Selecciona al menos una métrica para analizar los percentiles del jugador.")
+
+# Desglose de tiempos del rerun en la barra lateral
+mostrar_traza_pagina()
@@ -1,10 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
-from utils.data_loader import verificar_datos_cargados, obtener_datos
-from utils.data_processing import identificar_fortalezas_debilidades, encontrar_jugadores_similares
+from utils.data_loader import verificar_datos_cargados, obtener_datos, obtener_indice_jugadores, obtener_generador_informes, iniciar_traza_pagina, mostrar_traza_pagina
+from utils.tracing import seccion
+from utils.reports import generar_informes, informe_markdown
 from utils.visualization import grafico_radar_perfil
 import config
 
@@ -15,6 +14,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Trazas de tiempos del rerun (ver utils.tracing)
+iniciar_traza_pagina("Generar Informe IA")
+
 # Título de la página
 st.title("Generar Informe IA")
 
@@ -23,6 +25,7 @@ if not verificar_datos_cargados():
     st.stop()
 
 # Obtener datos
+seccion("Datos")
 data = obtener_datos()
 
 # Determinar la columna de nombres de jugadores
@@ -32,56 +35,38 @@ col_nombres = st.selectbox(
     index=data.columns.get_loc(config.DEFAULT_COLUMNS["nombres"]) if config.DEFAULT_COLUMNS["nombres"] in data.columns else 0
 )
 
-# Seleccionar jugador
-nombres_jugadores = data[col_nombres].unique().tolist()
+# Seleccionar jugador (los nombres repetidos se distinguen por equipo y nacimiento)
+seccion("Selección")
+indice_jugadores = obtener_indice_jugadores(col_nombres)
+nombres_jugadores = indice_jugadores.etiquetas()
 jugador = st.selectbox("Selecciona un jugador para el informe:", nombres_jugadores)
 
 # Botón para generar informe
+seccion("Informe")
 if st.button("Generar Informe IA"):
     with st.spinner("Generando informe... Esto puede tomar unos momentos."):
         try:
-            # Obtener datos del jugador
-            datos_jugador = data[data[col_nombres] == jugador]
-            
-            # Obtener columnas numéricas para análisis
-            num_cols = data.select_dtypes(include=['float64', 'int64']).columns.tolist()
-            
-            # Identificar fortalezas y debilidades
-            analisis = identificar_fortalezas_debilidades(data, jugador, col_nombres, num_cols)
-            fortalezas = analisis['fortalezas']
-            debilidades = analisis['debilidades']
-            percentiles = analisis['percentiles']
-            promedio_percentil = analisis['promedio_percentil']
-            
-            # Encontrar jugadores similares
-            similares = encontrar_jugadores_similares(data, jugador, num_cols, 3, col_nombres)
-            
-            # Determinar categoría del jugador
-            categoria = "en desarrollo"
-            for cat, umbral in sorted(config.PLAYER_CATEGORIES.items(), key=lambda x: x[1], reverse=True):
-                if promedio_percentil >= umbral:
-                    categoria = cat
-                    break
-            
+            # Percentiles, índice y similitud compartidos con el resto de informes del dataset
+            generador = obtener_generador_informes(col_nombres)
+            informe = generar_informes(data, [jugador], col_nombres, generador=generador, procesos=1)['informes'][jugador]
+            fortalezas = informe['fortalezas']
+            debilidades = informe['debilidades']
+            percentiles = informe['percentiles']
+
             # Generar informe
             st.header(f"Informe IA para {jugador}")
-            
+
             # Datos de contexto
             if 'liga_actual' in st.session_state and 'temporada_actual' in st.session_state:
                 st.info(f"Liga: {st.session_state['liga_actual']} | Temporada: {st.session_state['temporada_actual']}")
-            
+
             # Resumen del jugador
             st.subheader("Resumen del jugador")
-            st.write(f"""
-            **{jugador}** presenta un perfil **{categoria}** con un percentil promedio de {promedio_percentil:.1f}%.
-            {"Sus fortalezas principales están en áreas ofensivas y de creación." if any(x in ' '.join(fortalezas) for x in ['Goal', 'Assist', 'xG', 'Attack', 'Shot', 'Pass']) else ""}
-            {"Destaca en aspectos defensivos y de recuperación." if any(x in ' '.join(fortalezas) for x in ['Tackle', 'Intercept', 'Block', 'Recover', 'Aerial', 'Defen']) else ""}
-            {"Muestra una gran capacidad técnica y control del balón." if any(x in ' '.join(fortalezas) for x in ['Dribble', 'Control', 'Touch', 'Technique', 'Carry']) else ""}
-            """)
-            
+            st.write(informe['resumen'])
+
             # Mostrar fortalezas y debilidades en columnas
             col1, col2 = st.columns(2)
-            
+
             with col1:
                 st.subheader("Fortalezas")
                 if fortalezas:
@@ -89,7 +74,7 @@ if st.button("Generar Informe IA"):
                         st.write(f"- **{f}**: {percentiles[f]['valor']:.2f} (Percentil {percentiles[f]['percentil']:.1f}%)")
                 else:
                     st.write("- No se identificaron fortalezas claras (métricas por encima del percentil 80)")
-            
+
             with col2:
                 st.subheader("Áreas de mejora")
                 if debilidades:
@@ -97,66 +82,95 @@ if st.button("Generar Informe IA"):
                         st.write(f"- **{d}**: {percentiles[d]['valor']:.2f} (Percentil {percentiles[d]['percentil']:.1f}%)")
                 else:
                     st.write("- No se identificaron debilidades claras (métricas por debajo del percentil 20)")
-            
-            # Visualización del perfil
+
+            # Visualización del perfil con las métricas más destacadas
             st.subheader("Perfil visual")
-            
-            # Crear gráfico de radar con las principales métricas
-            top_metricas = sorted(percentiles.items(), key=lambda x: abs(x[1]['percentil'] - 50), reverse=True)[:8]
-            
-            categories = [m for m, _ in top_metricas]
+            categories = informe['perfil']
             values = [percentiles[m]['percentil']/100 for m in categories]
-            
+
             fig = grafico_radar_perfil(categories, values, jugador)
             st.plotly_chart(fig, use_container_width=True)
-            
+
             # Jugadores similares
             st.subheader("Jugadores similares")
-            
-            if not similares.empty:
+
+            if informe['similares']:
                 st.write("Los jugadores con un perfil más similar son:")
-                for idx, row in similares.iterrows():
-                    st.write(f"- **{row['Jugador']}** (Similitud: {row['Similitud']:.2f})")
+                for s in informe['similares']:
+                    st.write(f"- **{s['jugador']}** (Similitud: {s['similitud']:.2f})")
             else:
                 st.write("No se encontraron jugadores con perfiles similares.")
-            
+
             # Recomendaciones
             st.subheader("Recomendaciones")
-            
-            if debilidades:
+
+            if informe['recomendaciones']:
                 st.write("Basado en las áreas de mejora identificadas, se recomienda:")
-                for d in debilidades[:3]:  # Top 3 debilidades
-                    st.write(f"- Desarrollar **{d}** mediante entrenamiento específico.")
-                    
-                    # Recomendaciones específicas según el tipo de métrica
-                    if any(x in d for x in ['Goal', 'Finish', 'Shot', 'xG']):
-                        st.write("  - Entrenar la definición con ejercicios de tiro a portería desde diferentes ángulos.")
-                    elif any(x in d for x in ['Assist', 'Key', 'Pass', 'Cross', 'xA']):
-                        st.write("  - Trabajar en la precisión de pases y ejercicios de visión periférica.")
-                    elif any(x in d for x in ['Tackle', 'Intercept', 'Block', 'Defen']):
-                        st.write("  - Mejorar posicionamiento defensivo y timing en las entradas.")
-                    elif any(x in d for x in ['Dribble', 'Carry', 'Progress']):
-                        st.write("  - Realizar ejercicios de control y conducción a alta velocidad.")
-            
+                for r in informe['recomendaciones']:
+                    st.write(f"- Desarrollar **{r['metrica']}** mediante entrenamiento específico.")
+                    if r['consejo']:
+                        st.write(f"  - {r['consejo']}")
+
             # Conclusión
             st.subheader("Conclusión")
-            
-            st.write(f"""
-            {jugador} es un jugador con un perfil {categoria}. 
-            {"Sus principales fortalezas están en " + ", ".join(fortalezas[:3]) + "." if fortalezas else "No presenta fortalezas claras en las métricas analizadas."} 
-            {"Podría mejorar en " + ", ".join(debilidades[:3]) + "." if debilidades else "No presenta debilidades claras en las métricas analizadas."}
-            
-            {"El jugador muestra un gran potencial y podría ser una excelente incorporación." if promedio_percentil >= 70 else ""}
-            {"El jugador presenta un perfil equilibrado con margen de mejora." if 40 <= promedio_percentil < 70 else ""}
-            {"El jugador necesita desarrollo en múltiples áreas para alcanzar un nivel competitivo." if promedio_percentil < 40 else ""}
-            """)
-            
-            # Opción para exportar informe (placeholder)
+            st.write(informe['conclusion'])
+
+            # Exportar informe
             st.write("---")
-            if st.button("Exportar Informe (PDF)"):
-                st.info("Funcionalidad de exportación en desarrollo.")
-            
+            st.download_button(
+                "Exportar Informe (Markdown)",
+                informe_markdown(informe),
+                file_name=f"informe_{informe['nombre']}.md",
+                mime="text/markdown"
+            )
+
         except Exception as e:
             st.error(f"Error al generar el informe: {e}")
 else:
     st.info("Selecciona un jugador y haz clic en 'Generar Informe IA' para obtener un análisis detallado.")
+
+# Informes en lote: una plantilla, todos los jugadores cargados o una lista corta
+seccion("Informes en lote")
+st.write("---")
+st.header("Informes en lote")
+st.write("Los informes ya generados para estos datos se reutilizan; solo se generan los nuevos.")
+
+alcance = st.radio("Generar informes de:", ["Un equipo", "Lista corta", "Todos los jugadores cargados"], horizontal=True)
+if alcance == "Un equipo" and "Team" in data.columns:
+    equipos = sorted(data["Team"].dropna().astype(str).unique().tolist())
+    equipo = st.selectbox("Equipo:", equipos)
+    jugadores_lote = indice_jugadores.etiquetas(data.index[data["Team"].astype(str) == equipo])
+elif alcance == "Lista corta":
+    jugadores_lote = st.multiselect("Jugadores:", nombres_jugadores)
+else:
+    jugadores_lote = nombres_jugadores
+
+if st.button(f"Generar {len(jugadores_lote)} informes", disabled=not jugadores_lote):
+    barra = st.progress(0.0)
+    try:
+        resultado = generar_informes(
+            data, jugadores_lote, col_nombres,
+            generador=obtener_generador_informes(col_nombres),
+            progreso=lambda hechos, total: barra.progress(hechos / total, text=f"{hechos}/{total} informes")
+        )
+        st.success(f"{resultado['generados']} informes generados y {resultado['reutilizados']} reutilizados.")
+        informes = list(resultado['informes'].values())
+        st.dataframe(pd.DataFrame({
+            'Jugador': [i['jugador'] for i in informes],
+            'Categoría': [i['categoria'] for i in informes],
+            'Percentil promedio': [round(i['promedio_percentil'], 1) for i in informes],
+            'Fortalezas': [len(i['fortalezas']) for i in informes],
+            'Áreas de mejora': [len(i['debilidades']) for i in informes],
+            'Más similar': [i['similares'][0]['jugador'] if i['similares'] else "" for i in informes]
+        }), hide_index=True)
+        st.download_button(
+            "Descargar informes (Markdown)",
+            "\n---\n\n".join(informe_markdown(i) for i in informes),
+            file_name="informes.md",
+            mime="text/markdown"
+        )
+    except Exception as e:
+        st.error(f"Error al generar los informes: {e}")
+
+# Desglose de tiempos del rerun en la barra lateral
+mostrar_traza_pagina()
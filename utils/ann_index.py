@@ -0,0 +1,377 @@
+"""
+Índice aproximado de vecinos más cercanos (IVF) para buscar jugadores similares
+en todas las ligas y temporadas de ``Ligas_Parquet``.
+
+Uso:
+    python -m utils.ann_index
+"""
+import json
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import config
+from utils.catalog import ruta_repositorio
+from utils.dataset import cargar_multiliga, COLUMNA_TEMPORADA, COLUMNA_LIGA
+from utils.data_processing import grupo_posicion
+from utils.similarity import normalizar_matriz, parametros_normalizacion, top_k
+
+VERSION_INDICE = 1
+ARCHIVO_INDICE = "indice.json"
+COLUMNA_ID = "Wyscout id"
+COLUMNAS_FILAS = [COLUMNA_ID, "Player", "Team", "Primary position", "Age", "Minutes played",
+                  COLUMNA_TEMPORADA, COLUMNA_LIGA]
+
+
+def ruta_directorio_indice(directorio=None):
+    """Devuelve el directorio del índice (``config.ANN_INDEX_DIR``)."""
+    return ruta_repositorio(config.ANN_INDEX_DIR, directorio)
+
+
+def _carpeta_grupo(grupo):
+    texto = unicodedata.normalize("NFKD", grupo).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", texto.lower()).strip("_")
+
+
+def features_grupo(grupo):
+    """Métricas del índice para un grupo: las generales más las de comparación del grupo."""
+    especificas = config.DEFAULT_COLUMNS[config.POSITION_MAPPINGS[grupo]["comparacion"]]
+    return list(dict.fromkeys(config.DEFAULT_COLUMNS["percentiles_general"] + especificas))
+
+
+def _kmeans_esferico(vectores, n_listas, semilla, iteraciones=10, muestra_max=100_000):
+    """Centroides de norma 1 entrenados con una muestra de los vectores."""
+    rng = np.random.default_rng(semilla)
+    muestra = vectores[rng.choice(len(vectores), min(len(vectores), muestra_max), replace=False)]
+    centroides = muestra[rng.choice(len(muestra), n_listas, replace=False)].copy()
+    for _ in range(iteraciones):
+        asignacion = np.argmax(muestra @ centroides.T, axis=1)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, muestra)
+        normas = np.linalg.norm(sumas, axis=1, keepdims=True)
+        vacias = normas[:, 0] == 0
+        # Las listas vacías se reinician con vectores al azar
+        sumas[vacias] = muestra[rng.choice(len(muestra), int(vacias.sum()), replace=False)]
+        normas[vacias] = 1.0
+        centroides = (sumas / normas).astype(np.float32)
+    return centroides
+
+
+def _asignar(vectores, centroides, bloque=50_000):
+    return np.concatenate([
+        np.argmax(vectores[i:i + bloque] @ centroides.T, axis=1)
+        for i in range(0, len(vectores), bloque)
+    ]) if len(vectores) else np.array([], dtype=int)
+
+
+class IndiceSimilitud:
+    """Índice IVF por grupo de posiciones, abierto con memoria mapeada."""
+
+    def __init__(self, directorio, info):
+        self.directorio = directorio
+        self.info = info
+        self._grupos = {}
+        for grupo, datos in info["grupos"].items():
+            carpeta = os.path.join(directorio, datos["carpeta"])
+            cargar = lambda nombre: np.load(os.path.join(carpeta, f"{nombre}.npy"), mmap_mode="r")
+            filas = pd.read_parquet(os.path.join(carpeta, "filas.parquet"))
+            self._grupos[grupo] = {
+                "vectores": cargar("vectores"),
+                "centroides": np.asarray(cargar("centroides")),
+                "inicios": np.asarray(cargar("inicios")),
+                "media": np.asarray(cargar("media")),
+                "desviacion": np.asarray(cargar("desviacion")),
+                "filas": filas,
+                "ids": filas[COLUMNA_ID].to_numpy(),
+            }
+
+    @classmethod
+    def cargar(cls, directorio=None):
+        """
+        Abre un índice guardado.
+
+        Args:
+            directorio (str, optional): Directorio del índice
+
+        Returns:
+            IndiceSimilitud: Índice con los vectores en memoria mapeada
+
+        Raises:
+            FileNotFoundError: Si el índice no se ha construido
+        """
+        directorio = ruta_directorio_indice(directorio)
+        with open(os.path.join(directorio, ARCHIVO_INDICE), encoding="utf-8") as f:
+            info = json.load(f)
+        return cls(directorio, info)
+
+    @property
+    def grupos(self):
+        return list(self._grupos)
+
+    def features(self, grupo):
+        return self.info["grupos"][grupo]["features"]
+
+    def filas(self, grupo):
+        """Devuelve los datos de identificación de los jugadores del grupo (en el orden del índice)."""
+        return self._grupos[grupo]["filas"]
+
+    def normalizar(self, grupo, valores):
+        """Normaliza valores de las métricas del grupo con la media y desviación del índice."""
+        g = self._grupos[grupo]
+        return normalizar_matriz(np.atleast_2d(np.asarray(valores, dtype=np.float64)), g["media"], g["desviacion"])
+
+    def localizar(self, id_jugador, temporada=None, liga=None):
+        """
+        Busca un jugador en el índice por su identificador de Wyscout.
+
+        Args:
+            id_jugador (int): Identificador de Wyscout
+            temporada (str, optional): Temporada preferida
+            liga (str, optional): Liga preferida
+
+        Returns:
+            tuple: (grupo, posición en el índice), o None si no está indexado
+        """
+        mejor, mejor_puntos = None, None
+        for grupo, g in self._grupos.items():
+            for posicion in np.flatnonzero(g["ids"] == id_jugador):
+                fila = g["filas"].iloc[posicion]
+                # Preferir la misma temporada y liga y, después, más minutos
+                puntos = (fila[COLUMNA_TEMPORADA] == temporada, fila[COLUMNA_LIGA] == liga, fila["Minutes played"])
+                if mejor_puntos is None or puntos > mejor_puntos:
+                    mejor, mejor_puntos = (grupo, int(posicion)), puntos
+        return mejor
+
+    def vector(self, grupo, posicion):
+        return np.asarray(self._grupos[grupo]["vectores"][posicion])
+
+    def buscar(self, grupo, vector, k=10, nprobe=None, excluir_id=None):
+        """
+        Busca los k vectores más similares recorriendo las ``nprobe`` listas más cercanas.
+
+        Args:
+            grupo (str): Grupo de posiciones
+            vector (ndarray): Vector normalizado de la consulta
+            k (int): Número de resultados
+            nprobe (int, optional): Listas a recorrer (por defecto ``config.ANN_NPROBE``)
+            excluir_id (int, optional): Identificador de Wyscout a excluir (el propio jugador)
+
+        Returns:
+            tuple: (posiciones en el índice, similitudes), de mayor a menor
+        """
+        g = self._grupos[grupo]
+        nprobe = min(nprobe or config.ANN_NPROBE, len(g["centroides"]))
+        listas = top_k(g["centroides"] @ vector, nprobe)
+        inicios = g["inicios"]
+        tramos = [(inicios[l], inicios[l + 1]) for l in np.sort(listas) if inicios[l + 1] > inicios[l]]
+        if not tramos:
+            return np.array([], dtype=int), np.array([])
+        posiciones = np.concatenate([np.arange(a, b) for a, b in tramos])
+        puntuaciones = np.concatenate([g["vectores"][a:b] @ vector for a, b in tramos])
+        if excluir_id is not None:
+            puntuaciones[g["ids"][posiciones] == excluir_id] = -np.inf
+        seleccion = top_k(puntuaciones, k)
+        return posiciones[seleccion], puntuaciones[seleccion]
+
+    def buscar_exacto(self, grupo, vector, k=10, excluir_id=None):
+        """Búsqueda exacta sobre todos los vectores del grupo (referencia para medir el recall)."""
+        g = self._grupos[grupo]
+        puntuaciones = np.asarray(g["vectores"]) @ vector
+        if excluir_id is not None:
+            puntuaciones[g["ids"] == excluir_id] = -np.inf
+        seleccion = top_k(puntuaciones, k)
+        return seleccion, puntuaciones[seleccion]
+
+    def similares(self, grupo, vector, k=10, nprobe=None, excluir_id=None):
+        """
+        Devuelve los jugadores más similares con sus datos de identificación.
+
+        Returns:
+            DataFrame: Jugador, equipo, posición, edad, minutos, temporada, liga y similitud
+        """
+        posiciones, puntuaciones = self.buscar(grupo, vector, k, nprobe, excluir_id)
+        resultado = self.filas(grupo).iloc[posiciones].reset_index(drop=True)
+        resultado["Similitud"] = puntuaciones.astype(float)
+        return resultado
+
+
+def similares_jugador(indice, fila, k=10, temporada=None, liga=None, nprobe=None):
+    """
+    Busca en el índice los jugadores más similares a un jugador de los datos cargados.
+
+    Si el jugador está indexado (por su identificador de Wyscout) se usa su
+    vector; si no, se calcula a partir de sus métricas con la normalización del
+    índice.
+
+    Args:
+        indice (IndiceSimilitud): Índice abierto
+        fila (Series): Datos del jugador (necesita ``Primary position`` o
+            ``Position`` y las métricas del grupo si no está indexado)
+        k (int): Número de resultados
+        temporada (str, optional): Temporada de los datos cargados
+        liga (str, optional): Liga de los datos cargados
+        nprobe (int, optional): Listas a recorrer
+
+    Returns:
+        tuple: (grupo, DataFrame de similares), o (None, None) si el jugador no
+        tiene un grupo de posiciones o faltan sus métricas
+    """
+    id_jugador = fila.get(COLUMNA_ID)
+    encontrado = indice.localizar(id_jugador, temporada, liga) if pd.notna(id_jugador) else None
+    if encontrado is not None:
+        grupo, posicion = encontrado
+        vector = indice.vector(grupo, posicion)
+    else:
+        posicion = fila.get("Primary position")
+        grupo = grupo_posicion(posicion if isinstance(posicion, str) else fila.get("Position"))
+        if grupo is None or any(c not in fila.index for c in indice.features(grupo)):
+            return None, None
+        vector = indice.normalizar(grupo, fila[indice.features(grupo)].to_numpy(dtype=np.float64))[0]
+    excluir = id_jugador if pd.notna(id_jugador) else None
+    return grupo, indice.similares(grupo, vector, k, nprobe, excluir_id=excluir)
+
+
+def medir_recall(indice, grupo, k=10, nprobe=None, n_consultas=200, semilla=0):
+    """
+    Mide el recall@k del índice frente a la búsqueda exacta con jugadores del propio índice.
+
+    Returns:
+        dict: ``recall`` medio y milisegundos por consulta (aproximada y exacta)
+    """
+    rng = np.random.default_rng(semilla)
+    total = len(indice.filas(grupo))
+    consultas = rng.choice(total, min(n_consultas, total), replace=False)
+    ids = indice._grupos[grupo]["ids"]
+
+    aciertos, t_aprox, t_exacto = [], 0.0, 0.0
+    for posicion in consultas:
+        vector = indice.vector(grupo, posicion)
+        inicio = time.perf_counter()
+        aprox, _ = indice.buscar(grupo, vector, k, nprobe, excluir_id=ids[posicion])
+        t_aprox += time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        exacto, _ = indice.buscar_exacto(grupo, vector, k, excluir_id=ids[posicion])
+        t_exacto += time.perf_counter() - inicio
+        if len(exacto):
+            aciertos.append(len(set(aprox) & set(exacto)) / len(exacto))
+    n = max(len(consultas), 1)
+    return {
+        "recall": round(float(np.mean(aciertos)), 4) if aciertos else None,
+        "ms_consulta": round(1000 * t_aprox / n, 2),
+        "ms_exacta": round(1000 * t_exacto / n, 2),
+    }
+
+
+def cargar_filas_indice(temporadas=None, ligas=None, directorio=None, min_minutos=None):
+    """
+    Lee las filas que entran en el índice: identificación, grupo de posiciones y métricas.
+
+    Args:
+        temporadas (list, optional): Temporadas a leer (todas si es None)
+        ligas (list, optional): Ligas a leer (todas si es None)
+        directorio (str, optional): Directorio de los archivos Parquet
+        min_minutos (int, optional): Minutos mínimos (por defecto ``config.ANN_MIN_MINUTES``)
+
+    Returns:
+        DataFrame: Filas con la columna ``grupo``
+    """
+    min_minutos = config.ANN_MIN_MINUTES if min_minutos is None else min_minutos
+    features = [features_grupo(grupo) for grupo in config.POSITION_GROUPS]
+    columnas = list(dict.fromkeys(COLUMNAS_FILAS + ["Position"] + sum(features, [])))
+    data = cargar_multiliga(temporadas, ligas, columnas=columnas, directorio=directorio,
+                            filtro=[("Minutes played", ">=", min_minutos)])
+    posicion = data["Primary position"].where(data["Primary position"].notna(), data["Position"])
+    data["grupo"] = posicion.map(grupo_posicion)
+    return data
+
+
+def construir_indice(directorio_salida=None, directorio=None, min_minutos=None, semilla=0, data=None):
+    """
+    Construye el índice de similitud a partir de todos los archivos Parquet.
+
+    Args:
+        directorio_salida (str, optional): Directorio donde guardar el índice
+        directorio (str, optional): Directorio de los archivos Parquet
+        min_minutos (int, optional): Minutos mínimos para indexar una temporada
+            de un jugador. Por defecto ``config.ANN_MIN_MINUTES``.
+        semilla (int): Semilla del k-means y de la medición del recall
+        data (DataFrame, optional): Filas ya leídas con ``cargar_filas_indice``
+            (por ejemplo, unidas por ``utils.pipeline``)
+
+    Returns:
+        dict: Información del índice (también guardada en ``indice.json``)
+    """
+    directorio_salida = ruta_directorio_indice(directorio_salida)
+    min_minutos = config.ANN_MIN_MINUTES if min_minutos is None else min_minutos
+
+    features = {grupo: features_grupo(grupo) for grupo in config.POSITION_GROUPS}
+    if data is None:
+        data = cargar_filas_indice(directorio=directorio, min_minutos=min_minutos)
+
+    info = {
+        "version": VERSION_INDICE,
+        "construido": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "min_minutos": min_minutos,
+        "grupos": {}
+    }
+    for grupo, columnas_grupo in features.items():
+        datos = data[data["grupo"] == grupo].reset_index(drop=True)
+        if len(datos) == 0:
+            continue
+        valores = datos[columnas_grupo].to_numpy(dtype=np.float64)
+        media, desviacion = parametros_normalizacion(valores)
+        vectores = normalizar_matriz(valores, media, desviacion)
+
+        n_listas = max(1, min(len(vectores), int(config.ANN_LISTS_PER_SQRT * np.sqrt(len(vectores)))))
+        centroides = _kmeans_esferico(vectores, n_listas, semilla)
+        asignacion = _asignar(vectores, centroides)
+        orden = np.argsort(asignacion, kind="stable")
+        inicios = np.concatenate([[0], np.cumsum(np.bincount(asignacion, minlength=n_listas))])
+
+        carpeta = _carpeta_grupo(grupo)
+        ruta = os.path.join(directorio_salida, carpeta)
+        os.makedirs(ruta, exist_ok=True)
+        np.save(os.path.join(ruta, "vectores.npy"), vectores[orden])
+        np.save(os.path.join(ruta, "centroides.npy"), centroides)
+        np.save(os.path.join(ruta, "inicios.npy"), inicios.astype(np.int64))
+        np.save(os.path.join(ruta, "media.npy"), media)
+        np.save(os.path.join(ruta, "desviacion.npy"), desviacion)
+        datos.iloc[orden][COLUMNAS_FILAS].reset_index(drop=True).to_parquet(
+            os.path.join(ruta, "filas.parquet"), index=False)
+
+        info["grupos"][grupo] = {
+            "carpeta": carpeta,
+            "features": columnas_grupo,
+            "filas": len(vectores),
+            "listas": n_listas,
+        }
+
+    with open(os.path.join(directorio_salida, ARCHIVO_INDICE), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=1)
+
+    # Recall y latencia medidos sobre el índice ya guardado (con memoria mapeada)
+    indice = IndiceSimilitud.cargar(directorio_salida)
+    for grupo in indice.grupos:
+        info["grupos"][grupo].update(medir_recall(indice, grupo, nprobe=config.ANN_NPROBE, semilla=semilla))
+        info["grupos"][grupo]["nprobe"] = config.ANN_NPROBE
+    with open(os.path.join(directorio_salida, ARCHIVO_INDICE), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=1)
+    return info
+
+
+def main():
+    inicio = time.perf_counter()
+    info = construir_indice()
+    print(f"Índice construido en {time.perf_counter() - inicio:.1f} s ({ruta_directorio_indice()})")
+    for grupo, datos in info["grupos"].items():
+        print(f"  {grupo}: {datos['filas']} jugadores, {datos['listas']} listas, "
+              f"recall@10 {datos['recall']:.3f} con nprobe={datos['nprobe']}, "
+              f"{datos['ms_consulta']} ms/consulta (exacta: {datos['ms_exacta']} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Servidor HTTP asíncrono (solo ``asyncio``) con las consultas de ``utils.service`` en JSON.
+
+Rutas GET: /salud, /datasets, /estadisticas, /buscar, /buscar_todas, /perfil,
+/percentiles, /comparar y /similares. El dataset se elige con ``temporada``,
+``liga`` y ``min_minutos``.
+
+Uso:
+    python -m utils.api_server --puerto 8765 --precargar 24-25
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import config
+from utils.result_cache import estadisticas as estadisticas_resultados
+from utils.service import ServicioScouting
+
+# Tamaño máximo de la línea de petición y de las cabeceras
+MAX_CABECERAS = 64 * 1024
+
+ESTADOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ErrorPeticion(Exception):
+    """Error de una petición con su código de estado HTTP."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _uno(parametros, nombre, obligatorio=True, por_defecto=None):
+    valores = parametros.get(nombre)
+    if not valores:
+        if obligatorio:
+            raise ErrorPeticion(400, f"Falta el parámetro '{nombre}'")
+        return por_defecto
+    return valores[-1]
+
+
+def _entero(parametros, nombre, por_defecto):
+    valor = _uno(parametros, nombre, obligatorio=False)
+    if valor is None:
+        return por_defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorPeticion(400, f"'{nombre}' debe ser un número entero") from None
+
+
+class ServidorScouting:
+    """Rutas, pool de hilos y estadísticas del servidor."""
+
+    def __init__(self, servicio=None, hilos=None):
+        """
+        Args:
+            servicio (ServicioScouting, optional): Servicio compartido por todas las peticiones
+            hilos (int, optional): Hilos para las consultas (por defecto ``config.API_THREADS``)
+        """
+        self.servicio = servicio or ServicioScouting()
+        self.pool = ThreadPoolExecutor(max_workers=hilos or config.API_THREADS, thread_name_prefix="api")
+        self.rutas = {
+            "/salud": lambda p: {"estado": "ok"},
+            "/datasets": lambda p: self.servicio.datasets_cargados(),
+            "/estadisticas": lambda p: self.estadisticas(),
+            "/buscar": lambda p: self._dataset(p).buscar(_uno(p, "q"), _entero(p, "limite", None)),
+            "/buscar_todas": lambda p: self.servicio.buscar_todas(_uno(p, "q"), _entero(p, "limite", None)),
+            "/perfil": lambda p: self._dataset(p).perfil(_uno(p, "jugador")),
+            "/percentiles": lambda p: self._dataset(p).percentiles(_uno(p, "jugador"), p.get("metrica")),
+            "/comparar": self._comparar,
+            "/similares": lambda p: self._dataset(p).similares(
+                _uno(p, "jugador"), p.get("metrica"), _entero(p, "n", 10)
+            ),
+        }
+        self._lock = threading.Lock()
+        self._peticiones = 0
+        self._errores = 0
+        self._latencias = {}
+        self._inicio = time.time()
+
+    def _dataset(self, parametros):
+        return self.servicio.dataset(
+            parametros.get("temporada"), parametros.get("liga"), _entero(parametros, "min_minutos", 0)
+        )
+
+    def _comparar(self, parametros):
+        jugadores = parametros.get("jugador") or []
+        if len(jugadores) != 2:
+            raise ErrorPeticion(400, "Indica exactamente dos veces el parámetro 'jugador'")
+        return self._dataset(parametros).comparar(jugadores[0], jugadores[1], parametros.get("metrica"))
+
+    def consultar(self, ruta, parametros):
+        """
+        Ejecuta una consulta (en un hilo del pool).
+
+        Returns:
+            tuple: (estado HTTP, respuesta serializable a JSON)
+        """
+        funcion = self.rutas.get(ruta)
+        if funcion is None:
+            return 404, {"error": f"Ruta desconocida: {ruta}"}
+        try:
+            return 200, funcion(parametros)
+        except ErrorPeticion as e:
+            return e.estado, {"error": str(e)}
+        except KeyError as e:
+            return 404, {"error": f"No encontrado: {e.args[0] if e.args else e}"}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except FileNotFoundError as e:
+            return 503, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    def _registrar(self, ruta, estado, segundos):
+        with self._lock:
+            self._peticiones += 1
+            if estado >= 400:
+                self._errores += 1
+            if ruta in self.rutas:
+                # Ventana de las últimas latencias de cada ruta para los percentiles
+                latencias = self._latencias.setdefault(ruta, [])
+                latencias.append(segundos)
+                if len(latencias) > 10000:
+                    del latencias[:5000]
+
+    def estadisticas(self):
+        """Peticiones, errores, latencias por ruta (ms) y estadísticas de la caché de resultados."""
+        with self._lock:
+            rutas = {
+                ruta: {
+                    "peticiones": len(l),
+                    "p50_ms": round(float(np.percentile(l, 50)) * 1000, 2),
+                    "p95_ms": round(float(np.percentile(l, 95)) * 1000, 2),
+                }
+                for ruta, l in self._latencias.items() if l
+            }
+            return {
+                "peticiones": self._peticiones,
+                "errores": self._errores,
+                "segundos_activo": round(time.time() - self._inicio, 1),
+                "rutas": rutas,
+                "cache_resultados": estadisticas_resultados(),
+            }
+
+    async def _leer_peticion(self, lector):
+        """Lee una petición; devuelve (método, destino, versión, cabeceras) o None si se cerró la conexión."""
+        try:
+            cabecera = await lector.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErrorPeticion(400, "Cabeceras demasiado largas") from None
+        lineas = cabecera.decode("latin-1").split("\r\n")
+        partes = lineas[0].split(" ")
+        if len(partes) != 3:
+            raise ErrorPeticion(400, "Línea de petición no válida")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            if ":" in linea:
+                nombre, valor = linea.split(":", 1)
+                cabeceras[nombre.strip().lower()] = valor.strip()
+        # El cuerpo no se usa, pero se descarta para poder leer la siguiente petición
+        try:
+            longitud = int(cabeceras.get("content-length", 0) or 0)
+        except ValueError:
+            raise ErrorPeticion(400, "Content-Length no válido") from None
+        if longitud < 0:
+            raise ErrorPeticion(400, "Content-Length no válido")
+        if longitud:
+            await lector.readexactly(longitud)
+        return partes[0], partes[1], partes[2], cabeceras
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión (varias peticiones con keep-alive)."""
+        bucle = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    peticion = await self._leer_peticion(lector)
+                except ErrorPeticion as e:
+                    await self._responder(escritor, e.estado, {"error": str(e)}, False)
+                    break
+                if peticion is None:
+                    break
+                metodo, destino, version, cabeceras = peticion
+                seguir = (version == "HTTP/1.1" and cabeceras.get("connection", "").lower() != "close")
+
+                inicio = time.perf_counter()
+                partes = urlsplit(destino)
+                if metodo != "GET":
+                    estado, respuesta = 405, {"error": "Solo se admite GET"}
+                else:
+                    parametros = parse_qs(partes.query)
+                    estado, respuesta = await bucle.run_in_executor(self.pool, self.consultar, partes.path, parametros)
+                await self._responder(escritor, estado, respuesta, seguir)
+                self._registrar(partes.path, estado, time.perf_counter() - inicio)
+                if not seguir:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _responder(self, escritor, estado, respuesta, seguir):
+        cuerpo = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+        cabecera = (
+            f"HTTP/1.1 {estado} {ESTADOS.get(estado, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if seguir else 'close'}\r\n\r\n"
+        )
+        escritor.write(cabecera.encode("latin-1") + cuerpo)
+        await escritor.drain()
+
+    async def iniciar(self, host=None, puerto=None):
+        """
+        Abre el socket del servidor.
+
+        Args:
+            host (str, optional): Dirección (por defecto ``config.API_HOST``)
+            puerto (int, optional): Puerto (por defecto ``config.API_PORT``; 0 = uno libre)
+
+        Returns:
+            asyncio.Server: Servidor escuchando
+        """
+        return await asyncio.start_server(
+            self.atender, host or config.API_HOST, config.API_PORT if puerto is None else puerto,
+            limit=MAX_CABECERAS
+        )
+
+    def cerrar(self):
+        """Detiene el pool de hilos de las consultas."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iniciar_en_hilo(servidor, host=None, puerto=0):
+    """
+    Arranca el servidor en un hilo con su propio bucle de eventos (para pruebas y benchmarks).
+
+    Args:
+        servidor (ServidorScouting): Servidor a arrancar
+        host (str, optional): Dirección
+        puerto (int): Puerto (0 = uno libre)
+
+    Returns:
+        tuple: (puerto, función sin argumentos que detiene el servidor)
+    """
+    bucle = asyncio.new_event_loop()
+    listo = threading.Event()
+    estado = {}
+
+    def ejecutar():
+        asyncio.set_event_loop(bucle)
+        estado["servidor"] = bucle.run_until_complete(servidor.iniciar(host, puerto))
+        listo.set()
+        bucle.run_forever()
+
+    hilo = threading.Thread(target=ejecutar, name="api-servidor", daemon=True)
+    hilo.start()
+    listo.wait()
+
+    def detener():
+        async def cerrar():
+            estado["servidor"].close()
+            await estado["servidor"].wait_closed()
+        asyncio.run_coroutine_threadsafe(cerrar(), bucle).result()
+        bucle.call_soon_threadsafe(bucle.stop)
+        hilo.join()
+        servidor.cerrar()
+
+    return estado["servidor"].sockets[0].getsockname()[1], detener
+
+
+async def peticion_get(host, puerto, ruta, conexion=None):
+    """
+    Cliente mínimo con keep-alive para las pruebas y los benchmarks del servidor.
+
+    Args:
+        host (str): Dirección del servidor
+        puerto (int): Puerto del servidor
+        ruta (str): Ruta con la consulta (ya codificada)
+        conexion (tuple, optional): (lector, escritor) de una conexión abierta
+
+    Returns:
+        tuple: (estado HTTP, respuesta decodificada, conexión para reutilizarla)
+    """
+    if conexion is None:
+        conexion = await asyncio.open_connection(host, puerto)
+    lector, escritor = conexion
+    escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await escritor.drain()
+    cabecera = (await lector.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    estado = int(cabecera[0].split(" ")[1])
+    longitud = next(int(l.split(":", 1)[1]) for l in cabecera if l.lower().startswith("content-length:"))
+    cuerpo = await lector.readexactly(longitud)
+    return estado, json.loads(cuerpo), conexion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de consultas de scouting.")
+    parser.add_argument("--host", default=config.API_HOST, help="Dirección (por defecto config.API_HOST)")
+    parser.add_argument("--puerto", type=int, default=config.API_PORT, help="Puerto (por defecto config.API_PORT)")
+    parser.add_argument("--hilos", type=int, default=None, help="Hilos para las consultas (por defecto config.API_THREADS)")
+    parser.add_argument("--precargar", nargs="*", metavar="TEMPORADA",
+                        help="Temporadas a cargar antes de aceptar peticiones (todas sus ligas)")
+    parser.add_argument("--directorio", default=None,
+                        help="Directorio de los archivos Parquet (por defecto config.PARQUET_DIR)")
+    args = parser.parse_args(argv)
+
+    servidor = ServidorScouting(ServicioScouting(args.directorio), args.hilos)
+    if args.precargar is not None:
+        inicio = time.perf_counter()
+        resumen = servidor.servicio.dataset(args.precargar or None).resumen()
+        print(f"Dataset {', '.join(resumen['clave'][1:])}: {resumen['filas']} jugadores "
+              f"cargados en {time.perf_counter() - inicio:.1f} s")
+
+    async def servir():
+        servidor_http = await servidor.iniciar(args.host, args.puerto)
+        direccion = servidor_http.sockets[0].getsockname()
+        print(f"Escuchando en http://{direccion[0]}:{direccion[1]} (Ctrl+C para detener)")
+        async with servidor_http:
+            await servidor_http.serve_forever()
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Benchmarks de las funciones críticas de ``utils`` con los datos de ``Ligas_Parquet``.
+
+Cada ejecución se añade a ``config.BENCHMARKS_FILE`` y se compara con la anterior.
+
+Uso:
+    python -m utils.benchmarks [--escenarios liga_pequena liga_grande] [--api]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import config
+from utils.api_server import ServidorScouting, iniciar_en_hilo, peticion_get
+from utils.catalog import cargar_manifiesto, clave_temporada, ruta_repositorio
+from utils.data_processing import (calcular_percentiles, identificar_fortalezas_debilidades,
+                                   encontrar_jugadores_similares, comparar_jugadores_datos)
+from utils.dataset import cargar_multiliga
+from utils.name_search import normalizar_nombre
+from utils.percentiles import MatrizPercentiles
+from utils.player_index import IndiceJugadores
+from utils.service import ServicioScouting
+
+# Versión del formato del archivo de resultados
+VERSION_RESULTADOS = 1
+
+ESCENARIOS = ["liga_pequena", "liga_grande", "temporada", "corpus"]
+ESCENARIOS_API = ["liga_grande", "temporada"]
+
+# Rutas del servidor que se miden con --api
+RUTAS_API = ["buscar", "perfil", "percentiles", "comparar", "similares"]
+
+# Métricas de los casos de percentiles, similitud y comparación
+METRICAS = [
+    "Goals per 90", "xG per 90", "Assists per 90", "Shots per 90", "Key passes per 90",
+    "Successful defensive actions per 90", "Passes per 90", "Accurate passes, %"
+]
+NUM_SIMILARES = 10
+COL_NOMBRES = "Player"
+
+
+def ruta_resultados(ruta=None):
+    """Devuelve el archivo de resultados (``config.BENCHMARKS_FILE``)."""
+    return ruta_repositorio(config.BENCHMARKS_FILE, ruta)
+
+
+def definir_escenarios(manifiesto):
+    """
+    Elige las temporadas y ligas de cada escenario a partir del manifiesto.
+
+    Args:
+        manifiesto (dict): Manifiesto del catálogo (ver ``utils.catalog``)
+
+    Returns:
+        dict: Nombre del escenario -> {descripcion, temporadas, ligas (None = todas)}
+    """
+    archivos = manifiesto["archivos"]
+    pequena = min(archivos, key=lambda a: (a["filas"], a["ruta"]))
+    grande = max(archivos, key=lambda a: (a["filas"], a["ruta"]))
+    ultima = max({a["temporada"] for a in archivos}, key=clave_temporada)
+    return {
+        "liga_pequena": {
+            "descripcion": f"{pequena['liga']} {pequena['temporada']}",
+            "temporadas": [pequena["temporada"]], "ligas": [pequena["liga"]]
+        },
+        "liga_grande": {
+            "descripcion": f"{grande['liga']} {grande['temporada']}",
+            "temporadas": [grande["temporada"]], "ligas": [grande["liga"]]
+        },
+        "temporada": {
+            "descripcion": f"Temporada {ultima}",
+            "temporadas": [ultima], "ligas": None
+        },
+        "corpus": {
+            "descripcion": "Todas las ligas y temporadas",
+            "temporadas": None, "ligas": None
+        },
+    }
+
+
+# Pools de Arrow de las mediciones de memoria: se conservan porque los buffers
+# reservados en ellos pueden seguir vivos después de la medición
+_pools = []
+
+
+def _pico_memoria(funcion):
+    """Pico de memoria (bytes) de una ejecución: Python y numpy (``tracemalloc``) más Arrow."""
+    pool_anterior = pa.default_memory_pool()
+    pool = pa.proxy_memory_pool(pool_anterior)
+    _pools.append(pool)
+    pa.set_memory_pool(pool)
+    tracemalloc.start()
+    try:
+        resultado = funcion()
+        _, pico_python = tracemalloc.get_traced_memory()
+        del resultado
+    finally:
+        tracemalloc.stop()
+        pa.set_memory_pool(pool_anterior)
+    return pico_python + pool.max_memory()
+
+
+def medir(funcion, repeticiones):
+    """
+    Mide el tiempo y el pico de memoria de una función.
+
+    Args:
+        funcion (callable): Función sin argumentos
+        repeticiones (int): Ejecuciones cronometradas
+
+    Returns:
+        tuple: (resultado de la última ejecución, dict con ``segundos`` (mediana),
+        ``segundos_min`` y ``pico_mb``)
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    # Memoria en una ejecución aparte: tracemalloc ralentiza las asignaciones
+    pico = _pico_memoria(funcion)
+    return resultado, {
+        "segundos": statistics.median(tiempos),
+        "segundos_min": min(tiempos),
+        "pico_mb": round(pico / 1e6, 2),
+    }
+
+
+def casos(data):
+    """
+    Casos de un escenario sobre los datos ya cargados.
+
+    Los jugadores de referencia son el primero y el del medio del índice de
+    jugadores, así que son los mismos en todas las ejecuciones.
+
+    Args:
+        data (DataFrame): Datos del escenario
+
+    Returns:
+        list: Pares (nombre, función sin argumentos)
+    """
+    indice = IndiceJugadores(data, COL_NOMBRES)
+    etiquetas = indice.etiquetas()
+    jugador1, jugador2 = etiquetas[0], etiquetas[len(etiquetas) // 2]
+    metricas = [m for m in METRICAS if m in data.columns]
+    num_cols = data.select_dtypes(include="number").columns.tolist()
+    datos_similitud = data[[COL_NOMBRES] + metricas]
+
+    return [
+        ("matriz_percentiles", lambda: MatrizPercentiles(data)),
+        ("calcular_percentiles", lambda: calcular_percentiles(data, jugador1, metricas, COL_NOMBRES)),
+        ("identificar_fortalezas_debilidades",
+         lambda: identificar_fortalezas_debilidades(data, jugador1, COL_NOMBRES, num_cols)),
+        ("encontrar_jugadores_similares",
+         lambda: encontrar_jugadores_similares(datos_similitud, jugador1, metricas, NUM_SIMILARES, COL_NOMBRES, indice)),
+        ("comparar_jugadores_datos",
+         lambda: comparar_jugadores_datos(data, jugador1, jugador2, metricas, COL_NOMBRES, indice)),
+    ]
+
+
+def ejecutar_escenario(nombre, escenario, repeticiones, directorio=None):
+    """
+    Ejecuta la carga y los casos de un escenario.
+
+    Args:
+        nombre (str): Nombre del escenario
+        escenario (dict): Temporadas y ligas (ver ``definir_escenarios``)
+        repeticiones (int): Ejecuciones cronometradas de cada caso
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        list: Un resultado por caso (escenario, caso, filas, tiempos, memoria y filas por segundo)
+    """
+    data, medida = medir(
+        lambda: cargar_multiliga(escenario["temporadas"], escenario["ligas"], directorio=directorio),
+        repeticiones
+    )
+    medidas = [("carga_parquet", medida)]
+    for caso, funcion in casos(data):
+        _, medida = medir(funcion, repeticiones)
+        medidas.append((caso, medida))
+
+    filas = len(data)
+    return [
+        {
+            "escenario": nombre,
+            "caso": caso,
+            "filas": filas,
+            "segundos": round(medida["segundos"], 6),
+            "segundos_min": round(medida["segundos_min"], 6),
+            "pico_mb": medida["pico_mb"],
+            "filas_por_segundo": round(filas / medida["segundos"]) if medida["segundos"] > 0 else None,
+        }
+        for caso, medida in medidas
+    ]
+
+
+def _parametros_api(ruta, jugadores, i):
+    """Parámetros de la petición ``i`` de una ruta (cada petición usa un jugador distinto)."""
+    jugador = jugadores[i % len(jugadores)]
+    if ruta == "buscar":
+        return [("q", normalizar_nombre(jugador)[:4] or jugador)]
+    if ruta == "comparar":
+        return [("jugador", jugador), ("jugador", jugadores[(i + 1) % len(jugadores)])]
+    if ruta == "similares":
+        return [("jugador", jugador), ("n", NUM_SIMILARES)]
+    return [("jugador", jugador)]
+
+
+async def _lanzar(puerto, rutas, concurrencia):
+    """Lanza las peticiones con ``concurrencia`` conexiones keep-alive; devuelve latencias, errores y segundos."""
+    pendientes = iter(rutas)
+    latencias = []
+    errores = 0
+
+    async def cliente():
+        nonlocal errores
+        conexion = None
+        try:
+            for ruta in pendientes:
+                inicio = time.perf_counter()
+                estado, _, conexion = await peticion_get(config.API_HOST, puerto, ruta, conexion)
+                latencias.append(time.perf_counter() - inicio)
+                errores += estado != 200
+        finally:
+            if conexion is not None:
+                conexion[1].close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[cliente() for _ in range(concurrencia)])
+    return latencias, errores, time.perf_counter() - inicio
+
+
+def ejecutar_api(nombre, escenario, peticiones, concurrencia, directorio=None):
+    """
+    Mide la latencia y el rendimiento del servidor HTTP en un escenario.
+
+    El dataset y sus derivados (índice, matriz de percentiles) se cargan antes
+    de medir; cada petición consulta un jugador distinto.
+
+    Args:
+        nombre (str): Nombre del escenario
+        escenario (dict): Temporadas y ligas (ver ``definir_escenarios``)
+        peticiones (int): Peticiones por ruta
+        concurrencia (int): Conexiones simultáneas
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        list: Un resultado por ruta (latencias, peticiones por segundo y errores)
+    """
+    servicio = ServicioScouting(directorio)
+    dataset = servicio.dataset(escenario["temporadas"], escenario["ligas"])
+    filas = dataset.resumen()["filas"]
+    etiquetas = dataset.indice.etiquetas()
+    # Calentamiento: construye la matriz de percentiles fuera de la medición
+    dataset.perfil(etiquetas[0])
+    jugadores = [etiquetas[i] for i in np.linspace(0, len(etiquetas) - 1, min(peticiones + 1, len(etiquetas))).astype(int)]
+    alcance = [("temporada", t) for t in dataset.clave[1].split(", ")]
+    alcance += [("liga", l) for l in (escenario["ligas"] or [])]
+
+    servidor = ServidorScouting(servicio, max(concurrencia, config.API_THREADS))
+    puerto, detener = iniciar_en_hilo(servidor)
+    resultados = []
+    try:
+        for ruta in RUTAS_API:
+            rutas = [f"/{ruta}?{urlencode(alcance + _parametros_api(ruta, jugadores, i))}" for i in range(peticiones)]
+            latencias, errores, segundos = asyncio.run(_lanzar(puerto, rutas, concurrencia))
+            resultados.append({
+                "escenario": nombre,
+                "caso": f"api:/{ruta}",
+                "filas": filas,
+                "peticiones": peticiones,
+                "concurrencia": concurrencia,
+                "segundos": round(float(np.percentile(latencias, 50)), 6),
+                "p95_ms": round(float(np.percentile(latencias, 95)) * 1000, 3),
+                "p99_ms": round(float(np.percentile(latencias, 99)) * 1000, 3),
+                "peticiones_por_segundo": round(peticiones / segundos, 1),
+                "errores": errores,
+            })
+    finally:
+        detener()
+    return resultados
+
+
+def info_entorno():
+    """Commit, versión de Python y de las librerías, plataforma y CPUs de la ejecución."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def cargar_resultados(ruta=None):
+    """Lee el archivo de resultados; si no existe devuelve uno vacío."""
+    ruta = ruta_resultados(ruta)
+    if not os.path.exists(ruta):
+        return {"version": VERSION_RESULTADOS, "ejecuciones": []}
+    with open(ruta, encoding="utf-8") as f:
+        resultados = json.load(f)
+    if resultados.get("version") != VERSION_RESULTADOS:
+        raise ValueError(f"Versión del archivo de resultados no soportada: {resultados.get('version')}")
+    return resultados
+
+
+def guardar_resultados(resultados, ruta=None):
+    """Escribe el archivo de resultados."""
+    ruta = ruta_resultados(ruta)
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+
+def anterior(resultados, escenario, caso):
+    """Último resultado guardado de un escenario y caso, o None."""
+    for ejecucion in reversed(resultados["ejecuciones"]):
+        for r in ejecucion["resultados"]:
+            if r["escenario"] == escenario and r["caso"] == caso:
+                return r
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las funciones críticas con los datos de Ligas_Parquet.")
+    parser.add_argument("--escenarios", nargs="+", choices=ESCENARIOS,
+                        help="Escenarios a ejecutar (por defecto todos; con --api, liga_grande y temporada)")
+    parser.add_argument("--repeticiones", type=int, default=config.BENCHMARK_REPEATS,
+                        help="Ejecuciones cronometradas de cada caso")
+    parser.add_argument("--api", action="store_true", help="Medir el servidor HTTP de utils.api_server")
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por ruta con --api")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Conexiones simultáneas con --api")
+    parser.add_argument("--directorio", default=None,
+                        help="Directorio de los archivos Parquet (por defecto config.PARQUET_DIR)")
+    parser.add_argument("--salida", default=None, help="Archivo de resultados (por defecto config.BENCHMARKS_FILE)")
+    parser.add_argument("--no-guardar", action="store_true", help="Mostrar los resultados sin guardarlos")
+    args = parser.parse_args(argv)
+    nombres = args.escenarios or (ESCENARIOS_API if args.api else ESCENARIOS)
+
+    escenarios = definir_escenarios(cargar_manifiesto(args.directorio))
+    resultados = cargar_resultados(args.salida)
+    ejecucion = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "repeticiones": args.repeticiones,
+        "entorno": info_entorno(),
+        "escenarios": {n: escenarios[n]["descripcion"] for n in nombres},
+        "resultados": [],
+    }
+
+    if args.api:
+        print(f"{'Escenario':<14}{'Caso':<20}{'Filas':>9}{'p50':>11}{'p95':>11}{'p99':>11}{'Pet./s':>10}{'Errores':>9}{'Anterior':>10}")
+    else:
+        print(f"{'Escenario':<14}{'Caso':<36}{'Filas':>9}{'Tiempo':>12}{'Pico':>11}{'Filas/s':>13}{'Anterior':>10}")
+    for nombre in nombres:
+        if args.api:
+            medidos = ejecutar_api(nombre, escenarios[nombre], args.peticiones, args.concurrencia, args.directorio)
+        else:
+            medidos = ejecutar_escenario(nombre, escenarios[nombre], args.repeticiones, args.directorio)
+        for r in medidos:
+            ejecucion["resultados"].append(r)
+            previo = anterior(resultados, r["escenario"], r["caso"])
+            cambio = f"{r['segundos'] / previo['segundos']:.2f}x" if previo and previo["segundos"] else "-"
+            if args.api:
+                print(f"{r['escenario']:<14}{r['caso']:<20}{r['filas']:>9}{r['segundos'] * 1000:>8.1f} ms"
+                      f"{r['p95_ms']:>8.1f} ms{r['p99_ms']:>8.1f} ms{r['peticiones_por_segundo']:>10}"
+                      f"{r['errores']:>9}{cambio:>10}")
+            else:
+                print(f"{r['escenario']:<14}{r['caso']:<36}{r['filas']:>9}{r['segundos'] * 1000:>9.1f} ms"
+                      f"{r['pico_mb']:>8.1f} MB{r['filas_por_segundo'] or 0:>13}{cambio:>10}")
+
+    if not args.no_guardar:
+        resultados["ejecuciones"].append(ejecucion)
+        guardar_resultados(resultados, args.salida)
+        print(f"Resultados guardados en {ruta_resultados(args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Catálogo de los archivos Parquet de ``Ligas_Parquet``: un manifiesto con la
+temporada, liga, tamaño, hash, filas, esquema y estadísticas de cada archivo.
+
+Uso:
+    python -m utils.catalog
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+
+VERSION_MANIFIESTO = 1
+
+# Sufijo de temporada al final del nombre de archivo ("... 23-24" o "... 2024")
+_PATRON_TEMPORADA = re.compile(r"\s+(\d{2}-\d{2}|\d{4})$")
+
+
+def ruta_repositorio(relativa, directorio=None):
+    """
+    Devuelve una ruta de ``config`` relativa a la raíz del repositorio.
+
+    Args:
+        relativa (str): Ruta relativa a la raíz (por ejemplo, ``config.REPORTS_DIR``)
+        directorio (str, optional): Ruta alternativa, que se devuelve tal cual
+
+    Returns:
+        str: Ruta
+    """
+    if directorio is None:
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        directorio = os.path.join(raiz, relativa)
+    return directorio
+
+
+def ruta_directorio_parquet(directorio=None):
+    """
+    Devuelve la ruta absoluta del directorio de archivos Parquet.
+
+    Args:
+        directorio (str, optional): Directorio alternativo. Por defecto se usa
+            ``config.PARQUET_DIR`` relativo a la raíz del repositorio.
+
+    Returns:
+        str: Ruta absoluta del directorio
+    """
+    return os.path.abspath(ruta_repositorio(config.PARQUET_DIR, directorio))
+
+
+def clave_temporada(temporada):
+    """
+    Clave de ordenación para temporadas con formato "20-21" o "2020".
+
+    Args:
+        temporada (str): Nombre de la temporada
+
+    Returns:
+        tuple: (año de inicio, nombre) para ordenar cronológicamente
+    """
+    coincidencia = re.match(r"^(\d{2,4})", temporada)
+    if not coincidencia:
+        return (0, temporada)
+    anio = int(coincidencia.group(1))
+    if anio < 100:
+        anio += 2000
+    return (anio, temporada)
+
+
+def nombre_liga(archivo, temporada):
+    """
+    Obtiene el nombre de la liga a partir del nombre del archivo.
+
+    Args:
+        archivo (str): Nombre del archivo (por ejemplo "La Liga 23-24.parquet")
+        temporada (str): Temporada a la que pertenece el archivo
+
+    Returns:
+        str: Nombre de la liga (por ejemplo "La Liga")
+    """
+    base = archivo[:-len(".parquet")] if archivo.endswith(".parquet") else archivo
+    if base.endswith(f" {temporada}"):
+        return base[:-len(temporada) - 1]
+    return _PATRON_TEMPORADA.sub("", base)
+
+
+def hash_archivo(ruta, tam_bloque=1 << 20):
+    """Calcula el SHA-256 del contenido de un archivo."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def estadisticas_columnas(metadata, esquema):
+    """
+    Agrega las estadísticas de los grupos de filas de un archivo Parquet.
+
+    Args:
+        metadata (FileMetaData): Metadatos del pie del archivo
+        esquema (Schema): Esquema Arrow del archivo
+
+    Returns:
+        list: Una tupla (columna, nulos, mínimo, máximo) por columna. El mínimo y
+        el máximo solo se informan para columnas numéricas.
+    """
+    estadisticas = []
+    for i, campo in enumerate(esquema):
+        numerica = pa.types.is_integer(campo.type) or pa.types.is_floating(campo.type)
+        nulos = 0
+        minimo = maximo = None
+        for rg in range(metadata.num_row_groups):
+            stats = metadata.row_group(rg).column(i).statistics
+            if stats is None:
+                nulos = None
+                break
+            if stats.has_null_count and nulos is not None:
+                nulos += stats.null_count
+            if numerica and stats.has_min_max:
+                minimo = stats.min if minimo is None else min(minimo, stats.min)
+                maximo = stats.max if maximo is None else max(maximo, stats.max)
+        if minimo is not None:
+            minimo, maximo = float(minimo), float(maximo)
+        estadisticas.append((campo.name, nulos, minimo, maximo))
+    return estadisticas
+
+
+def escanear_archivo(ruta, directorio, sha256=None):
+    """
+    Lee el pie de un archivo Parquet y genera su entrada del manifiesto.
+
+    Args:
+        ruta (str): Ruta del archivo Parquet
+        directorio (str): Directorio raíz de los archivos Parquet
+        sha256 (str, optional): Hash del archivo ya calculado
+
+    Returns:
+        tuple: (entrada del manifiesto, esquema como lista de [columna, tipo],
+        estadísticas por columna)
+    """
+    relativa = os.path.relpath(ruta, directorio).replace(os.sep, "/")
+    temporada, archivo = relativa.split("/", 1)
+    parquet = pq.ParquetFile(ruta)
+    metadata = parquet.metadata
+    esquema = parquet.schema_arrow
+
+    entrada = {
+        "temporada": temporada,
+        "liga": nombre_liga(archivo, temporada),
+        "archivo": archivo,
+        "ruta": relativa,
+        "tamano": os.path.getsize(ruta),
+        "sha256": sha256 or hash_archivo(ruta),
+        "filas": metadata.num_rows,
+        "grupos_filas": metadata.num_row_groups,
+    }
+    columnas = [[campo.name, str(campo.type)] for campo in esquema]
+    return entrada, columnas, estadisticas_columnas(metadata, esquema)
+
+
+def construir_manifiesto(directorio=None, hashes=None):
+    """
+    Recorre el directorio de Parquet y construye el manifiesto completo.
+
+    Los esquemas se guardan una sola vez y cada archivo referencia el suyo por
+    identificador, ya que casi todos los archivos comparten el mismo esquema.
+    Las estadísticas por columna se devuelven aparte como tabla Arrow para
+    guardarlas en formato columnar y mantener ligero el manifiesto JSON.
+
+    Args:
+        directorio (str, optional): Directorio de los archivos Parquet
+        hashes (dict, optional): SHA-256 ya calculados, por ruta relativa
+            (``temporada/archivo``)
+
+    Returns:
+        tuple: (manifiesto con temporadas, esquemas y archivos, tabla Arrow de
+        estadísticas por archivo y columna)
+    """
+    directorio = ruta_directorio_parquet(directorio)
+    esquemas = {}
+    archivos = []
+    filas_estadisticas = {"ruta": [], "columna": [], "nulos": [], "min": [], "max": []}
+
+    temporadas = sorted(
+        (d for d in os.listdir(directorio) if os.path.isdir(os.path.join(directorio, d))),
+        key=clave_temporada
+    )
+    for temporada in temporadas:
+        carpeta = os.path.join(directorio, temporada)
+        for archivo in sorted(os.listdir(carpeta)):
+            if not archivo.endswith(".parquet"):
+                continue
+            entrada, columnas, estadisticas = escanear_archivo(
+                os.path.join(carpeta, archivo), directorio, (hashes or {}).get(f"{temporada}/{archivo}")
+            )
+            id_esquema = hashlib.sha1(json.dumps(columnas).encode("utf-8")).hexdigest()[:12]
+            esquemas.setdefault(id_esquema, columnas)
+            entrada["esquema"] = id_esquema
+            archivos.append(entrada)
+
+            for columna, nulos, minimo, maximo in estadisticas:
+                filas_estadisticas["ruta"].append(entrada["ruta"])
+                filas_estadisticas["columna"].append(columna)
+                filas_estadisticas["nulos"].append(nulos)
+                filas_estadisticas["min"].append(minimo)
+                filas_estadisticas["max"].append(maximo)
+
+    manifiesto = {
+        "version": VERSION_MANIFIESTO,
+        "temporadas": [t for t in temporadas if any(a["temporada"] == t for a in archivos)],
+        "esquemas": esquemas,
+        "archivos": archivos,
+    }
+    tabla_estadisticas = pa.table({
+        "ruta": pa.array(filas_estadisticas["ruta"], pa.string()).dictionary_encode(),
+        "columna": pa.array(filas_estadisticas["columna"], pa.string()).dictionary_encode(),
+        "nulos": pa.array(filas_estadisticas["nulos"], pa.int64()),
+        "min": pa.array(filas_estadisticas["min"], pa.float64()),
+        "max": pa.array(filas_estadisticas["max"], pa.float64()),
+    })
+    return manifiesto, tabla_estadisticas
+
+
+def ruta_manifiesto(directorio=None):
+    """Devuelve la ruta del archivo de manifiesto dentro del directorio de Parquet."""
+    return os.path.join(ruta_directorio_parquet(directorio), config.MANIFEST_FILE)
+
+
+def ruta_estadisticas(directorio=None):
+    """Devuelve la ruta del archivo de estadísticas por columna del catálogo."""
+    return os.path.join(ruta_directorio_parquet(directorio), config.MANIFEST_STATS_FILE)
+
+
+def guardar_manifiesto(manifiesto, tabla_estadisticas=None, directorio=None):
+    """
+    Guarda el manifiesto como JSON junto a los archivos Parquet y, si se
+    proporcionan, las estadísticas por columna como Parquet.
+
+    Args:
+        manifiesto (dict): Manifiesto generado por ``construir_manifiesto``
+        tabla_estadisticas (Table, optional): Estadísticas por archivo y columna
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        str: Ruta del manifiesto escrito
+    """
+    ruta = ruta_manifiesto(directorio)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+
+    if tabla_estadisticas is not None:
+        ruta_stats = ruta_estadisticas(directorio)
+        pq.write_table(tabla_estadisticas, ruta_stats + ".tmp", compression="zstd")
+        os.replace(ruta_stats + ".tmp", ruta_stats)
+    return ruta
+
+
+def guardar_indices_temporada(manifiesto, directorio=None):
+    """
+    Escribe un ``index.txt`` por temporada con un archivo Parquet por línea.
+
+    Args:
+        manifiesto (dict): Manifiesto del catálogo
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        list: Rutas de los índices escritos
+    """
+    directorio = ruta_directorio_parquet(directorio)
+    rutas = []
+    for temporada in manifiesto["temporadas"]:
+        archivos = sorted(a["archivo"] for a in manifiesto["archivos"] if a["temporada"] == temporada)
+        ruta = os.path.join(directorio, temporada, config.SEASON_INDEX_FILE)
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("\n".join(archivos) + "\n")
+        rutas.append(ruta)
+    return rutas
+
+
+def cargar_manifiesto(directorio=None):
+    """
+    Carga el manifiesto local si existe.
+
+    Args:
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        dict: Manifiesto o None si no se ha generado
+    """
+    ruta = ruta_manifiesto(directorio)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# SHA-256 de los archivos modificados después del manifiesto, por (ruta, tamaño, mtime)
+_hashes_actuales = {}
+
+
+def verificar_archivos(archivos, directorio=None):
+    """
+    Comprueba las entradas del manifiesto contra los archivos en disco.
+
+    Si el tamaño de un archivo no coincide con el del manifiesto o se modificó
+    después de generarlo, se vuelve a calcular su SHA-256 (una vez por tamaño
+    y fecha de modificación), de modo que la huella de una carga sigue al
+    contenido aunque el manifiesto esté desactualizado.
+
+    Args:
+        archivos (list): Entradas del manifiesto
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        list: Entradas con el ``sha256`` del contenido actual (las de archivos
+        que no están en disco, sin cambios)
+    """
+    directorio = ruta_directorio_parquet(directorio)
+    try:
+        generado = os.stat(ruta_manifiesto(directorio)).st_mtime_ns
+    except OSError:
+        return list(archivos)
+
+    verificados = []
+    for entrada in archivos:
+        ruta = os.path.join(directorio, entrada["ruta"])
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            verificados.append(entrada)
+            continue
+        if estado.st_size == entrada["tamano"] and estado.st_mtime_ns <= generado:
+            verificados.append(entrada)
+            continue
+        clave = (ruta, estado.st_size, estado.st_mtime_ns)
+        if clave not in _hashes_actuales:
+            _hashes_actuales[clave] = hash_archivo(ruta)
+        verificados.append({**entrada, "tamano": estado.st_size, "sha256": _hashes_actuales[clave]})
+    return verificados
+
+
+def cargar_estadisticas(directorio=None, rutas=None, columnas=None):
+    """
+    Carga las estadísticas por columna del catálogo.
+
+    Args:
+        directorio (str, optional): Directorio de los archivos Parquet
+        rutas (list, optional): Rutas relativas de los archivos a incluir
+        columnas (list, optional): Columnas de datos a incluir
+
+    Returns:
+        DataFrame: Una fila por archivo y columna con nulos, mínimo y máximo,
+        o None si las estadísticas no se han generado
+    """
+    ruta = ruta_estadisticas(directorio)
+    if not os.path.exists(ruta):
+        return None
+    filtros = []
+    if rutas is not None:
+        filtros.append(("ruta", "in", list(rutas)))
+    if columnas is not None:
+        filtros.append(("columna", "in", list(columnas)))
+    tabla = pq.read_table(ruta, filters=filtros or None)
+    return tabla.to_pandas()
+
+
+def estructura_desde_manifiesto(manifiesto):
+    """
+    Convierte el manifiesto en la estructura de temporadas y ligas que usa la
+    página principal.
+
+    Args:
+        manifiesto (dict): Manifiesto del catálogo
+
+    Returns:
+        dict: {"temporadas": [...], "ligas": {temporada: [...]}} con las
+        temporadas más recientes primero
+    """
+    temporadas = sorted(manifiesto["temporadas"], key=clave_temporada, reverse=True)
+    ligas = {t: [] for t in temporadas}
+    for entrada in manifiesto["archivos"]:
+        ligas[entrada["temporada"]].append({
+            "nombre": entrada["liga"],
+            "archivo": entrada["archivo"],
+            "filas": entrada["filas"],
+            "tamano": entrada["tamano"],
+        })
+    for t in temporadas:
+        ligas[t].sort(key=lambda liga: liga["nombre"].lower())
+    return {
+        "temporadas": [{"nombre": t, "carpeta": t} for t in temporadas],
+        "ligas": ligas,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el manifiesto de Ligas_Parquet.")
+    parser.add_argument("--directorio", default=None,
+                        help="Directorio de los archivos Parquet (por defecto config.PARQUET_DIR)")
+    args = parser.parse_args(argv)
+
+    manifiesto, tabla_estadisticas = construir_manifiesto(args.directorio)
+    ruta = guardar_manifiesto(manifiesto, tabla_estadisticas, args.directorio)
+    guardar_indices_temporada(manifiesto, args.directorio)
+    print(f"Manifiesto escrito en {ruta}: {len(manifiesto['archivos'])} archivos, "
+          f"{len(manifiesto['temporadas'])} temporadas, {len(manifiesto['esquemas'])} esquemas")
+
+
+if __name__ == "__main__":
+    main()
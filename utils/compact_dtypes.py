@@ -0,0 +1,52 @@
+"""
+Tipos de datos compactos: textos repetidos como ``category``, nombres como
+cadenas de Arrow y métricas decimales en float32.
+"""
+import pandas as pd
+
+import config
+
+
+def compactar_serie(serie):
+    """
+    Convierte una columna a su tipo compacto.
+
+    Args:
+        serie (Series): Columna a convertir
+
+    Returns:
+        Series: Columna con el tipo compacto (o la misma si no hay conversión)
+    """
+    if pd.api.types.is_float_dtype(serie.dtype) and serie.dtype.itemsize > 4:
+        return serie.astype("float32")
+
+    if pd.api.types.is_string_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+        # El esquema vacío de un archivo no permite medir la cardinalidad
+        if len(serie) == 0:
+            return serie
+        if serie.nunique() <= config.COMPACT_CATEGORY_RATIO * len(serie):
+            return serie.astype("category")
+        return serie.astype(pd.StringDtype("pyarrow"))
+
+    return serie
+
+
+def compactar_dataframe(df):
+    """
+    Aplica el esquema compacto a todas las columnas de un DataFrame.
+
+    Args:
+        df (DataFrame): Datos cargados
+
+    Returns:
+        DataFrame: Copia de los datos con tipos compactos
+    """
+    return pd.DataFrame({columna: compactar_serie(df[columna]) for columna in df.columns},
+                        index=df.index, columns=df.columns)
+
+
+def memoria(df):
+    """Devuelve los bytes ocupados por un DataFrame o una Series (incluidos los textos)."""
+    if isinstance(df, pd.Series):
+        return int(df.memory_usage(deep=True, index=False))
+    return int(df.memory_usage(deep=True, index=False).sum())
@@ -0,0 +1,80 @@
+"""Comparación vectorizada de una lista corta de jugadores en varias métricas."""
+import numpy as np
+import pandas as pd
+
+from utils.player_index import IndiceJugadores
+
+
+def normalizar_por_maximo(valores):
+    """
+    Divide cada métrica por el máximo entre los jugadores comparados.
+
+    Args:
+        valores (ndarray): Matriz (jugadores × métricas)
+
+    Returns:
+        ndarray: Valores entre 0 y 1 en las métricas con máximo positivo; el resto
+        de métricas (máximo 0, negativo o sin datos) se dejan sin cambios
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    maximos = np.where(np.isnan(valores), -np.inf, valores).max(axis=0, initial=-np.inf)
+    divisor = np.where(maximos > 0, maximos, 1.0)
+    return valores / divisor
+
+
+class ComparacionJugadores:
+    """Matrices de comparación de N jugadores en M métricas."""
+
+    def __init__(self, data, jugadores, metricas, col_nombres, indice=None):
+        """
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos de los jugadores
+            jugadores (list): Etiquetas o nombres de los jugadores (sin repetir)
+            metricas (list): Métricas a comparar
+            col_nombres (str): Columna con los nombres de los jugadores
+            indice (IndiceJugadores, optional): Índice de jugadores de ``data``
+                (ver ``utils.data_loader.obtener_indice_jugadores``)
+        """
+        if indice is None:
+            indice = IndiceJugadores(data, col_nombres)
+        self.jugadores = list(jugadores)
+        self.metricas = list(metricas)
+        self.valores = indice.filas(data, self.jugadores, self.metricas).astype(np.float64)
+
+    def _referencia(self, referencia):
+        return self.valores.loc[self.jugadores[0] if referencia is None else referencia].to_numpy()
+
+    def diferencias(self, referencia=None):
+        """
+        Diferencia de cada jugador con el de referencia en cada métrica.
+
+        Args:
+            referencia (str, optional): Jugador de referencia (por defecto el primero)
+
+        Returns:
+            DataFrame: Matriz (jugadores × métricas) de ``valor - valor de referencia``
+        """
+        return self.valores - self._referencia(referencia)
+
+    def cocientes(self, referencia=None):
+        """
+        Cociente de cada jugador con el de referencia en cada métrica.
+
+        Returns:
+            DataFrame: Matriz (jugadores × métricas) de ``valor / valor de referencia``
+            (infinito si el valor de referencia es 0)
+        """
+        base = self._referencia(referencia)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cocientes = np.where(base != 0, self.valores.to_numpy() / np.where(base != 0, base, 1.0), np.inf)
+        return pd.DataFrame(cocientes, index=self.valores.index, columns=self.valores.columns)
+
+    def normalizados(self):
+        """
+        Valores divididos por el máximo de cada métrica entre los jugadores comparados.
+
+        Returns:
+            DataFrame: Matriz (jugadores × métricas) para los gráficos de radar
+        """
+        return pd.DataFrame(normalizar_por_maximo(self.valores.to_numpy()),
+                            index=self.valores.index, columns=self.valores.columns)
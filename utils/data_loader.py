@@ -6,80 +6,243 @@ import io
 import os
 import pyarrow.parquet as pq
 from urllib.parse import urljoin
+import config
+from utils.catalog import cargar_manifiesto, estructura_desde_manifiesto, ruta_manifiesto, verificar_archivos
+from utils.dataset import cargar_multiliga, COLUMNA_LIGA
+from utils.lazy_frame import MarcoPerezoso
+from utils import registry
+from utils.download_cache import descargar_con_cache
+from utils.remote_parquet import ArchivoRemoto
+from utils.upload_cache import cachear_subida
+from utils.ann_index import IndiceSimilitud, ARCHIVO_INDICE, ruta_directorio_indice
+from utils.percentiles import MatrizPercentiles
+from utils.player_index import IndiceJugadores
+from utils.percentile_cube import CuboPercentiles, ruta_cubo
+from utils.name_search import BuscadorNombres, ARCHIVO_BUSCADOR, ruta_directorio_buscador
+from utils.reports import GeneradorInformes
+from utils.feature_store import obtener_matriz, features_similitud
+from utils.http_client import cliente as cliente_http, descargar_en_paralelo
+from utils.result_cache import huella_dataset, memoizar
+from utils.tracing import iniciar_traza, finalizar_traza, resumen_traza, tramo, trazar
+
+@st.cache_data
+def _manifiesto_local(ruta, mtime):
+    """Lee el manifiesto local; ``mtime`` invalida la caché al regenerarlo."""
+    return cargar_manifiesto()
+
+@st.cache_data(ttl=3600)
+def _manifiesto_remoto(url):
+    """Descarga el manifiesto del repositorio de GitHub."""
+    response = cliente_http().get(url)
+    response.raise_for_status()
+    return response.json()
+
+def obtener_manifiesto():
+    """
+    Obtiene el manifiesto del catálogo de archivos Parquet.
+
+    Usa el manifiesto local generado con ``python -m utils.catalog`` y, si no
+    existe (por ejemplo, en un despliegue sin la carpeta de datos), lo descarga
+    de GitHub en una sola petición.
+
+    Returns:
+        dict: Manifiesto del catálogo
+    """
+    ruta = ruta_manifiesto()
+    if os.path.exists(ruta):
+        return _manifiesto_local(ruta, os.path.getmtime(ruta))
+
+    url = f"{config.GITHUB_RAW_BASE}/{config.PARQUET_DIR}/{config.MANIFEST_FILE}"
+    return _manifiesto_remoto(url)
+
+@st.cache_resource
+def _indice_similitud(ruta, mtime):
+    """Abre el índice de similitud; ``mtime`` lo reabre al reconstruirlo."""
+    return IndiceSimilitud.cargar(os.path.dirname(ruta))
+
+def obtener_indice_similitud():
+    """
+    Obtiene el índice de similitud de todas las ligas (ver ``utils.ann_index``).
+
+    Los vectores se abren con memoria mapeada y el índice se comparte entre
+    todas las sesiones.
+
+    Returns:
+        IndiceSimilitud: Índice abierto, o None si no se ha construido
+    """
+    ruta = os.path.join(ruta_directorio_indice(), ARCHIVO_INDICE)
+    if not os.path.exists(ruta):
+        return None
+    return _indice_similitud(ruta, os.path.getmtime(ruta))
+
+@st.cache_resource
+def _cubo_percentiles(ruta, mtime):
+    """Abre el cubo de percentiles; ``mtime`` lo reabre al reconstruirlo."""
+    return CuboPercentiles(ruta)
+
+def obtener_cubo_percentiles():
+    """
+    Obtiene el cubo de percentiles por liga, temporada y posición (ver ``utils.percentile_cube``).
+
+    Returns:
+        CuboPercentiles: Cubo compartido entre sesiones, o None si no se ha construido
+    """
+    ruta = ruta_cubo()
+    if not os.path.exists(ruta):
+        return None
+    return _cubo_percentiles(ruta, os.path.getmtime(ruta))
+
+@st.cache_resource
+def _buscador_nombres(ruta, mtime):
+    """Abre el buscador de nombres; ``mtime`` lo reabre al reconstruirlo."""
+    return BuscadorNombres.cargar(os.path.dirname(ruta))
+
+def obtener_buscador_nombres():
+    """
+    Obtiene el buscador de nombres de todas las ligas (ver ``utils.name_search``).
+
+    Returns:
+        BuscadorNombres: Buscador compartido entre sesiones, o None si no se ha construido
+    """
+    ruta = os.path.join(ruta_directorio_buscador(), ARCHIVO_BUSCADOR)
+    if not os.path.exists(ruta):
+        return None
+    return _buscador_nombres(ruta, os.path.getmtime(ruta))
+
+def archivos_origen(temporadas, ligas=None):
+    """
+    Devuelve las entradas del manifiesto de los archivos de origen de una carga,
+    comprobadas contra los archivos locales (ver ``utils.catalog.verificar_archivos``).
+
+    Args:
+        temporadas (list): Temporadas cargadas
+        ligas (list): Ligas cargadas (None = todas)
+
+    Returns:
+        list: Entradas del manifiesto (con ``ruta`` y ``sha256``)
+    """
+    return verificar_archivos([
+        a for a in obtener_manifiesto()["archivos"]
+        if a["temporada"] in temporadas and (not ligas or a["liga"] in ligas)
+    ])
 
 def obtener_estructura_repositorio():
     """
-    Define manualmente la estructura del repositorio de GitHub.
-    Esta función evita problemas de acceso a la API de GitHub y web scraping.
-    """
-    # Estructura predefinida basada en el repositorio
-    # https://github.com/CarlosCO94/911_Scouting/tree/main/Ligas_Parquet
-    return {
-        "temporadas": [
-            {"nombre": "2021-2022", "carpeta": "2021-2022"},
-            {"nombre": "2022-2023", "carpeta": "2022-2023"},
-            {"nombre": "2023-2024", "carpeta": "2023-2024"}
-        ],
-        "ligas": {
-            "2021-2022": [
-                {"nombre": "Premier League", "archivo": "Premier_League.parquet"},
-                {"nombre": "La Liga", "archivo": "La_Liga.parquet"},
-                {"nombre": "Serie A", "archivo": "Serie_A.parquet"},
-                {"nombre": "Bundesliga", "archivo": "Bundesliga.parquet"},
-                {"nombre": "Ligue 1", "archivo": "Ligue_1.parquet"}
-            ],
-            "2022-2023": [
-                {"nombre": "Premier League", "archivo": "Premier_League.parquet"},
-                {"nombre": "La Liga", "archivo": "La_Liga.parquet"},
-                {"nombre": "Serie A", "archivo": "Serie_A.parquet"},
-                {"nombre": "Bundesliga", "archivo": "Bundesliga.parquet"},
-                {"nombre": "Ligue 1", "archivo": "Ligue_1.parquet"}
-            ],
-            "2023-2024": [
-                {"nombre": "Premier League", "archivo": "Premier_League.parquet"},
-                {"nombre": "La Liga", "archivo": "La_Liga.parquet"},
-                {"nombre": "Serie A", "archivo": "Serie_A.parquet"},
-                {"nombre": "Bundesliga", "archivo": "Bundesliga.parquet"},
-                {"nombre": "Ligue 1", "archivo": "Ligue_1.parquet"}
-            ]
-        }
-    }
+    Obtiene la estructura de temporadas y ligas del repositorio a partir del
+    manifiesto del catálogo, sin acceder a los archivos de datos.
+    """
+    return estructura_desde_manifiesto(obtener_manifiesto())
 
 def construir_url_raw(temporada, archivo):
     """
     Construye la URL para el archivo raw en GitHub.
     """
-    base_url = "https://raw.githubusercontent.com/CarlosCO94/911_Scouting/main/Ligas_Parquet"
+    base_url = f"{config.GITHUB_RAW_BASE}/{config.PARQUET_DIR}"
     return f"{base_url}/{temporada}/{archivo}"
 
-def descargar_parquet(url):
-    """Descarga un archivo Parquet desde GitHub y lo carga como DataFrame."""
+@trazar()
+def descargar_parquet(url, compactar=False):
+    """
+    Descarga un archivo Parquet desde GitHub y lo carga como marco perezoso.
+
+    La descarga pasa por la caché en disco de ``utils.download_cache``: una liga
+    ya descargada cuesta una petición condicional (304) o ninguna. Las columnas
+    solo se leen cuando una página las usa por primera vez (ver ``utils.lazy_frame``)
+    y, si ``compactar`` es True, se convierten a tipos compactos al leerlas.
+    """
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Lanzar excepción si hay error HTTP
-        
-        # Guardar temporalmente el archivo
-        with open('temp.parquet', 'wb') as f:
-            f.write(response.content)
-        
-        # Leer el archivo Parquet
-        data = pd.read_parquet('temp.parquet')
+        descarga = descargar_con_cache(url)
         
-        # Eliminar archivo temporal
-        if os.path.exists('temp.parquet'):
-            os.remove('temp.parquet')
-        
-        return data
+        # Leer solo el pie del archivo; los datos se leen bajo demanda
+        return MarcoPerezoso.desde_parquet(descarga["ruta"], compactar=compactar, version=descarga["sha256"])
     except requests.exceptions.RequestException as e:
         st.error(f"Error al descargar el archivo: {e}")
         return None
     except Exception as e:
         st.error(f"Error al procesar el archivo Parquet: {e}")
-        # Intentar eliminar el archivo temporal si existe
-        if os.path.exists('temp.parquet'):
-            os.remove('temp.parquet')
         return None
 
+@trazar()
+def abrir_parquet_remoto(url, compactar=False):
+    """
+    Abre un archivo Parquet de GitHub sin descargarlo completo.
+
+    Solo se descarga el pie del archivo (esquema, filas y estadísticas); cada
+    columna se pide con una petición ``Range`` la primera vez que se usa (ver
+    ``utils.remote_parquet``).
+    """
+    try:
+        return MarcoPerezoso.desde_parquet(ArchivoRemoto(url), compactar=compactar)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error al acceder al archivo: {e}")
+        return None
+    except Exception as e:
+        st.error(f"Error al procesar el archivo Parquet: {e}")
+        return None
+
+def opcion_compactar():
+    """Muestra la opción de cargar los datos con tipos compactos y devuelve su valor."""
+    return st.checkbox(
+        "Compactar tipos de datos (menos memoria)",
+        value=config.COMPACT_DTYPES_DEFAULT,
+        help="Textos repetidos como categorías, nombres como cadenas de Arrow y métricas en float32."
+    )
+
+def mostrar_informacion_datos(data):
+    """Muestra el resumen, la vista previa y la información de columnas de los datos cargados."""
+    st.success(f"¡Datos cargados correctamente! Filas: {data.shape[0]}, Columnas: {data.shape[1]}")
+    
+    # Mostrar primeras filas
+    st.subheader("Vista previa de los datos")
+    if isinstance(data, MarcoPerezoso):
+        # Solo las columnas de identificación, para no leer el archivo completo
+        cols_info = [c for c in config.DEFAULT_COLUMNS["info"] if c in data.columns]
+        st.dataframe(data[cols_info].head())
+        st.caption(f"Memoria de las columnas leídas: {data.memoria_cargada() / 1e6:.2f} MB "
+                   f"(sin compactar: {data.memoria_sin_compactar() / 1e6:.2f} MB)")
+    else:
+        st.dataframe(data.head())
+    
+    # Información de columnas
+    st.subheader("Información de columnas")
+    if isinstance(data, MarcoPerezoso):
+        st.table(data.resumen_columnas())
+        return
+    buffer = []
+    for column in data.columns:
+        buffer.append({
+            "Columna": column,
+            "Tipo": str(data[column].dtype),
+            "Valores únicos": data[column].nunique(),
+            "Valores nulos": data[column].isna().sum()
+        })
+    st.table(pd.DataFrame(buffer))
+
+def descargar_temporada(temporada, ligas):
+    """
+    Descarga en paralelo todos los archivos de una temporada a la caché en disco,
+    mostrando el progreso agregado.
+    
+    Args:
+        temporada (str): Temporada a descargar
+        ligas (list): Ligas de la temporada (con su nombre de archivo)
+    """
+    urls = [construir_url_raw(temporada, liga["archivo"]) for liga in ligas]
+    total_mb = sum(liga["tamano"] for liga in ligas) / 1e6
+    
+    with st.spinner(f"Descargando {len(urls)} archivos de la temporada {temporada} ({total_mb:.1f} MB)..."):
+        barra = st.progress(0.0)
+        
+        def progreso(completadas, total, total_bytes):
+            barra.progress(completadas / total, text=f"{completadas}/{total} archivos · {total_bytes / 1e6:.1f} MB")
+        
+        resultados, errores = descargar_en_paralelo(urls, descargar_con_cache, progreso=progreso)
+    
+    desde_cache = sum(1 for r in resultados.values() if r["origen"] != "descarga")
+    st.success(f"Temporada {temporada}: {len(resultados)} archivos disponibles ({desde_cache} ya estaban en caché).")
+    if errores:
+        st.warning(f"No se pudieron descargar {len(errores)} archivos.")
+
 def cargar_datos_github():
     """Carga datos desde el repositorio de GitHub."""
     try:
@@ -103,6 +266,18 @@ def cargar_datos_github():
                 "Selecciona una liga:",
                 list(opciones_ligas.keys())
             )
+            info_liga = next(liga for liga in ligas_disponibles if liga["nombre"] == liga_seleccionada)
+            st.caption(f"{info_liga['filas']} jugadores · {info_liga['tamano'] / 1024:.0f} KB")
+            
+            # Descarga en paralelo de toda la temporada a la caché local
+            if st.button(f"Descargar temporada completa ({len(ligas_disponibles)} ligas)"):
+                descargar_temporada(temporada_seleccionada, ligas_disponibles)
+            
+            lectura_remota = st.checkbox(
+                "Leer solo las columnas usadas (sin descargar el archivo completo)",
+                help="Descarga el pie del archivo y, después, solo las columnas que usen las páginas."
+            )
+            compactar = opcion_compactar()
             
             # Botón para cargar el archivo seleccionado
             if st.button("Cargar datos"):
@@ -110,32 +285,28 @@ def cargar_datos_github():
                 url_archivo = construir_url_raw(temporada_seleccionada, archivo)
                 
                 with st.spinner(f"Descargando y procesando datos de {liga_seleccionada} ({temporada_seleccionada})..."):
-                    data = descargar_parquet(url_archivo)
+                    # Dataset compartido por todas las sesiones: solo se descarga una vez
+                    if lectura_remota:
+                        clave = ("github-remoto", temporada_seleccionada, liga_seleccionada)
+                        cargador = lambda: abrir_parquet_remoto(url_archivo, compactar)
+                    else:
+                        clave = ("github", temporada_seleccionada, liga_seleccionada)
+                        cargador = lambda: descargar_parquet(url_archivo, compactar)
+                    if compactar:
+                        clave += ("compacto",)
+                    # La huella sale del contenido descargado (o del ETag), no del manifiesto
+                    data = registry.obtener(clave, cargador, lambda datos: huella_dataset(
+                        clave, [{"ruta": url_archivo, "sha256": datos.version}]
+                    ))
                     
                     if data is not None:
-                        # Guardar en la sesión
-                        st.session_state['data'] = data
+                        # Guardar en la sesión solo la clave del dataset
+                        guardar_clave_sesion(clave)
                         st.session_state['liga_actual'] = liga_seleccionada
                         st.session_state['temporada_actual'] = temporada_seleccionada
                         
                         # Mostrar información del dataset
-                        st.success(f"¡Datos cargados correctamente! Filas: {data.shape[0]}, Columnas: {data.shape[1]}")
-                        
-                        # Mostrar primeras filas
-                        st.subheader("Vista previa de los datos")
-                        st.dataframe(data.head())
-                        
-                        # Información de columnas
-                        st.subheader("Información de columnas")
-                        buffer = []
-                        for column in data.columns:
-                            buffer.append({
-                                "Columna": column,
-                                "Tipo": str(data[column].dtype),
-                                "Valores únicos": data[column].nunique(),
-                                "Valores nulos": data[column].isna().sum()
-                            })
-                        st.table(pd.DataFrame(buffer))
+                        mostrar_informacion_datos(data)
         else:
             st.warning(f"No se encontraron ligas disponibles para la temporada {temporada_seleccionada}.")
             
@@ -148,50 +319,289 @@ def cargar_datos_local():
     # Opción para cargar archivo local
     uploaded_file = st.file_uploader("Carga tu archivo de datos (CSV, Excel)", 
                                     type=['csv', 'xlsx', 'xls'])
+    compactar = opcion_compactar()
     
     if uploaded_file is not None:
         try:
-            # Detectar tipo de archivo
-            if uploaded_file.name.endswith('.csv'):
-                data = pd.read_csv(uploaded_file)
-            else:
-                data = pd.read_excel(uploaded_file)
+            # Cada rerun de Streamlit devuelve el mismo archivo: el hash se calcula
+            # una vez por subida y el análisis una vez por contenido (ver utils.upload_cache)
+            id_subida = getattr(uploaded_file, "file_id", uploaded_file.name)
+            subida = st.session_state.get('subida_local')
+            if subida is None or subida["id"] != id_subida or not os.path.exists(subida["ruta"]):
+                with st.spinner(f"Procesando {uploaded_file.name}..."):
+                    subida = cachear_subida(uploaded_file.name, uploaded_file.getvalue())
+                subida["id"] = id_subida
+                st.session_state['subida_local'] = subida
             
-            # Guardar en la sesión
-            st.session_state['data'] = data
+            # Mismo contenido, mismos datos: se comparten entre sesiones por su hash
+            clave = ("subida", uploaded_file.name, subida["sha256"][:12])
+            if compactar:
+                clave += ("compacto",)
+            data = registry.obtener(
+                clave,
+                lambda: MarcoPerezoso.desde_parquet(subida["ruta"], compactar=compactar),
+                lambda datos: huella_dataset(clave, [{"ruta": uploaded_file.name, "sha256": subida["sha256"]}])
+            )
+            
+            guardar_clave_sesion(clave)
             st.session_state['fuente_datos'] = uploaded_file.name
             
             # Mostrar información del dataset
-            st.success(f"¡Datos cargados correctamente! Filas: {data.shape[0]}, Columnas: {data.shape[1]}")
-            
-            # Mostrar primeras filas
-            st.subheader("Vista previa de los datos")
-            st.dataframe(data.head())
-            
-            # Información de columnas
-            st.subheader("Información de columnas")
-            buffer = []
-            for column in data.columns:
-                buffer.append({
-                    "Columna": column,
-                    "Tipo": str(data[column].dtype),
-                    "Valores únicos": data[column].nunique(),
-                    "Valores nulos": data[column].isna().sum()
-                })
-            st.table(pd.DataFrame(buffer))
+            mostrar_informacion_datos(data)
             
         except Exception as e:
             st.error(f"Error al cargar los datos: {e}")
 
+def cargar_datos_multiliga():
+    """Carga varias ligas y temporadas a la vez desde los archivos Parquet locales."""
+    try:
+        estructura = obtener_estructura_repositorio()
+        temporadas = [temp["nombre"] for temp in estructura["temporadas"]]
+        
+        temporadas_seleccionadas = st.multiselect(
+            "Selecciona las temporadas:",
+            temporadas,
+            default=temporadas[:1]
+        )
+        
+        # Ligas disponibles en cualquiera de las temporadas seleccionadas
+        ligas = sorted(
+            {liga["nombre"] for t in temporadas_seleccionadas for liga in estructura["ligas"].get(t, [])},
+            key=str.lower
+        )
+        ligas_seleccionadas = st.multiselect(
+            "Selecciona las ligas (vacío = todas):",
+            ligas
+        )
+        
+        minutos_minimos = st.number_input(
+            "Minutos jugados mínimos:", min_value=0, value=0, step=90
+        )
+        
+        if not temporadas_seleccionadas:
+            st.info("Selecciona al menos una temporada.")
+            return
+        
+        if st.button("Cargar datos"):
+            filtro = [("Minutes played", ">=", minutos_minimos)] if minutos_minimos > 0 else None
+            
+            clave = (
+                "multiliga",
+                ", ".join(temporadas_seleccionadas),
+                ", ".join(sorted(ligas_seleccionadas)) or "todas",
+                f">= {minutos_minimos} min"
+            )
+            with st.spinner("Cargando ligas seleccionadas..."):
+                data = registry.obtener(
+                    clave,
+                    lambda: cargar_multiliga(
+                        temporadas=temporadas_seleccionadas,
+                        ligas=ligas_seleccionadas or None,
+                        filtro=filtro
+                    ),
+                    lambda datos: huella_dataset(clave, archivos_origen(temporadas_seleccionadas, ligas_seleccionadas))
+                )
+            
+            # Guardar en la sesión solo la clave del dataset
+            guardar_clave_sesion(clave)
+            n_ligas = data[COLUMNA_LIGA].nunique()
+            st.session_state['liga_actual'] = (
+                ", ".join(ligas_seleccionadas) if 0 < len(ligas_seleccionadas) <= 3 else f"{n_ligas} ligas"
+            )
+            st.session_state['temporada_actual'] = ", ".join(temporadas_seleccionadas)
+            
+            mostrar_informacion_datos(data)
+    except FileNotFoundError as e:
+        st.warning(f"La carga de varias ligas requiere los archivos Parquet en local. {e}")
+    except Exception as e:
+        st.error(f"Error al cargar los datos: {e}")
+
+def guardar_clave_sesion(clave):
+    """
+    Asocia la sesión a un dataset compartido del registro del proceso.
+
+    Olvida la liga y la temporada del dataset anterior: las cargas de GitHub y
+    de varias ligas las guardan después de llamar a esta función.
+
+    Args:
+        clave (tuple): Clave del dataset en ``utils.registry``
+    """
+    st.session_state['clave_datos'] = clave
+    st.session_state['data'] = None
+    st.session_state.pop('fuente_datos', None)
+    st.session_state.pop('liga_actual', None)
+    st.session_state.pop('temporada_actual', None)
+
 def verificar_datos_cargados():
     """Verifica si hay datos cargados y muestra un mensaje si no los hay."""
-    if 'data' not in st.session_state or st.session_state['data'] is None:
+    if obtener_datos() is None:
         st.warning("⚠️ No hay datos cargados. Por favor, ve a la página principal para cargar datos.")
+        # La página se detiene aquí: se cierra su traza de tiempos
+        mostrar_traza_pagina()
         return False
     return True
 
 def obtener_datos():
-    """Obtiene los datos cargados en la sesión."""
+    """
+    Obtiene los datos cargados en la sesión.
+
+    Puede ser un DataFrame o un ``MarcoPerezoso`` que lee las columnas del
+    archivo Parquet a medida que las páginas las usan. Los datos de GitHub y de
+    varias ligas se comparten entre sesiones a través de ``utils.registry``; la
+    sesión solo guarda su clave y recibe una copia superficial de los datos.
+
+    Si el registro liberó el dataset y su archivo ya no existe (una subida
+    expulsada de ``utils.upload_cache`` por otra sesión), la sesión se queda
+    sin datos y las páginas piden volver a cargarlos.
+    """
+    clave = st.session_state.get('clave_datos')
+    if clave is not None:
+        try:
+            return registry.obtener(clave)
+        except FileNotFoundError:
+            st.session_state['clave_datos'] = None
+            st.session_state['data'] = None
+            return None
     if 'data' in st.session_state:
         return st.session_state['data']
     return None
+
+def huella_sesion():
+    """
+    Devuelve la huella de los datos de la sesión (ver ``utils.result_cache``).
+
+    La calcula ``utils.registry`` al cargar el dataset a partir del contenido
+    leído, así que cambia cuando el dataset se recarga con otro contenido.
+
+    Returns:
+        str: Huella, o None si los datos se asignaron directamente a la sesión
+    """
+    clave = st.session_state.get('clave_datos')
+    return registry.huella(clave) if clave is not None else None
+
+@trazar()
+def obtener_percentiles():
+    """
+    Obtiene la matriz de percentiles de los datos cargados en la sesión.
+
+    Se calcula una vez por dataset (en una sola pasada vectorizada sobre todas
+    las columnas numéricas) y se comparte entre sesiones con el dataset en
+    ``utils.registry``.
+
+    Returns:
+        MatrizPercentiles: Percentiles de todos los jugadores, o None si no hay datos
+    """
+    clave = st.session_state.get('clave_datos')
+    if clave is not None:
+        return registry.derivado(clave, "percentiles", MatrizPercentiles)
+    data = obtener_datos()
+    return MatrizPercentiles(data) if data is not None else None
+
+@trazar()
+def obtener_indice_jugadores(col_nombres):
+    """
+    Obtiene el índice de jugadores de los datos cargados (ver ``utils.player_index``).
+
+    Se construye una vez por dataset y columna de nombres y se comparte entre
+    sesiones con el dataset en ``utils.registry``.
+
+    Args:
+        col_nombres (str): Columna con los nombres de los jugadores
+
+    Returns:
+        IndiceJugadores: Índice de los jugadores, o None si no hay datos
+    """
+    calcular = lambda datos: IndiceJugadores(datos, col_nombres)
+    clave = st.session_state.get('clave_datos')
+    if clave is not None:
+        return registry.derivado(clave, f"jugadores:{col_nombres}", calcular)
+    data = obtener_datos()
+    return calcular(data) if data is not None else None
+
+@trazar()
+def obtener_caracteristicas(features):
+    """
+    Obtiene las métricas estandarizadas de los datos cargados (ver ``utils.feature_store``).
+
+    Se guardan en disco por huella del dataset y conjunto de métricas, así que
+    la similitud no vuelve a estandarizar el dataset en cada consulta. Sin
+    huella se calculan en memoria.
+
+    Args:
+        features (list): Métricas a estandarizar
+
+    Returns:
+        MatrizEstandarizada: Métricas estandarizadas, o None si no hay datos
+    """
+    data = obtener_datos()
+    if data is None:
+        return None
+    return obtener_matriz(data, features, huella_sesion())
+
+@trazar()
+def obtener_generador_informes(col_nombres):
+    """
+    Obtiene el generador de informes de los datos cargados (ver ``utils.reports``).
+
+    Reutiliza la matriz de percentiles, el índice de jugadores y las métricas
+    estandarizadas del dataset y se comparte entre sesiones con el dataset en
+    ``utils.registry``, así que el motor de similitud se construye una vez por dataset.
+
+    Args:
+        col_nombres (str): Columna con los nombres de los jugadores
+
+    Returns:
+        GeneradorInformes: Generador de informes, o None si no hay datos
+    """
+    calcular = lambda datos: GeneradorInformes(
+        datos, col_nombres, matriz=obtener_percentiles(), indice=obtener_indice_jugadores(col_nombres),
+        caracteristicas=obtener_caracteristicas(features_similitud(datos))
+    )
+    clave = st.session_state.get('clave_datos')
+    if clave is not None:
+        return registry.derivado(clave, f"informes:{col_nombres}", calcular)
+    data = obtener_datos()
+    return calcular(data) if data is not None else None
+
+def memoizar_resultado(nombre, argumentos, calcular):
+    """
+    Devuelve un resultado derivado de los datos de la sesión, calculándolo una vez
+    por dataset y argumentos (ver ``utils.result_cache``).
+
+    El dataset se identifica por la huella calculada al cargarlo (ver
+    ``huella_sesion``), sin calcular un hash de sus datos en cada rerun. Sin
+    huella (datos asignados directamente a la sesión) se calcula siempre.
+
+    Args:
+        nombre (str): Nombre del cálculo
+        argumentos (tuple): Argumentos del cálculo, sin los datos
+        calcular (callable): Función sin argumentos que calcula el resultado
+
+    Returns:
+        object: Resultado del cálculo
+    """
+    with tramo(f"memoizar:{nombre}"):
+        return memoizar(huella_sesion(), nombre, argumentos, calcular)
+
+def iniciar_traza_pagina(pagina):
+    """
+    Abre la traza de tiempos del rerun de una página (ver ``utils.tracing``).
+
+    Solo se registra si ``config.TRACING_ENABLED`` es True o, con
+    ``config.TRACING_URL_FLAG``, si la URL lleva ``?debug=1`` (así un visitante
+    cualquiera no puede activar las trazas).
+
+    Args:
+        pagina (str): Nombre de la página
+    """
+    activa = config.TRACING_ENABLED or (config.TRACING_URL_FLAG and st.query_params.get("debug") == "1")
+    iniciar_traza(pagina, activa)
+
+def mostrar_traza_pagina():
+    """Cierra la traza del rerun y muestra el desglose de tiempos en la barra lateral."""
+    traza = finalizar_traza()
+    if traza is None:
+        return
+    with st.sidebar.expander(f"Tiempos del rerun ({traza['total_ms']:.0f} ms)"):
+        st.dataframe(resumen_traza(traza), hide_index=True)
+        st.caption(f"Traza {traza['id']} guardada en `{config.TRACES_FILE}`")
@@ -1,101 +1,143 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
+from utils.similarity import MotorSimilitud
+from utils.percentiles import MatrizPercentiles
+from utils.comparison import ComparacionJugadores, normalizar_por_maximo
+from utils.tracing import trazar
+import config
 
-def calcular_percentiles(data, jugador, metricas, col_nombres):
+def grupo_posicion(posicion):
+    """
+    Devuelve el grupo de ``config.POSITION_GROUPS`` de una posición de Wyscout.
+    
+    Args:
+        posicion (str): Posición, por ejemplo "RCB" o "LAMF, CF" (se usa la primera)
+        
+    Returns:
+        str: Nombre del grupo, o None si la posición no pertenece a ninguno
+    """
+    if not isinstance(posicion, str) or not posicion:
+        return None
+    principal = posicion.split(",")[0].strip()
+    for grupo, codigos in config.POSITION_GROUPS.items():
+        if any(codigo in principal for codigo in codigos):
+            return grupo
+    return None
+
+@trazar()
+def calcular_percentiles(data, jugador, metricas, col_nombres, matriz=None):
     """
     Calcula los percentiles de un jugador para las métricas seleccionadas.
     
     Args:
         data (DataFrame): DataFrame con los datos
-        jugador (str): Nombre del jugador
+        jugador (str): Etiqueta o nombre del jugador
         metricas (list): Lista de métricas para calcular percentiles
         col_nombres (str): Nombre de la columna que contiene los nombres de los jugadores
+        matriz (MatrizPercentiles, optional): Matriz de percentiles precalculada del
+            dataset (ver ``utils.data_loader.obtener_percentiles``)
         
     Returns:
         DataFrame: DataFrame con los percentiles calculados
     """
-    percentiles_list = []
+    if matriz is None:
+        matriz = MatrizPercentiles(data, metricas)
+    percentiles = matriz.percentiles(jugador, col_nombres, metricas)
     
-    for metrica in metricas:
-        valor_jugador = data[data[col_nombres] == jugador][metrica].values[0]
-        percentil = (data[metrica] <= valor_jugador).mean() * 100
-        
-        percentiles_list.append({
-            'Métrica': metrica,
-            'Valor': valor_jugador,
-            'Percentil': percentil,
-            'Color': 'green' if percentil >= 80 else ('yellow' if percentil >= 50 else 'red')
-        })
-    
-    # Crear DataFrame de percentiles
-    return pd.DataFrame(percentiles_list)
+    return pd.DataFrame({
+        'Métrica': metricas,
+        'Valor': percentiles['Valor'].to_numpy(),
+        'Percentil': percentiles['Percentil'].to_numpy(),
+        'Color': ['green' if p >= 80 else ('yellow' if p >= 50 else 'red') for p in percentiles['Percentil']]
+    })
+
+@trazar()
+def calcular_percentiles_contexto(cubo, fila, metricas, min_minutos, temporada=None, liga=None):
+    """
+    Calcula los percentiles de un jugador frente a su grupo de posiciones en su liga y temporada.
+
+    Args:
+        cubo (CuboPercentiles): Cubo de percentiles (ver ``utils.percentile_cube``)
+        fila (Series): Datos del jugador (``Wyscout id``, posición y métricas)
+        metricas (list): Lista de métricas para calcular percentiles
+        min_minutos (int): Minutos mínimos de los jugadores con los que se compara
+        temporada (str, optional): Temporada si los datos no tienen columna ``season``
+        liga (str, optional): Liga si los datos no tienen columna ``league``
 
-def encontrar_jugadores_similares(data, jugador_ref, features, num_similares, col_nombres):
+    Returns:
+        tuple: (grupo, DataFrame con el mismo formato que ``calcular_percentiles``),
+        o (None, None) si el jugador o alguna métrica no están en el cubo
+    """
+    posicion = fila.get("Primary position")
+    grupo = grupo_posicion(posicion if isinstance(posicion, str) else fila.get("Position"))
+    id_jugador = fila.get("Wyscout id")
+    if grupo is None or pd.isna(id_jugador) or any(m not in cubo.metricas for m in metricas):
+        return None, None
+
+    temporada = fila.get("season", temporada)
+    liga = fila.get("league", liga)
+    percentiles = cubo.percentiles(temporada, liga, grupo, min_minutos, int(id_jugador), metricas)
+    if percentiles is None:
+        return None, None
+
+    return grupo, pd.DataFrame({
+        'Métrica': metricas,
+        'Valor': fila[metricas].to_numpy(dtype=float),
+        'Percentil': percentiles.to_numpy(),
+        'Color': ['green' if p >= 80 else ('yellow' if p >= 50 else 'red') for p in percentiles]
+    })
+
+@trazar()
+def encontrar_jugadores_similares(data, jugador_ref, features, num_similares, col_nombres, indice=None,
+                                  estandarizada=None):
     """
     Encuentra jugadores similares basados en las características seleccionadas.
     
+    Usa ``utils.similarity.MotorSimilitud``: una matriz normalizada y un solo
+    producto matriz-vector por jugador de referencia. Los valores nulos cuentan
+    como la media de la métrica. Con ``estandarizada`` no se vuelven a
+    estandarizar las características.
+    
     Args:
         data (DataFrame): DataFrame con los datos
-        jugador_ref (str): Nombre del jugador de referencia
+        jugador_ref (str | list): Etiqueta del jugador de referencia (o lista de etiquetas)
         features (list): Lista de características para calcular la similitud
         num_similares (int): Número de jugadores similares a retornar
         col_nombres (str): Nombre de la columna que contiene los nombres de los jugadores
+        indice (IndiceJugadores, optional): Índice de jugadores del dataset completo
+            (ver ``utils.data_loader.obtener_indice_jugadores``)
+        estandarizada (MatrizEstandarizada, optional): Características ya
+            estandarizadas (ver ``utils.data_loader.obtener_caracteristicas``)
         
     Returns:
-        DataFrame: DataFrame con los jugadores más similares
+        DataFrame: DataFrame con los jugadores más similares (con una columna
+        ``Referencia`` si se pasan varios jugadores)
     """
-    # Crear copia de los datos para no modificar los originales
-    similarity_data = data.copy()
-    
-    # Normalizar características
-    scaler = StandardScaler()
-    similarity_data[features] = scaler.fit_transform(similarity_data[features])
-    
-    # Obtener vector del jugador de referencia
-    player_vector = similarity_data[similarity_data[col_nombres] == jugador_ref][features].values.reshape(1, -1)
-    
-    # Calcular similitud con todos los demás jugadores
-    similarity_scores = []
-    
-    for idx, row in similarity_data.iterrows():
-        if row[col_nombres] != jugador_ref:
-            vector = row[features].values.reshape(1, -1)
-            similarity = cosine_similarity(player_vector, vector)[0][0]
-            similarity_scores.append({
-                'Jugador': row[col_nombres],
-                'Similitud': similarity
-            })
-    
-    # Ordenar por similitud (mayor a menor)
-    similarity_df = pd.DataFrame(similarity_scores).sort_values('Similitud', ascending=False)
-    
-    # Retornar los N jugadores más similares
-    return similarity_df.head(num_similares).reset_index(drop=True)
+    motor = MotorSimilitud(data, features, col_nombres, indice, estandarizada)
+    return motor.similares(jugador_ref, num_similares)
 
-def identificar_fortalezas_debilidades(data, jugador, col_nombres, num_cols):
+@trazar()
+def identificar_fortalezas_debilidades(data, jugador, col_nombres, num_cols, matriz=None):
     """
     Identifica fortalezas y debilidades de un jugador basado en percentiles.
     
     Args:
         data (DataFrame): DataFrame con los datos
-        jugador (str): Nombre del jugador
+        jugador (str): Etiqueta o nombre del jugador
         col_nombres (str): Nombre de la columna que contiene los nombres de los jugadores
         num_cols (list): Lista de columnas numéricas a considerar
+        matriz (MatrizPercentiles, optional): Matriz de percentiles precalculada del dataset
         
     Returns:
         dict: Diccionario con fortalezas, debilidades y percentiles calculados
     """
-    # Calcular percentiles para cada métrica
-    percentiles = {}
-    for col in num_cols:
-        valor = data[data[col_nombres] == jugador][col].values[0]
-        percentil = (data[col] <= valor).mean() * 100
-        percentiles[col] = {
-            'valor': valor,
-            'percentil': percentil
-        }
+    if matriz is None:
+        matriz = MatrizPercentiles(data, num_cols)
+    tabla = matriz.percentiles(jugador, col_nombres, num_cols)
+    percentiles = {
+        col: {'valor': valor, 'percentil': percentil}
+        for col, valor, percentil in zip(num_cols, tabla['Valor'], tabla['Percentil'])
+    }
     
     # Identificar fortalezas (percentil > 80)
     fortalezas = [col for col, info in percentiles.items() if info['percentil'] >= 80]
@@ -113,33 +155,34 @@ def identificar_fortalezas_debilidades(data, jugador, col_nombres, num_cols):
         'promedio_percentil': promedio_percentil
     }
 
-def comparar_jugadores_datos(data, jugador1, jugador2, metricas, col_nombres):
+@trazar()
+def comparar_jugadores_datos(data, jugador1, jugador2, metricas, col_nombres, indice=None):
     """
     Compara dos jugadores en base a métricas seleccionadas.
     
     Args:
         data (DataFrame): DataFrame con los datos
-        jugador1 (str): Nombre del primer jugador
-        jugador2 (str): Nombre del segundo jugador
+        jugador1 (str): Etiqueta o nombre del primer jugador
+        jugador2 (str): Etiqueta o nombre del segundo jugador
         metricas (list): Lista de métricas para comparar
         col_nombres (str): Nombre de la columna que contiene los nombres de los jugadores
+        indice (IndiceJugadores, optional): Índice de jugadores del dataset
+            (ver ``utils.data_loader.obtener_indice_jugadores``)
         
     Returns:
         DataFrame: DataFrame con la comparación
     """
-    # Obtener datos de ambos jugadores
-    datos_j1 = data[data[col_nombres] == jugador1]
-    datos_j2 = data[data[col_nombres] == jugador2]
+    # Una sola extracción de las dos filas (ver ``utils.comparison``)
+    comparacion = ComparacionJugadores(data, [jugador1, jugador2], metricas, col_nombres, indice)
+    valores = comparacion.valores
     
     # Crear tabla comparativa
     comp_table = pd.DataFrame({
         'Métrica': metricas,
-        jugador1: [datos_j1[m].values[0] for m in metricas],
-        jugador2: [datos_j2[m].values[0] for m in metricas],
-        'Diferencia': [datos_j1[m].values[0] - datos_j2[m].values[0] for m in metricas],
-        'Diferencia (%)': [((datos_j1[m].values[0] / datos_j2[m].values[0]) - 1) * 100 
-                         if datos_j2[m].values[0] != 0 else float('inf') 
-                         for m in metricas]
+        jugador1: valores.loc[jugador1].to_numpy(),
+        jugador2: valores.loc[jugador2].to_numpy(),
+        'Diferencia': comparacion.diferencias(jugador2).loc[jugador1].to_numpy(),
+        'Diferencia (%)': (comparacion.cocientes(jugador2).loc[jugador1].to_numpy() - 1) * 100
     })
     
     return comp_table
@@ -158,14 +201,9 @@ def normalizar_para_radar(comp_data, jugador1, jugador2):
     """
     radar_data = comp_data.copy()
     
-    # Obtener las métricas (primera columna)
-    metricas = radar_data['Métrica']
-    
-    # Para cada métrica, normalizar valores
-    for idx, m in enumerate(metricas):
-        max_val = max(radar_data[jugador1].iloc[idx], radar_data[jugador2].iloc[idx])
-        if max_val > 0:
-            radar_data.at[idx, jugador1] = radar_data[jugador1].iloc[idx] / max_val
-            radar_data.at[idx, jugador2] = radar_data[jugador2].iloc[idx] / max_val
+    # Dividir cada métrica por el mayor de los dos valores (si es positivo)
+    normalizados = normalizar_por_maximo(radar_data[[jugador1, jugador2]].to_numpy(dtype=float).T)
+    radar_data[jugador1] = normalizados[0]
+    radar_data[jugador2] = normalizados[1]
     
     return radar_data
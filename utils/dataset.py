@@ -0,0 +1,133 @@
+"""
+Carga de varias ligas y temporadas con un dataset particionado de pyarrow
+(columnas virtuales ``season`` y ``league``).
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from utils.catalog import cargar_manifiesto, ruta_directorio_parquet
+from utils.tracing import trazar
+
+COLUMNA_TEMPORADA = "season"
+COLUMNA_LIGA = "league"
+
+# Prioridad al unificar tipos distintos de una misma columna entre archivos
+# (por ejemplo "Age" es int64 en unas ligas y double en otras)
+_PRIORIDAD_TIPOS = ["null", "bool", "int64", "double", "string"]
+
+
+def _tipo_arrow(nombre):
+    """Convierte el nombre de tipo guardado en el manifiesto a un tipo Arrow."""
+    tipos = {
+        "null": pa.null(),
+        "bool": pa.bool_(),
+        "int64": pa.int64(),
+        "double": pa.float64(),
+        "string": pa.string(),
+    }
+    return tipos.get(nombre, pa.string())
+
+
+def esquema_unificado(manifiesto, entradas):
+    """
+    Calcula un esquema común para un conjunto de archivos del manifiesto.
+
+    Args:
+        manifiesto (dict): Manifiesto del catálogo
+        entradas (list): Entradas del manifiesto incluidas en el dataset
+
+    Returns:
+        Schema: Esquema Arrow con las columnas de datos y las columnas virtuales
+    """
+    orden = []
+    tipos = {}
+    for id_esquema in dict.fromkeys(e["esquema"] for e in entradas):
+        for columna, tipo in manifiesto["esquemas"][id_esquema]:
+            if columna not in tipos:
+                orden.append(columna)
+                tipos[columna] = tipo
+            elif _PRIORIDAD_TIPOS.index(tipo) > _PRIORIDAD_TIPOS.index(tipos[columna]):
+                tipos[columna] = tipo
+
+    campos = [pa.field(columna, _tipo_arrow(tipos[columna])) for columna in orden]
+    campos.append(pa.field(COLUMNA_TEMPORADA, pa.string()))
+    campos.append(pa.field(COLUMNA_LIGA, pa.string()))
+    return pa.schema(campos)
+
+
+def construir_dataset(temporadas=None, ligas=None, directorio=None, manifiesto=None):
+    """
+    Construye un dataset de pyarrow sobre los archivos de ``Ligas_Parquet``.
+
+    Args:
+        temporadas (list, optional): Temporadas a incluir (todas si es None)
+        ligas (list, optional): Ligas a incluir (todas si es None)
+        directorio (str, optional): Directorio de los archivos Parquet
+        manifiesto (dict, optional): Manifiesto ya cargado
+
+    Returns:
+        FileSystemDataset: Dataset con las columnas virtuales ``season`` y ``league``
+    """
+    directorio = ruta_directorio_parquet(directorio)
+    if manifiesto is None:
+        manifiesto = cargar_manifiesto(directorio)
+    if manifiesto is None:
+        raise FileNotFoundError(
+            "No se encontró el manifiesto del catálogo. Ejecuta `python -m utils.catalog`."
+        )
+
+    entradas = [
+        e for e in manifiesto["archivos"]
+        if (temporadas is None or e["temporada"] in temporadas)
+        and (ligas is None or e["liga"] in ligas)
+    ]
+    if not entradas:
+        raise ValueError("No hay archivos que coincidan con las temporadas y ligas seleccionadas.")
+
+    rutas = [os.path.join(directorio, *e["ruta"].split("/")) for e in entradas]
+    particiones = [
+        (ds.field(COLUMNA_TEMPORADA) == e["temporada"]) & (ds.field(COLUMNA_LIGA) == e["liga"])
+        for e in entradas
+    ]
+    return ds.FileSystemDataset.from_paths(
+        rutas,
+        schema=esquema_unificado(manifiesto, entradas),
+        format=ds.ParquetFileFormat(),
+        filesystem=pafs.LocalFileSystem(),
+        partitions=particiones,
+    )
+
+
+def _expresion_filtro(filtro):
+    """Acepta una expresión de pyarrow o filtros en formato lista de tuplas."""
+    if filtro is None or isinstance(filtro, ds.Expression):
+        return filtro
+    return pq.filters_to_expression(filtro)
+
+
+@trazar()
+def cargar_multiliga(temporadas=None, ligas=None, columnas=None, filtro=None, directorio=None):
+    """
+    Carga varias ligas y temporadas en un solo DataFrame.
+
+    Args:
+        temporadas (list, optional): Temporadas a incluir (todas si es None)
+        ligas (list, optional): Ligas a incluir (todas si es None)
+        columnas (list, optional): Columnas a leer; ``season`` y ``league`` se
+            añaden siempre. Si es None se leen todas.
+        filtro (Expression | list, optional): Filtro de filas, como expresión de
+            pyarrow o en formato ``[("Minutes played", ">=", 900)]``
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        DataFrame: Datos de todas las ligas seleccionadas
+    """
+    dataset = construir_dataset(temporadas, ligas, directorio)
+    if columnas is not None:
+        columnas = list(dict.fromkeys(list(columnas) + [COLUMNA_TEMPORADA, COLUMNA_LIGA]))
+    tabla = dataset.to_table(columns=columnas, filter=_expresion_filtro(filtro))
+    return tabla.to_pandas()
@@ -0,0 +1,149 @@
+"""
+Caché en disco de las descargas de Parquet, direccionada por contenido y
+revalidada con peticiones condicionales (ETag / Last-Modified).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+import config
+from utils.catalog import ruta_repositorio
+from utils.http_client import cliente as cliente_http
+
+_TAM_BLOQUE = 1 << 16
+
+
+def ruta_directorio_cache(directorio=None):
+    """Devuelve (y crea si hace falta) el directorio de la caché de descargas."""
+    directorio = ruta_repositorio(config.DOWNLOAD_CACHE_DIR, directorio)
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _ruta_metadatos(directorio, url):
+    clave = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(directorio, f"{clave}.json")
+
+
+def _ruta_contenido(directorio, sha256):
+    return os.path.join(directorio, f"{sha256}.parquet")
+
+
+def _leer_metadatos(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_metadatos(directorio, ruta, metadatos):
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+        json.dump(metadatos, f)
+    os.replace(temporal, ruta)
+
+
+def descargar_con_cache(url, directorio=None, sesion=None, max_edad=None, timeout=None):
+    """
+    Descarga una URL a la caché en disco, reutilizando la copia local cuando es válida.
+
+    Args:
+        url (str): URL del archivo
+        directorio (str, optional): Directorio de la caché
+        sesion (ClienteHTTP, optional): Cliente HTTP a usar (por defecto el cliente
+            compartido de ``utils.http_client``)
+        max_edad (float, optional): Segundos durante los que una copia verificada se
+            usa sin consultar al servidor. Por defecto ``config.DOWNLOAD_CACHE_MAX_AGE``.
+        timeout (float, optional): Tiempo máximo de espera de la petición
+
+    Returns:
+        dict: ``ruta`` del archivo en caché, ``sha256`` del contenido, ``tamano`` y
+        ``origen`` ("cache", "304" o "descarga")
+    """
+    directorio = ruta_directorio_cache(directorio)
+    max_edad = config.DOWNLOAD_CACHE_MAX_AGE if max_edad is None else max_edad
+    cliente = sesion if sesion is not None else cliente_http()
+
+    ruta_meta = _ruta_metadatos(directorio, url)
+    meta = _leer_metadatos(ruta_meta)
+    if meta is not None and not os.path.exists(_ruta_contenido(directorio, meta["sha256"])):
+        meta = None
+
+    if meta is not None and time.time() - meta["verificado"] < max_edad:
+        return _resultado(directorio, meta, "cache")
+
+    headers = {}
+    if meta is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = cliente.get(url, headers=headers, stream=True, timeout=timeout or config.HTTP_TIMEOUT)
+    except requests.exceptions.RequestException:
+        # Sin conexión: usar la última copia conocida si existe
+        if meta is not None:
+            return _resultado(directorio, meta, "cache")
+        raise
+
+    with response:
+        if response.status_code == 304 and meta is not None:
+            meta["verificado"] = time.time()
+            _guardar_metadatos(directorio, ruta_meta, meta)
+            return _resultado(directorio, meta, "304")
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            # Error del servidor tras los reintentos: usar la última copia conocida si existe
+            if meta is not None and response.status_code >= 500:
+                return _resultado(directorio, meta, "cache")
+            raise
+
+        # Se descarga a un temporal único porque el nombre final depende del contenido
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+        try:
+            h = hashlib.sha256()
+            with os.fdopen(descriptor, "wb") as f:
+                for bloque in response.iter_content(chunk_size=_TAM_BLOQUE):
+                    h.update(bloque)
+                    f.write(bloque)
+            sha256 = h.hexdigest()
+            os.replace(temporal, _ruta_contenido(directorio, sha256))
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        anterior = meta["sha256"] if meta is not None else None
+        meta = {
+            "url": url,
+            "sha256": sha256,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "verificado": time.time(),
+        }
+        _guardar_metadatos(directorio, ruta_meta, meta)
+
+    # El contenido anterior de esta URL ya no se necesita
+    if anterior is not None and anterior != sha256:
+        try:
+            os.remove(_ruta_contenido(directorio, anterior))
+        except OSError:
+            pass
+    return _resultado(directorio, meta, "descarga")
+
+
+def _resultado(directorio, meta, origen):
+    ruta = _ruta_contenido(directorio, meta["sha256"])
+    return {
+        "ruta": ruta,
+        "sha256": meta["sha256"],
+        "tamano": os.path.getsize(ruta),
+        "origen": origen,
+    }
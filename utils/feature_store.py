@@ -0,0 +1,237 @@
+"""
+Almacén en disco de las métricas estandarizadas de la similitud, por huella del
+dataset y conjunto de métricas (``.npy`` con memoria mapeada).
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+from utils.catalog import ruta_repositorio
+from utils.similarity import parametros_normalizacion
+
+VERSION_ALMACEN = 1
+ARCHIVO_INFO = "info.json"
+ARRAYS = ["media", "desviacion", "estandarizada", "faltantes", "normas"]
+
+
+def ruta_directorio_almacen(directorio=None):
+    """Devuelve el directorio del almacén (``config.FEATURE_STORE_DIR``)."""
+    return ruta_repositorio(config.FEATURE_STORE_DIR, directorio)
+
+
+def features_similitud(data, columnas=None):
+    """
+    Métricas de la similitud de un dataset: las numéricas sin las de contexto.
+
+    La edad, los minutos, el valor de mercado o la altura no describen el juego
+    de un jugador (ver ``config.SIMILARITY_EXCLUDED_COLUMNS``).
+
+    Args:
+        data (DataFrame | MarcoPerezoso): Datos de los jugadores
+        columnas (list, optional): Métricas candidatas (por defecto todas las numéricas)
+
+    Returns:
+        list: Métricas de la similitud
+    """
+    if columnas is None:
+        columnas = data.select_dtypes(include="number").columns.tolist()
+    return [c for c in columnas if c not in config.SIMILARITY_EXCLUDED_COLUMNS]
+
+
+class MatrizEstandarizada:
+    """Parámetros de estandarización, matriz float32 y máscara de nulos de unas métricas."""
+
+    def __init__(self, features, media, desviacion, estandarizada, faltantes, normas, ruta=None):
+        """
+        Args:
+            features (list): Métricas (columnas de la matriz)
+            media (ndarray): Media de cada métrica
+            desviacion (ndarray): Desviación de cada métrica
+            estandarizada (ndarray): Matriz (jugadores × métricas) float32 estandarizada,
+                con 0 en los valores nulos
+            faltantes (ndarray): Máscara booleana de los valores nulos
+            normas (ndarray): Norma de cada fila de ``estandarizada``
+            ruta (str, optional): Carpeta de la matriz guardada
+        """
+        self.features = list(features)
+        self.media = media
+        self.desviacion = desviacion
+        self.estandarizada = estandarizada
+        self.faltantes = faltantes
+        self.normas = normas
+        self.ruta = ruta
+        self._vectores = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.estandarizada)
+
+    @classmethod
+    def calcular(cls, data, features):
+        """
+        Estandariza unas métricas de un dataset.
+
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos de los jugadores
+            features (list): Métricas a estandarizar
+
+        Returns:
+            MatrizEstandarizada: Matriz en memoria
+        """
+        valores = data[list(features)].to_numpy(dtype=np.float64)
+        media, desviacion = parametros_normalizacion(valores)
+        z = (valores - media) / desviacion
+        faltantes = ~np.isfinite(z)
+        z[faltantes] = 0.0
+        normas = np.linalg.norm(z, axis=1).astype(np.float32)
+        return cls(features, media, desviacion, np.ascontiguousarray(z, dtype=np.float32), faltantes, normas)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Abre una matriz guardada con memoria mapeada.
+
+        Args:
+            ruta (str): Carpeta de la matriz
+
+        Returns:
+            MatrizEstandarizada: Matriz, o None si no existe o es de otra versión
+        """
+        try:
+            with open(os.path.join(ruta, ARCHIVO_INFO), encoding="utf-8") as f:
+                info = json.load(f)
+            if info.get("version") != VERSION_ALMACEN:
+                return None
+            arrays = {nombre: np.load(os.path.join(ruta, f"{nombre}.npy"), mmap_mode="r") for nombre in ARRAYS}
+        except (OSError, ValueError):
+            return None
+        return cls(info["features"], ruta=ruta, **arrays)
+
+    def guardar(self, ruta, huella):
+        """
+        Guarda la matriz en una carpeta (se escribe en una temporal y se renombra).
+
+        Args:
+            ruta (str): Carpeta de la matriz
+            huella (str): Huella del dataset
+        """
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(temporal, exist_ok=True)
+        for nombre in ARRAYS:
+            np.save(os.path.join(temporal, f"{nombre}.npy"), getattr(self, nombre))
+        with open(os.path.join(temporal, ARCHIVO_INFO), "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION_ALMACEN, "huella": huella, "features": self.features,
+                       "filas": len(self)}, f, ensure_ascii=False, indent=1)
+        try:
+            os.replace(temporal, ruta)
+        except OSError:
+            # Otro proceso la ha guardado antes
+            shutil.rmtree(temporal, ignore_errors=True)
+        self.ruta = ruta
+
+    def vectores(self):
+        """
+        Filas de norma 1 para la similitud coseno (las filas sin datos quedan a 0).
+
+        Returns:
+            ndarray: Matriz float32 (se calcula la primera vez que se pide)
+        """
+        with self._lock:
+            if self._vectores is None:
+                normas = np.where(self.normas > 0, self.normas, 1.0).astype(np.float32)
+                self._vectores = np.asarray(self.estandarizada) / normas[:, None]
+            return self._vectores
+
+    def estandarizar(self, valores):
+        """
+        Estandariza filas nuevas con los parámetros de la matriz (los nulos valen 0).
+
+        Args:
+            valores (ndarray): Matriz (jugadores × métricas) en el orden de ``features``
+
+        Returns:
+            ndarray: Matriz float32 estandarizada
+        """
+        z = (np.atleast_2d(np.asarray(valores, dtype=np.float64)) - self.media) / self.desviacion
+        z[~np.isfinite(z)] = 0.0
+        return z.astype(np.float32)
+
+
+def ruta_matriz(huella, features, directorio=None):
+    """Carpeta de la matriz de un dataset y un conjunto de métricas."""
+    clave = hashlib.sha1(json.dumps(list(features), ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(ruta_directorio_almacen(directorio), huella, clave)
+
+
+def _podar(directorio):
+    """Elimina las carpetas de las huellas menos usadas recientemente."""
+    carpetas = [os.path.join(directorio, n) for n in os.listdir(directorio)
+                if os.path.isdir(os.path.join(directorio, n))]
+    carpetas.sort(key=os.path.getmtime, reverse=True)
+    for carpeta in carpetas[config.FEATURE_STORE_MAX_DATASETS:]:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+# Matrices abiertas en el proceso, compartidas por todas las sesiones
+_abiertas = OrderedDict()
+_lock_abiertas = threading.Lock()
+
+
+def obtener_matriz(data, features, huella=None, directorio=None):
+    """
+    Devuelve la matriz estandarizada de unas métricas de un dataset.
+
+    La busca entre las abiertas en el proceso, después en el almacén y, si no
+    está o no corresponde a los datos (otro número de filas), la calcula y la guarda.
+
+    Args:
+        data (DataFrame | MarcoPerezoso): Datos de los jugadores
+        features (list): Métricas
+        huella (str, optional): Huella del dataset. Si es None la matriz se
+            calcula en memoria y no se guarda.
+        directorio (str, optional): Directorio del almacén
+
+    Returns:
+        MatrizEstandarizada: Matriz de las métricas en el orden de las filas de ``data``
+    """
+    features = list(features)
+    if huella is None:
+        return MatrizEstandarizada.calcular(data, features)
+
+    clave = (huella, tuple(features))
+    with _lock_abiertas:
+        matriz = _abiertas.get(clave)
+        if matriz is not None and len(matriz) == len(data):
+            _abiertas.move_to_end(clave)
+            return matriz
+
+    ruta = ruta_matriz(huella, features, directorio)
+    matriz = MatrizEstandarizada.cargar(ruta)
+    if matriz is None or len(matriz) != len(data) or matriz.features != features:
+        matriz = MatrizEstandarizada.calcular(data, features)
+        try:
+            if os.path.isdir(ruta):
+                shutil.rmtree(ruta, ignore_errors=True)
+            matriz.guardar(ruta, huella)
+            _podar(ruta_directorio_almacen(directorio))
+        except OSError:
+            # Sin disco de escritura la matriz sigue sirviendo en memoria
+            pass
+    else:
+        try:
+            os.utime(os.path.dirname(ruta))
+        except OSError:
+            pass
+
+    with _lock_abiertas:
+        _abiertas[clave] = matriz
+        _abiertas.move_to_end(clave)
+        while len(_abiertas) > config.FEATURE_STORE_MAX_OPEN:
+            _abiertas.popitem(last=False)
+    return matriz
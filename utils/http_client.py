@@ -0,0 +1,205 @@
+"""
+Cliente HTTP compartido: pool de conexiones, concurrencia acotada, reintentos
+con backoff y registro de peticiones.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+_ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ClienteHTTP:
+    """Sesión HTTP con pool de conexiones, reintentos y estadísticas por petición."""
+
+    def __init__(self, max_concurrencia=None, reintentos=None, backoff=None, timeout=None):
+        self.max_concurrencia = max_concurrencia or config.HTTP_MAX_CONCURRENCY
+        self.reintentos = config.HTTP_RETRIES if reintentos is None else reintentos
+        self.backoff = config.HTTP_BACKOFF if backoff is None else backoff
+        self.timeout = timeout or config.HTTP_TIMEOUT
+
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrencia)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+
+        self._semaforo = threading.BoundedSemaphore(self.max_concurrencia)
+        self._registros = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    def _espera(self, intento, response=None):
+        """
+        Segundos de espera antes del siguiente intento (backoff con jitter), o
+        None si el ``Retry-After`` de la respuesta supera ``config.HTTP_MAX_RETRY_AFTER``.
+        """
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            espera = float(response.headers["Retry-After"])
+            return espera if espera <= config.HTTP_MAX_RETRY_AFTER else None
+        return random.uniform(0, self.backoff * (2 ** intento))
+
+    def peticion(self, metodo, url, **kwargs):
+        """
+        Hace una petición HTTP con reintentos.
+
+        Args:
+            metodo (str): Método HTTP ("GET", "HEAD"...)
+            url (str): URL de la petición
+            **kwargs: Argumentos de ``requests.Session.request``. Con ``stream=True``
+                hay que cerrar la respuesta (``with response:``) para liberar su hueco.
+
+        Returns:
+            Response: Última respuesta recibida (puede ser un error 429/5xx si se
+            agotan los reintentos o su ``Retry-After`` supera el máximo)
+
+        Raises:
+            requests.exceptions.RequestException: Si falla la conexión en todos los intentos
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        inicio = time.perf_counter()
+        for intento in range(self.reintentos + 1):
+            ultimo = intento == self.reintentos
+            self._semaforo.acquire()
+            try:
+                response = self.sesion.request(metodo, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._semaforo.release()
+                if ultimo:
+                    self._registrar(metodo, url, None, inicio, None, intento)
+                    raise
+                time.sleep(self._espera(intento))
+                continue
+            except BaseException:
+                self._semaforo.release()
+                raise
+            if kwargs.get("stream"):
+                # El cuerpo se lee después: el hueco se libera al cerrar la respuesta
+                self._liberar_al_cerrar(response)
+            else:
+                self._semaforo.release()
+
+            if response.status_code in _ESTADOS_REINTENTABLES and not ultimo:
+                espera = self._espera(intento, response)
+                # Si el servidor pide esperar demasiado se devuelve su respuesta
+                if espera is not None:
+                    response.close()
+                    time.sleep(espera)
+                    continue
+
+            self._registrar(metodo, url, response.status_code, inicio,
+                            response.headers.get("Content-Length"), intento)
+            return response
+
+    def _liberar_al_cerrar(self, response):
+        """Hace que ``response.close()`` (también al salir de ``with``) libere una vez el semáforo."""
+        cerrar = response.close
+        liberado = False
+
+        def close():
+            nonlocal liberado
+            try:
+                cerrar()
+            finally:
+                with self._lock:
+                    liberar, liberado = not liberado, True
+                if liberar:
+                    self._semaforo.release()
+
+        response.close = close
+
+    def get(self, url, **kwargs):
+        return self.peticion("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.peticion("HEAD", url, **kwargs)
+
+    def _registrar(self, metodo, url, estado, inicio, tamano, reintentos):
+        with self._lock:
+            self._registros.append({
+                "metodo": metodo,
+                "url": url,
+                "estado": estado,
+                "segundos": time.perf_counter() - inicio,
+                "bytes": int(tamano) if tamano and str(tamano).isdigit() else None,
+                "reintentos": reintentos,
+            })
+
+    def registros(self):
+        """Devuelve las últimas peticiones como DataFrame."""
+        with self._lock:
+            return pd.DataFrame(list(self._registros),
+                                columns=["metodo", "url", "estado", "segundos", "bytes", "reintentos"])
+
+    def estadisticas(self):
+        """
+        Resume las peticiones registradas.
+
+        Returns:
+            dict: Número de peticiones, errores, reintentos y latencias (media, p50, p95)
+        """
+        registros = self.registros()
+        if registros.empty:
+            return {"peticiones": 0}
+        segundos = registros["segundos"]
+        return {
+            "peticiones": len(registros),
+            "errores": int((registros["estado"].isna() | (registros["estado"] >= 400)).sum()),
+            "reintentos": int(registros["reintentos"].sum()),
+            "media_s": round(float(segundos.mean()), 3),
+            "p50_s": round(float(segundos.quantile(0.5)), 3),
+            "p95_s": round(float(segundos.quantile(0.95)), 3),
+            "bytes": int(registros["bytes"].fillna(0).sum()),
+        }
+
+
+_cliente = None
+_lock_cliente = threading.Lock()
+
+
+def cliente():
+    """Devuelve el cliente HTTP compartido por todo el proceso."""
+    global _cliente
+    with _lock_cliente:
+        if _cliente is None:
+            _cliente = ClienteHTTP()
+        return _cliente
+
+
+def descargar_en_paralelo(tareas, funcion, progreso=None, max_workers=None):
+    """
+    Ejecuta descargas en paralelo con progreso agregado.
+
+    Args:
+        tareas (list): Elementos a descargar (por ejemplo, URLs)
+        funcion (callable): Función que descarga un elemento y devuelve un dict
+            con al menos ``tamano`` en bytes
+        progreso (callable, optional): ``progreso(completadas, total, bytes)``,
+            llamado en el hilo que invoca esta función tras cada descarga
+        max_workers (int, optional): Hilos a usar; por defecto la concurrencia
+            máxima del cliente compartido
+
+    Returns:
+        tuple: (resultados por tarea, errores por tarea)
+    """
+    max_workers = max_workers or cliente().max_concurrencia
+    resultados, errores = {}, {}
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(funcion, tarea): tarea for tarea in tareas}
+        for completadas, futuro in enumerate(as_completed(futuros), start=1):
+            tarea = futuros[futuro]
+            try:
+                resultados[tarea] = futuro.result()
+                total_bytes += resultados[tarea].get("tamano", 0)
+            except Exception as e:
+                errores[tarea] = e
+            if progreso is not None:
+                progreso(completadas, len(tareas), total_bytes)
+    return resultados, errores
@@ -0,0 +1,259 @@
+"""
+Marco de datos perezoso sobre un archivo Parquet: lee cada columna la primera
+vez que se usa e implementa la parte de la API de pandas que usan las páginas.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.compact_dtypes import compactar_serie, memoria
+
+
+class _AlmacenColumnas:
+    """Caché de columnas de un archivo Parquet, compartida por todas sus vistas."""
+
+    def __init__(self, fuente, compactar=False, version=None):
+        self._compactar = compactar
+        self.version = version if version is not None else getattr(fuente, "version", None)
+        self._bytes_memoria = 0
+        if isinstance(fuente, (bytes, bytearray, memoryview)):
+            self._bytes_memoria = len(fuente)
+            fuente = pa.BufferReader(fuente)
+        self._fuente = fuente
+        self._parquet = pq.ParquetFile(fuente, memory_map=isinstance(fuente, str))
+        self.esquema = self._parquet.schema_arrow
+        self.columnas = [c for c in self.esquema.names if not c.startswith("__index_level_")]
+        self.num_filas = self._parquet.metadata.num_rows
+        self.vacio = self.esquema.empty_table().to_pandas()[self.columnas]
+        if compactar:
+            self.vacio = self.vacio.astype({c: "float32" for c in self.vacio.select_dtypes(include="float64").columns})
+        self._series = {}
+        self._memoria_original = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_fuente(self):
+        # Un archivo remoto mantiene en memoria los rangos descargados
+        return self._bytes_memoria + getattr(self._fuente, "bytes_descargados", 0)
+
+    def cargar(self, columnas):
+        """Lee de Parquet las columnas que aún no están en caché."""
+        faltantes = [c for c in columnas if c not in self._series]
+        if not faltantes:
+            return
+        with self._lock:
+            faltantes = [c for c in faltantes if c not in self._series]
+            if not faltantes:
+                return
+            if hasattr(self._fuente, "precargar_columnas"):
+                # Archivo remoto: descargar de una vez los fragmentos de las columnas
+                self._fuente.precargar_columnas(self._parquet.metadata, faltantes)
+            tabla = self._parquet.read(columns=faltantes, use_pandas_metadata=False)
+            df = tabla.to_pandas()
+            for columna in faltantes:
+                serie = df[columna]
+                if self._compactar:
+                    self._memoria_original += memoria(serie)
+                    serie = compactar_serie(serie)
+                self._series[columna] = serie
+
+    def serie(self, columna):
+        self.cargar([columna])
+        # La caché puede compartirse entre sesiones: con copy-on-write, lo que se
+        # modifique en la copia superficial no llega a ella
+        return self._series[columna].copy(deep=False)
+
+    def marco(self, columnas):
+        self.cargar(columnas)
+        return pd.DataFrame({c: self._series[c] for c in columnas}, columns=columnas)
+
+    def cargadas(self):
+        return list(self._series)
+
+    def memoria(self):
+        return int(sum(memoria(s) for s in list(self._series.values())))
+
+    def memoria_original(self):
+        """Bytes que ocuparían las columnas leídas sin compactar."""
+        return self._memoria_original if self._compactar else self.memoria()
+
+
+class MarcoPerezoso:
+    """
+    Vista perezosa de un archivo Parquet con filas y columnas seleccionadas.
+
+    Filtrar con una máscara booleana o proyectar con ``select_dtypes`` devuelve
+    otra vista que comparte la caché de columnas, sin leer datos.
+    """
+
+    def __init__(self, almacen, filas=None, columnas=None):
+        self._almacen = almacen
+        self._filas = filas
+        self._columnas = list(almacen.columnas if columnas is None else columnas)
+
+    @classmethod
+    def desde_parquet(cls, fuente, compactar=False, version=None):
+        """
+        Crea un marco perezoso a partir de un archivo Parquet.
+
+        Args:
+            fuente (str | bytes | file): Ruta, contenido en memoria u objeto de
+                archivo con acceso aleatorio (por ejemplo, un ``ArchivoRemoto``
+                de ``utils.remote_parquet``)
+            compactar (bool): Si es True, cada columna se convierte a su tipo
+                compacto al leerla (ver ``utils.compact_dtypes``)
+            version (str, optional): Identificador del contenido del archivo (por
+                ejemplo, su SHA-256). Por defecto, el ``version`` de la fuente si lo tiene.
+
+        Returns:
+            MarcoPerezoso: Marco con todas las filas y columnas del archivo
+        """
+        return cls(_AlmacenColumnas(fuente, compactar, version))
+
+    @property
+    def version(self):
+        """Identificador del contenido del archivo de origen, o None si no se conoce."""
+        return self._almacen.version
+
+    # --- Esquema (sin leer datos) ---
+
+    @property
+    def columns(self):
+        return pd.Index(self._columnas)
+
+    @property
+    def dtypes(self):
+        tipos = {}
+        cargadas = set(self._almacen.cargadas())
+        for columna in self._columnas:
+            if columna in cargadas:
+                tipos[columna] = self._almacen.serie(columna).dtype
+            else:
+                tipos[columna] = self._almacen.vacio[columna].dtype
+        return pd.Series(tipos, dtype=object)
+
+    def select_dtypes(self, include=None, exclude=None):
+        columnas = self._almacen.vacio[self._columnas].select_dtypes(include=include, exclude=exclude).columns
+        return MarcoPerezoso(self._almacen, self._filas, list(columnas))
+
+    def __contains__(self, columna):
+        return columna in self._columnas
+
+    def __len__(self):
+        return self._almacen.num_filas if self._filas is None else len(self._filas)
+
+    @property
+    def shape(self):
+        return (len(self), len(self._columnas))
+
+    @property
+    def empty(self):
+        return len(self) == 0 or not self._columnas
+
+    @property
+    def index(self):
+        return pd.RangeIndex(self._almacen.num_filas) if self._filas is None else pd.Index(self._filas)
+
+    # --- Acceso a datos (lee y cachea las columnas usadas) ---
+
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            if clave not in self._columnas:
+                raise KeyError(clave)
+            serie = self._almacen.serie(clave)
+            return serie if self._filas is None else serie.iloc[self._filas]
+
+        if isinstance(clave, (list, tuple, pd.Index)):
+            faltantes = [c for c in clave if c not in self._columnas]
+            if faltantes:
+                raise KeyError(faltantes)
+            return self.a_pandas(list(clave))
+
+        mascara = np.asarray(clave, dtype=bool)
+        if mascara.shape != (len(self),):
+            raise ValueError("La máscara booleana debe tener una entrada por fila.")
+        return MarcoPerezoso(self._almacen, self._posiciones()[mascara], self._columnas)
+
+    def head(self, n=5):
+        return MarcoPerezoso(self._almacen, self._posiciones()[:n], self._columnas).a_pandas()
+
+    @property
+    def iloc(self):
+        return self.a_pandas().iloc
+
+    def a_pandas(self, columnas=None):
+        """
+        Materializa la vista como DataFrame.
+
+        Args:
+            columnas (list, optional): Columnas a incluir. Por defecto, todas las
+                columnas de la vista (que se leerán si aún no están en caché).
+
+        Returns:
+            DataFrame: Datos de las filas y columnas seleccionadas
+        """
+        marco = self._almacen.marco(self._columnas if columnas is None else columnas)
+        return marco if self._filas is None else marco.iloc[self._filas]
+
+    def _posiciones(self):
+        return np.arange(self._almacen.num_filas) if self._filas is None else self._filas
+
+    # --- Información ---
+
+    def columnas_cargadas(self):
+        """Devuelve las columnas que ya se han leído del archivo Parquet."""
+        return self._almacen.cargadas()
+
+    def memoria_cargada(self):
+        """Devuelve los bytes ocupados por las columnas leídas hasta ahora."""
+        return self._almacen.memoria()
+
+    def memoria_sin_compactar(self):
+        """Devuelve los bytes que ocuparían las columnas leídas con los tipos originales."""
+        return self._almacen.memoria_original()
+
+    def bytes_fuente(self):
+        """Devuelve los bytes del archivo Parquet que se mantienen en memoria."""
+        return self._almacen.bytes_fuente
+
+    def resumen_columnas(self):
+        """
+        Resume las columnas a partir del esquema y las estadísticas del pie del
+        archivo, sin leer datos.
+
+        Returns:
+            DataFrame: Columna, tipo y número de valores nulos
+        """
+        metadata = self._almacen._parquet.metadata
+        indices = {metadata.schema.column(i).name: i for i in range(metadata.num_columns)}
+        filas = []
+        for columna in self._columnas:
+            nulos = None
+            i = indices.get(columna)
+            if i is not None:
+                nulos = 0
+                for rg in range(metadata.num_row_groups):
+                    stats = metadata.row_group(rg).column(i).statistics
+                    if stats is None or not stats.has_null_count:
+                        nulos = None
+                        break
+                    nulos += stats.null_count
+            filas.append({
+                "Columna": columna,
+                "Tipo": str(self._almacen.vacio[columna].dtype),
+                "Valores nulos": nulos
+            })
+        return pd.DataFrame(filas)
+
+
+def a_dataframe(datos):
+    """
+    Devuelve un DataFrame de pandas tanto para un DataFrame como para un
+    ``MarcoPerezoso`` (que se materializa con todas sus columnas).
+    """
+    if isinstance(datos, MarcoPerezoso):
+        return datos.a_pandas()
+    return datos
@@ -0,0 +1,260 @@
+"""
+Búsqueda de jugadores por nombre en todas las ligas y temporadas con un índice
+de trigramas (tolera erratas y nombres incompletos).
+
+Uso:
+    python -m utils.name_search
+"""
+import json
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import config
+from utils.catalog import clave_temporada, ruta_repositorio
+from utils.dataset import cargar_multiliga, COLUMNA_TEMPORADA, COLUMNA_LIGA
+from utils.similarity import top_k
+
+VERSION_BUSCADOR = 1
+ARCHIVO_BUSCADOR = "buscador.json"
+COLUMNAS_ENTRADAS = ["Wyscout id", "Player", "Full name", "Team", COLUMNA_LIGA, COLUMNA_TEMPORADA]
+PESO_COBERTURA = 0.75
+
+
+def ruta_directorio_buscador(directorio=None):
+    """Devuelve el directorio del buscador (``config.NAME_SEARCH_DIR``)."""
+    return ruta_repositorio(config.NAME_SEARCH_DIR, directorio)
+
+
+def normalizar_nombre(texto):
+    """
+    Normaliza un nombre para buscarlo: minúsculas, sin tildes y sin signos.
+
+    Args:
+        texto (str): Nombre o consulta
+
+    Returns:
+        str: Palabras separadas por un espacio ("J. Rodríguez" -> "j rodriguez")
+    """
+    if not isinstance(texto, str):
+        return ""
+    sin_tildes = "".join(c for c in unicodedata.normalize("NFKD", texto.casefold())
+                         if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", sin_tildes))
+
+
+def trigramas(texto):
+    """
+    Devuelve los códigos de los trigramas distintos de un texto normalizado.
+
+    Cada palabra se rellena con dos espacios delante y uno detrás, para que los
+    inicios de palabra pesen más. Un trigrama se codifica como un entero de 63
+    bits con los tres puntos de código.
+
+    Returns:
+        ndarray: Códigos ``int64`` ordenados y sin repetir
+    """
+    codigos = set()
+    for palabra in texto.split():
+        relleno = f"  {palabra} "
+        for i in range(len(relleno) - 2):
+            a, b, c = (ord(x) for x in relleno[i:i + 3])
+            codigos.add((a << 42) | (b << 21) | c)
+    return np.array(sorted(codigos), dtype=np.int64)
+
+
+def leer_entradas(temporadas=None, ligas=None, directorio=None):
+    """
+    Lee las entradas del buscador: nombre, equipo, liga y temporada de cada jugador.
+
+    Args:
+        temporadas (list, optional): Temporadas a leer (todas si es None)
+        ligas (list, optional): Ligas a leer (todas si es None)
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        DataFrame: Columnas ``COLUMNAS_ENTRADAS``, sin filas repetidas
+    """
+    columnas = [c for c in COLUMNAS_ENTRADAS if c not in (COLUMNA_LIGA, COLUMNA_TEMPORADA)]
+    entradas = cargar_multiliga(temporadas, ligas, columnas=columnas, directorio=directorio)[COLUMNAS_ENTRADAS]
+    return entradas.drop_duplicates().reset_index(drop=True)
+
+
+def construir_buscador(directorio_salida=None, directorio=None, entradas=None):
+    """
+    Construye el índice de trigramas de todos los nombres del corpus.
+
+    Args:
+        directorio_salida (str, optional): Directorio donde guardar el buscador
+        directorio (str, optional): Directorio de los archivos Parquet
+        entradas (DataFrame, optional): Entradas ya leídas con ``leer_entradas``
+            (por ejemplo, unidas por ``utils.pipeline``)
+
+    Returns:
+        dict: Información del buscador (también guardada en ``buscador.json``)
+    """
+    directorio_salida = ruta_directorio_buscador(directorio_salida)
+    if entradas is None:
+        entradas = leer_entradas(directorio=directorio)
+    entradas = entradas.reset_index(drop=True)
+
+    # Un texto por combinación distinta de nombre corto y nombre completo (se
+    # normaliza cada pareja una sola vez: un jugador aparece en varias temporadas)
+    codigos_pareja, parejas = pd.factorize(pd.MultiIndex.from_arrays(
+        [entradas["Player"].fillna(""), entradas["Full name"].fillna("")]))
+    textos_parejas = np.array([f"{normalizar_nombre(corto)} {normalizar_nombre(completo)}".strip()
+                               for corto, completo in parejas], dtype=object)
+    codigos_texto, unicos = pd.factorize(textos_parejas[codigos_pareja])
+    entradas["texto"] = codigos_texto
+
+    claves, textos_claves = [], []
+    n_trigramas = np.zeros(len(unicos), dtype=np.int16)
+    for i, texto in enumerate(unicos):
+        codigos = trigramas(texto)
+        n_trigramas[i] = len(codigos)
+        claves.append(codigos)
+        textos_claves.append(np.full(len(codigos), i, dtype=np.int32))
+    claves = np.concatenate(claves)
+    textos_claves = np.concatenate(textos_claves)
+
+    # Listas invertidas: trigrama -> textos que lo contienen
+    orden = np.argsort(claves, kind="stable")
+    claves, listas = claves[orden], textos_claves[orden]
+    trigramas_unicos, inicios = np.unique(claves, return_index=True)
+    inicios = np.append(inicios, len(claves)).astype(np.int64)
+
+    # Texto -> entradas (temporada, liga y equipo de cada nombre)
+    entradas = entradas.sort_values("texto", kind="stable").reset_index(drop=True)
+    inicios_entradas = np.concatenate([[0], np.cumsum(np.bincount(entradas["texto"], minlength=len(unicos)))])
+
+    os.makedirs(directorio_salida, exist_ok=True)
+    np.save(os.path.join(directorio_salida, "trigramas.npy"), trigramas_unicos)
+    np.save(os.path.join(directorio_salida, "inicios.npy"), inicios)
+    np.save(os.path.join(directorio_salida, "listas.npy"), listas)
+    np.save(os.path.join(directorio_salida, "n_trigramas.npy"), n_trigramas)
+    np.save(os.path.join(directorio_salida, "inicios_entradas.npy"), inicios_entradas.astype(np.int64))
+    entradas.drop(columns="texto").to_parquet(os.path.join(directorio_salida, "entradas.parquet"), index=False)
+
+    info = {
+        "version": VERSION_BUSCADOR,
+        "construido": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "entradas": len(entradas),
+        "nombres": len(unicos),
+        "trigramas": len(trigramas_unicos),
+    }
+    with open(os.path.join(directorio_salida, ARCHIVO_BUSCADOR), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+
+class BuscadorNombres:
+    """Índice de trigramas abierto con memoria mapeada."""
+
+    def __init__(self, directorio, info):
+        self.directorio = directorio
+        self.info = info
+        cargar = lambda nombre: np.load(os.path.join(directorio, nombre), mmap_mode="r")
+        self._trigramas = cargar("trigramas.npy")
+        self._inicios = cargar("inicios.npy")
+        self._listas = cargar("listas.npy")
+        self._n_trigramas = np.asarray(cargar("n_trigramas.npy"), dtype=np.float32)
+        self._inicios_entradas = cargar("inicios_entradas.npy")
+        # Un solo bloque por columna: seleccionar filas de columnas troceadas es mucho más lento
+        self.entradas = pq.read_table(os.path.join(directorio, "entradas.parquet")).combine_chunks().to_pandas()
+
+    @classmethod
+    def cargar(cls, directorio=None):
+        """
+        Abre un buscador guardado.
+
+        Raises:
+            FileNotFoundError: Si el buscador no se ha construido
+        """
+        directorio = ruta_directorio_buscador(directorio)
+        with open(os.path.join(directorio, ARCHIVO_BUSCADOR), encoding="utf-8") as f:
+            info = json.load(f)
+        return cls(directorio, info)
+
+    def puntuaciones(self, consulta):
+        """
+        Puntúa todos los nombres frente a una consulta.
+
+        Returns:
+            ndarray: Puntuación de cada nombre (0 si no comparte ningún trigrama)
+        """
+        codigos = trigramas(normalizar_nombre(consulta))
+        puntuaciones = np.zeros(len(self._n_trigramas), dtype=np.float32)
+        if len(codigos) == 0:
+            return puntuaciones
+
+        posiciones = np.searchsorted(self._trigramas, codigos)
+        posiciones = posiciones[posiciones < len(self._trigramas)]
+        posiciones = posiciones[np.isin(self._trigramas[posiciones], codigos)]
+        if len(posiciones) == 0:
+            return puntuaciones
+        listas = np.concatenate([self._listas[self._inicios[p]:self._inicios[p + 1]] for p in posiciones])
+
+        comunes = np.bincount(listas, minlength=len(puntuaciones)).astype(np.float32)
+        cobertura = comunes / len(codigos)
+        dice = 2 * comunes / (len(codigos) + self._n_trigramas)
+        return PESO_COBERTURA * cobertura + (1 - PESO_COBERTURA) * dice
+
+    def buscar(self, consulta, k=None, min_puntuacion=0.3):
+        """
+        Busca jugadores por nombre en todas las ligas y temporadas.
+
+        Args:
+            consulta (str): Nombre o parte del nombre (admite erratas y sin tildes)
+            k (int, optional): Número máximo de resultados. Por defecto
+                ``config.NAME_SEARCH_MAX_RESULTS``.
+            min_puntuacion (float): Puntuación mínima de un resultado
+
+        Returns:
+            DataFrame: Una fila por jugador, equipo, liga y temporada, con la
+            columna ``Coincidencia`` (0-1), de mayor a menor coincidencia y, con
+            la misma coincidencia, de la temporada más reciente a la más antigua
+        """
+        k = config.NAME_SEARCH_MAX_RESULTS if k is None else k
+        puntuaciones = self.puntuaciones(consulta)
+        puntuaciones[puntuaciones < min_puntuacion] = -np.inf
+
+        # Cada nombre puede tener varias entradas: se eligen nombres hasta cubrir k filas
+        elegidos = top_k(puntuaciones, k)
+        filas = [np.arange(self._inicios_entradas[t], self._inicios_entradas[t + 1]) for t in elegidos]
+        if not filas:
+            return self.entradas.iloc[:0].assign(Coincidencia=np.array([], dtype=float))
+        coincidencia = np.repeat(puntuaciones[elegidos], [len(f) for f in filas])
+        resultado = self.entradas.iloc[np.concatenate(filas)].assign(Coincidencia=coincidencia.astype(float))
+        # Las temporadas se ordenan cronológicamente ("2024" es posterior a "23-24"), no como texto
+        orden = {t: i for i, t in enumerate(sorted(resultado[COLUMNA_TEMPORADA].astype(str).unique(),
+                                                      key=clave_temporada))}
+        resultado = resultado.sort_values(
+            ["Coincidencia", COLUMNA_TEMPORADA], ascending=False, kind="stable",
+            key=lambda c: c.astype(str).map(orden) if c.name == COLUMNA_TEMPORADA else c)
+        return resultado.head(k).reset_index(drop=True)
+
+
+def main():
+    inicio = time.perf_counter()
+    info = construir_buscador()
+    print(f"Buscador construido en {time.perf_counter() - inicio:.1f} s ({ruta_directorio_buscador()})")
+    print(f"  {info['entradas']} entradas, {info['nombres']} nombres, {info['trigramas']} trigramas")
+
+    buscador = BuscadorNombres.cargar()
+    for consulta in ["messi", "james rodriguez", "mbape", "Müller"]:
+        inicio = time.perf_counter()
+        resultado = buscador.buscar(consulta, k=5)
+        ms = (time.perf_counter() - inicio) * 1000
+        primero = resultado.iloc[0] if len(resultado) else None
+        print(f"  '{consulta}': {ms:.1f} ms" +
+              (f" -> {primero['Player']} ({primero['Team']}, {primero[COLUMNA_LIGA]} {primero[COLUMNA_TEMPORADA]})"
+               if primero is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Cubo de percentiles por temporada, liga, grupo de posiciones y minutos mínimos.
+
+Uso:
+    python -m utils.percentile_cube
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from utils.catalog import ruta_repositorio
+from utils.dataset import cargar_multiliga, COLUMNA_TEMPORADA, COLUMNA_LIGA
+from utils.data_processing import grupo_posicion
+
+COLUMNA_ID = "Wyscout id"
+COLUMNA_GRUPO = "grupo"
+COLUMNA_MINUTOS = "min_minutos"
+CLAVES = [COLUMNA_TEMPORADA, COLUMNA_LIGA, COLUMNA_GRUPO, COLUMNA_MINUTOS, COLUMNA_ID]
+
+
+def ruta_cubo(ruta=None):
+    """Devuelve la ruta del cubo (``config.PERCENTILE_CUBE_FILE``)."""
+    return ruta_repositorio(config.PERCENTILE_CUBE_FILE, ruta)
+
+
+def percentiles_agrupados(data, metricas, claves):
+    """
+    Calcula el percentil de cada fila frente a las de su mismo grupo.
+
+    Usa la misma definición que ``MatrizPercentiles``: porcentaje de jugadores
+    del grupo con un valor menor o igual (0 si el valor es nulo).
+
+    Args:
+        data (DataFrame): Datos de los jugadores
+        metricas (list): Columnas numéricas
+        claves (list): Columnas que definen los grupos
+
+    Returns:
+        DataFrame: Percentiles enteros (``uint8``) con el índice de ``data``
+    """
+    agrupados = data.groupby(claves, sort=False, observed=True)
+    rangos = agrupados[metricas].rank(method="max", na_option="keep").fillna(0)
+    tamanos = agrupados[metricas[0]].transform("size")
+    return rangos.div(tamanos, axis=0).mul(100).round().astype(np.uint8)
+
+
+def calcular_cubo(data):
+    """
+    Calcula las filas del cubo de percentiles para unos datos.
+
+    Los contextos no cruzan temporadas ni ligas, así que el cubo de varias ligas
+    es la unión de los cubos de cada liga (ver ``utils.pipeline``).
+
+    Args:
+        data (DataFrame): Datos de una o varias ligas (con ``season`` y ``league``)
+
+    Returns:
+        DataFrame: Claves del cubo y percentiles, ordenados por ``CLAVES``
+    """
+    posicion = data["Primary position"].where(data["Primary position"].notna(), data["Position"])
+    data = data.assign(**{COLUMNA_GRUPO: posicion.map(grupo_posicion)})
+    data = data[data[COLUMNA_GRUPO].notna()]
+    metricas = [c for c in data.select_dtypes(include="number").columns if c != COLUMNA_ID]
+
+    partes = []
+    for minimo in config.PERCENTILE_MINUTES_BUCKETS:
+        poblacion = data[data["Minutes played"] >= minimo]
+        percentiles = percentiles_agrupados(poblacion, metricas, [COLUMNA_TEMPORADA, COLUMNA_LIGA, COLUMNA_GRUPO])
+        claves = poblacion[[COLUMNA_TEMPORADA, COLUMNA_LIGA, COLUMNA_GRUPO, COLUMNA_ID]].assign(
+            **{COLUMNA_MINUTOS: np.uint16(minimo)})
+        partes.append(pd.concat([claves[CLAVES], percentiles], axis=1))
+    return pd.concat(partes, ignore_index=True).sort_values(CLAVES, kind="stable")
+
+
+def escribir_cubo(bloques, ruta=None):
+    """
+    Escribe el cubo con un grupo de filas por bloque.
+
+    Args:
+        bloques (iterable): Tablas Arrow de una temporada y liga cada una, con
+            las mismas columnas y en el orden en que se escriben
+        ruta (str, optional): Archivo Parquet de salida
+
+    Returns:
+        dict: Filas, contextos y tamaño del cubo
+    """
+    ruta = ruta_cubo(ruta)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    writer, filas, contextos = None, 0, 0
+    try:
+        for bloque in bloques:
+            if writer is None:
+                writer = pq.ParquetWriter(temporal, bloque.schema, compression="zstd")
+            writer.write_table(bloque.cast(writer.schema))
+            filas += bloque.num_rows
+            contextos += bloque.group_by(CLAVES[:4]).aggregate([]).num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(temporal, ruta)
+    return {"filas": filas, "contextos": contextos, "tamano": os.path.getsize(ruta)}
+
+
+def construir_cubo(ruta=None, directorio=None):
+    """
+    Construye el cubo de percentiles de todo el corpus.
+
+    Args:
+        ruta (str, optional): Archivo Parquet de salida
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        dict: Filas, contextos y métricas del cubo
+    """
+    cubo = calcular_cubo(cargar_multiliga(directorio=directorio))
+
+    # Un grupo de filas por temporada y liga
+    esquema = pa.Schema.from_pandas(cubo, preserve_index=False)
+    bloques = (pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False)
+               for _, bloque in cubo.groupby([COLUMNA_TEMPORADA, COLUMNA_LIGA], sort=False))
+    info = escribir_cubo(bloques, ruta)
+    info["metricas"] = len(cubo.columns) - len(CLAVES)
+    return info
+
+
+class CuboPercentiles:
+    """Consultas al cubo de percentiles; guarda en memoria las últimas ligas leídas."""
+
+    def __init__(self, ruta=None, max_ligas=32):
+        """
+        Raises:
+            FileNotFoundError: Si el cubo no se ha construido
+        """
+        self.ruta = ruta_cubo(ruta)
+        self._parquet = pq.ParquetFile(self.ruta)
+        self.metricas = [c for c in self._parquet.schema_arrow.names if c not in CLAVES]
+        self._grupos_filas = self._indexar_grupos_filas()
+        self._ligas = OrderedDict()
+        self._max_ligas = max_ligas
+        self._lock = threading.Lock()
+
+    def _indexar_grupos_filas(self):
+        """Relaciona (temporada, liga) con su grupo de filas usando las estadísticas del pie."""
+        metadata = self._parquet.metadata
+        nombres = self._parquet.schema_arrow.names
+        i_temporada, i_liga = nombres.index(COLUMNA_TEMPORADA), nombres.index(COLUMNA_LIGA)
+        indice = {}
+        for rg in range(metadata.num_row_groups):
+            grupo = metadata.row_group(rg)
+            indice[(grupo.column(i_temporada).statistics.min, grupo.column(i_liga).statistics.min)] = rg
+        return indice
+
+    def contextos(self):
+        """Devuelve las parejas (temporada, liga) del cubo."""
+        return list(self._grupos_filas)
+
+    def _liga(self, temporada, liga):
+        clave = (temporada, liga)
+        with self._lock:
+            if clave in self._ligas:
+                self._ligas.move_to_end(clave)
+                return self._ligas[clave]
+        rg = self._grupos_filas.get(clave)
+        if rg is None:
+            return None
+        tabla = self._parquet.read_row_group(rg).to_pandas()
+        tabla = tabla.set_index([COLUMNA_GRUPO, COLUMNA_MINUTOS, COLUMNA_ID]).sort_index()
+        with self._lock:
+            self._ligas[clave] = tabla
+            while len(self._ligas) > self._max_ligas:
+                self._ligas.popitem(last=False)
+        return tabla
+
+    def percentiles(self, temporada, liga, grupo, min_minutos, id_jugador, metricas=None):
+        """
+        Devuelve los percentiles de un jugador en un contexto.
+
+        Args:
+            temporada (str): Temporada
+            liga (str): Liga
+            grupo (str): Grupo de posiciones
+            min_minutos (int): Umbral de ``config.PERCENTILE_MINUTES_BUCKETS``
+            id_jugador (int): Identificador de Wyscout
+            metricas (list, optional): Métricas (por defecto todas las del cubo)
+
+        Returns:
+            Series: Percentil por métrica, o None si el jugador no está en ese
+            contexto (por ejemplo, con menos minutos que el umbral)
+        """
+        tabla = self._liga(temporada, liga)
+        clave = (grupo, min_minutos, id_jugador)
+        if tabla is None or clave not in tabla.index:
+            return None
+        fila = tabla.loc[clave]
+        if isinstance(fila, pd.DataFrame):
+            fila = fila.iloc[0]
+        metricas = self.metricas if metricas is None else [m for m in metricas if m in self.metricas]
+        return fila[metricas].astype(float)
+
+    def tamano_contexto(self, temporada, liga, grupo, min_minutos):
+        """Devuelve el número de jugadores con los que se compara en un contexto."""
+        tabla = self._liga(temporada, liga)
+        if tabla is None or (grupo, min_minutos) not in tabla.index.droplevel(COLUMNA_ID):
+            return 0
+        return len(tabla.loc[(grupo, min_minutos)])
+
+
+def main():
+    inicio = time.perf_counter()
+    info = construir_cubo()
+    print(f"Cubo de percentiles construido en {time.perf_counter() - inicio:.1f} s: {ruta_cubo()}")
+    print(f"  {info['filas']} filas, {info['contextos']} contextos, {info['metricas']} métricas, "
+          f"{info['tamano'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Matriz de percentiles de todos los jugadores en todas las columnas numéricas de un dataset."""
+import numpy as np
+import pandas as pd
+
+from utils.player_index import IndiceJugadores
+
+
+class MatrizPercentiles:
+    """Rangos de todos los jugadores en todas las columnas numéricas de un dataset."""
+
+    def __init__(self, data, columnas=None):
+        """
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos de los jugadores
+            columnas (list, optional): Columnas numéricas a incluir (por defecto todas)
+        """
+        if columnas is None:
+            columnas = data.select_dtypes(include="number").columns.tolist()
+        self._data = data
+        self.columnas = list(columnas)
+        self.total = len(data)
+
+        valores = data[self.columnas]
+        valores.index = pd.RangeIndex(len(valores))
+        # Rango "max": número de valores no nulos menores o iguales (NaN si el valor es nulo)
+        menores_iguales = valores.rank(method="max", na_option="keep").fillna(0).to_numpy(dtype=np.int32)
+
+        self.valores = valores
+        self.menores_iguales = pd.DataFrame(menores_iguales, columns=self.columnas)
+        self.no_nulos = valores.notna().sum()
+        self._posiciones = {}
+
+    def posicion(self, jugador, col_nombres):
+        """Devuelve la fila del jugador (etiqueta o nombre; ver ``utils.player_index``)."""
+        if col_nombres not in self._posiciones:
+            self._posiciones[col_nombres] = IndiceJugadores(self._data, col_nombres)
+        return self._posiciones[col_nombres].posicion(jugador)
+
+    def percentiles(self, jugador, col_nombres, metricas=None):
+        """
+        Devuelve los percentiles de un jugador.
+
+        Args:
+            jugador (str): Etiqueta o nombre del jugador
+            col_nombres (str): Columna con los nombres de los jugadores
+            metricas (list, optional): Métricas (por defecto todas las columnas de la matriz)
+
+        Returns:
+            DataFrame: Columnas ``Valor`` y ``Percentil`` con una fila por métrica
+        """
+        metricas = self.columnas if metricas is None else list(metricas)
+        posicion = self.posicion(jugador, col_nombres)
+        return pd.DataFrame({
+            "Valor": self.valores.loc[posicion, metricas].to_numpy(),
+            "Percentil": self.menores_iguales.loc[posicion, metricas].to_numpy() / self.total * 100
+        }, index=metricas)
+
+    def ranking(self, jugador, col_nombres, metrica):
+        """
+        Devuelve la posición del jugador en una métrica (1 = valor más alto).
+
+        Returns:
+            tuple: (posición, total de jugadores)
+        """
+        posicion = self.posicion(jugador, col_nombres)
+        if pd.isna(self.valores.at[posicion, metrica]):
+            return 1, self.total
+        mayores = self.no_nulos[metrica] - self.menores_iguales.at[posicion, metrica]
+        return int(mayores) + 1, self.total
@@ -0,0 +1,325 @@
+"""
+Reconstrucción incremental de los artefactos derivados de ``Ligas_Parquet``
+(cubo de percentiles, índice de similitud y buscador de nombres).
+
+Uso:
+    python -m utils.pipeline
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from utils import ann_index, name_search, percentile_cube
+from utils.catalog import (ruta_directorio_parquet, clave_temporada, nombre_liga, hash_archivo,
+                           construir_manifiesto, guardar_manifiesto, guardar_indices_temporada,
+                           ruta_manifiesto, cargar_manifiesto, ruta_repositorio)
+from utils.dataset import cargar_multiliga, esquema_unificado
+
+VERSION_PIPELINE = 1
+ARCHIVO_ESTADO = "estado.json"
+ARTEFACTOS = ["percentiles", "similitud", "nombres"]
+
+
+def ruta_directorio_pipeline(directorio=None):
+    """Devuelve el directorio del pipeline (``config.PIPELINE_DIR``)."""
+    return ruta_repositorio(config.PIPELINE_DIR, directorio)
+
+
+def parametros_artefacto(artefacto):
+    """Parámetros de los que depende un artefacto además de los datos (cambiarlos lo reconstruye)."""
+    if artefacto == "percentiles":
+        return {"buckets": config.PERCENTILE_MINUTES_BUCKETS}
+    if artefacto == "similitud":
+        return {"version": ann_index.VERSION_INDICE, "min_minutos": config.ANN_MIN_MINUTES,
+                "listas": config.ANN_LISTS_PER_SQRT,
+                "features": {g: ann_index.features_grupo(g) for g in config.POSITION_GROUPS}}
+    if artefacto == "nombres":
+        return {"version": name_search.VERSION_BUSCADOR}
+    raise ValueError(f"Artefacto desconocido: {artefacto}")
+
+
+def _huella_parametros(artefacto):
+    return hashlib.sha1(json.dumps(parametros_artefacto(artefacto), sort_keys=True).encode()).hexdigest()[:12]
+
+
+def listar_archivos(directorio=None):
+    """
+    Lista los archivos Parquet de cada temporada.
+
+    Returns:
+        dict: Ruta relativa (``temporada/archivo``) -> ``{"temporada", "liga"}``
+    """
+    directorio = ruta_directorio_parquet(directorio)
+    archivos = {}
+    temporadas = sorted((d for d in os.listdir(directorio) if os.path.isdir(os.path.join(directorio, d))),
+                        key=clave_temporada)
+    for temporada in temporadas:
+        for archivo in sorted(os.listdir(os.path.join(directorio, temporada))):
+            if archivo.endswith(".parquet"):
+                archivos[f"{temporada}/{archivo}"] = {"temporada": temporada,
+                                                      "liga": nombre_liga(archivo, temporada)}
+    return archivos
+
+
+def huellas_archivos(archivos, anteriores, directorio=None, procesos=None):
+    """
+    Calcula el SHA-256 de los archivos, reutilizando el anterior si no han cambiado
+    su tamaño ni su fecha de modificación.
+
+    Args:
+        archivos (dict): Archivos de ``listar_archivos``
+        anteriores (dict): Huellas del estado anterior, por ruta relativa
+        directorio (str, optional): Directorio de los archivos Parquet
+        procesos (int, optional): Hilos para calcular los hashes
+
+    Returns:
+        tuple: (huellas por ruta relativa, número de archivos leídos)
+    """
+    directorio = ruta_directorio_parquet(directorio)
+    huellas, pendientes = {}, []
+    for relativa in archivos:
+        estado = os.stat(os.path.join(directorio, *relativa.split("/")))
+        huella = {"tamano": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+        anterior = anteriores.get(relativa)
+        if anterior and anterior["tamano"] == huella["tamano"] and anterior["mtime_ns"] == huella["mtime_ns"]:
+            huella["sha256"] = anterior["sha256"]
+        else:
+            pendientes.append(relativa)
+        huellas[relativa] = huella
+
+    with ThreadPoolExecutor(procesos or os.cpu_count()) as pool:
+        rutas = [os.path.join(directorio, *r.split("/")) for r in pendientes]
+        for relativa, sha256 in zip(pendientes, pool.map(hash_archivo, rutas)):
+            huellas[relativa]["sha256"] = sha256
+    return huellas, len(pendientes)
+
+
+def ruta_parte(directorio_pipeline, artefacto, relativa, sha256):
+    """Ruta de la parte de un artefacto para un archivo con un contenido y unos parámetros dados."""
+    clave = hashlib.sha1(f"{relativa}|{sha256}|{_huella_parametros(artefacto)}".encode()).hexdigest()[:20]
+    return os.path.join(directorio_pipeline, artefacto, f"{clave}.parquet")
+
+
+def construir_parte(artefacto, temporada, liga, ruta, directorio=None):
+    """
+    Construye y guarda la parte de un artefacto para un archivo de liga y temporada.
+
+    Returns:
+        tuple: (filas de la parte, segundos)
+    """
+    inicio = time.perf_counter()
+    if artefacto == "percentiles":
+        parte = percentile_cube.calcular_cubo(cargar_multiliga([temporada], [liga], directorio=directorio))
+    elif artefacto == "similitud":
+        parte = ann_index.cargar_filas_indice([temporada], [liga], directorio)
+    else:
+        parte = name_search.leer_entradas([temporada], [liga], directorio)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    parte.to_parquet(temporal, index=False)
+    os.replace(temporal, ruta)
+    return len(parte), time.perf_counter() - inicio
+
+
+def _bloques_cubo(rutas, directorio=None):
+    """
+    Lee las partes del cubo en orden y con las mismas columnas.
+
+    Las métricas son las columnas numéricas del esquema común de todo el corpus,
+    como en ``construir_cubo``: una columna vacía en un archivo puede ser
+    numérica en él y texto en el esquema común. Una métrica que falta en una
+    parte vale 0, el percentil de un valor nulo.
+    """
+    manifiesto = cargar_manifiesto(directorio)
+    esquema = esquema_unificado(manifiesto, manifiesto["archivos"])
+    numericas = {c.name for c in esquema if pa.types.is_integer(c.type) or pa.types.is_floating(c.type)}
+    nombres = dict.fromkeys(c for r in rutas for c in pq.read_schema(r).names)
+    columnas = percentile_cube.CLAVES + [c for c in nombres if c in numericas and c not in percentile_cube.CLAVES]
+    for ruta in rutas:
+        bloque = pq.read_table(ruta)
+        presentes = set(bloque.column_names)
+        for columna in columnas:
+            if columna not in presentes:
+                bloque = bloque.append_column(columna, pa.array(np.zeros(bloque.num_rows, dtype=np.uint8)))
+        yield bloque.select(columnas).replace_schema_metadata(None)
+
+
+def combinar_artefacto(artefacto, rutas, directorio=None):
+    """
+    Une las partes de un artefacto (en el orden del catálogo) y guarda el artefacto final.
+
+    Returns:
+        dict: Información del artefacto construido
+    """
+    if artefacto == "percentiles":
+        return percentile_cube.escribir_cubo(_bloques_cubo(rutas, directorio))
+    partes = pd.concat([pd.read_parquet(r) for r in rutas], ignore_index=True)
+    if artefacto == "similitud":
+        return ann_index.construir_indice(data=partes)
+    return name_search.construir_buscador(entradas=partes)
+
+
+def ruta_artefacto(artefacto):
+    """Archivo o directorio del artefacto final."""
+    if artefacto == "percentiles":
+        return percentile_cube.ruta_cubo()
+    if artefacto == "similitud":
+        return os.path.join(ann_index.ruta_directorio_indice(), ann_index.ARCHIVO_INDICE)
+    return os.path.join(name_search.ruta_directorio_buscador(), name_search.ARCHIVO_BUSCADOR)
+
+
+def cargar_estado(directorio_pipeline=None):
+    """Lee ``estado.json`` (vacío si el pipeline no se ha ejecutado)."""
+    ruta = os.path.join(ruta_directorio_pipeline(directorio_pipeline), ARCHIVO_ESTADO)
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return {"version": VERSION_PIPELINE, "archivos": {}, "artefactos": {}}
+    if estado.get("version") != VERSION_PIPELINE:
+        return {"version": VERSION_PIPELINE, "archivos": {}, "artefactos": {}}
+    return estado
+
+
+def _guardar_estado(estado, directorio_pipeline):
+    os.makedirs(directorio_pipeline, exist_ok=True)
+    ruta = os.path.join(directorio_pipeline, ARCHIVO_ESTADO)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=1)
+    os.replace(f"{ruta}.tmp", ruta)
+
+
+def ejecutar(artefactos=None, procesos=None, forzar=False, directorio=None):
+    """
+    Reconstruye los artefactos cuyas dependencias han cambiado.
+
+    Args:
+        artefactos (list, optional): Artefactos a mantener (por defecto ``ARTEFACTOS``)
+        procesos (int, optional): Procesos del pool (por defecto
+            ``config.PIPELINE_PROCESSES`` o, si es None, uno por CPU)
+        forzar (bool): Reconstruir todas las partes y artefactos
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        dict: ``cambios`` (archivos nuevos, modificados y eliminados) y ``etapas``
+        (lista de etapas con nombre, reconstruidos, reutilizados y segundos)
+    """
+    artefactos = ARTEFACTOS if artefactos is None else list(artefactos)
+    procesos = procesos or config.PIPELINE_PROCESSES or os.cpu_count() or 1
+    directorio_pipeline = ruta_directorio_pipeline()
+    estado = cargar_estado(directorio_pipeline)
+    etapas = []
+
+    # 1. Huellas de los archivos
+    inicio = time.perf_counter()
+    archivos = listar_archivos(directorio)
+    huellas, leidos = huellas_archivos(archivos, estado["archivos"], directorio, procesos)
+    anteriores = estado["archivos"]
+    cambios = {
+        "nuevos": [r for r in huellas if r not in anteriores],
+        "modificados": [r for r in huellas if r in anteriores and huellas[r]["sha256"] != anteriores[r]["sha256"]],
+        "eliminados": [r for r in anteriores if r not in huellas],
+    }
+    etapas.append({"etapa": "huellas", "reconstruidos": leidos, "reutilizados": len(huellas) - leidos,
+                   "segundos": time.perf_counter() - inicio})
+
+    # 2. Manifiesto del catálogo (las partes se leen a través de él)
+    inicio = time.perf_counter()
+    cambiado = forzar or any(cambios.values()) or not os.path.exists(ruta_manifiesto(directorio))
+    if cambiado:
+        manifiesto, tabla_estadisticas = construir_manifiesto(
+            directorio, {r: h["sha256"] for r, h in huellas.items()})
+        guardar_manifiesto(manifiesto, tabla_estadisticas, directorio)
+        guardar_indices_temporada(manifiesto, directorio)
+    etapas.append({"etapa": "catalogo", "reconstruidos": int(cambiado), "reutilizados": int(not cambiado),
+                   "segundos": time.perf_counter() - inicio})
+
+    # 3. Partes por archivo de los artefactos, en paralelo
+    rutas = {a: {r: ruta_parte(directorio_pipeline, a, r, h["sha256"]) for r, h in huellas.items()}
+             for a in artefactos}
+    tareas = [(a, r) for a in artefactos for r in huellas if forzar or not os.path.exists(rutas[a][r])]
+    inicio = time.perf_counter()
+    segundos_partes = {a: 0.0 for a in artefactos}
+    if tareas:
+        with ProcessPoolExecutor(min(procesos, len(tareas))) as pool:
+            futuros = {(a, r): pool.submit(construir_parte, a, archivos[r]["temporada"], archivos[r]["liga"],
+                                           rutas[a][r], directorio)
+                       for a, r in tareas}
+            for (a, _), futuro in futuros.items():
+                segundos_partes[a] += futuro.result()[1]
+    pared = time.perf_counter() - inicio
+    for a in artefactos:
+        hechas = sum(1 for t in tareas if t[0] == a)
+        etapas.append({"etapa": f"partes:{a}", "reconstruidos": hechas, "reutilizados": len(huellas) - hechas,
+                       "segundos": segundos_partes[a], "segundos_pared": pared})
+
+    # 4. Artefactos finales cuyas dependencias han cambiado
+    dependencias = {r: h["sha256"] for r, h in huellas.items()}
+    for a in artefactos:
+        inicio = time.perf_counter()
+        anterior = estado["artefactos"].get(a, {})
+        pendiente = (forzar or anterior.get("archivos") != dependencias
+                     or anterior.get("parametros") != _huella_parametros(a)
+                     or not os.path.exists(ruta_artefacto(a)))
+        if pendiente:
+            info = combinar_artefacto(a, list(rutas[a].values()), directorio)
+            estado["artefactos"][a] = {
+                "archivos": dependencias,
+                "parametros": _huella_parametros(a),
+                "construido": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "filas": info.get("filas", info.get("entradas")),
+            }
+        etapas.append({"etapa": f"artefacto:{a}", "reconstruidos": int(pendiente), "reutilizados": int(not pendiente),
+                       "segundos": time.perf_counter() - inicio})
+
+        # Partes que ya no corresponden a ningún archivo actual
+        vigentes = set(rutas[a].values())
+        carpeta = os.path.join(directorio_pipeline, a)
+        for nombre in os.listdir(carpeta) if os.path.isdir(carpeta) else []:
+            if os.path.join(carpeta, nombre) not in vigentes:
+                os.remove(os.path.join(carpeta, nombre))
+
+    estado["archivos"] = huellas
+    _guardar_estado(estado, directorio_pipeline)
+    return {"cambios": cambios, "etapas": etapas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstruye los artefactos derivados de Ligas_Parquet.")
+    parser.add_argument("--artefactos", nargs="+", choices=ARTEFACTOS, help="Artefactos a mantener (por defecto todos)")
+    parser.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument("--forzar", action="store_true", help="Reconstruir todo aunque no haya cambios")
+    parser.add_argument("--directorio", default=None,
+                        help="Directorio de los archivos Parquet (por defecto config.PARQUET_DIR)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resultado = ejecutar(args.artefactos, args.procesos, args.forzar, args.directorio)
+    cambios = resultado["cambios"]
+    print(f"Archivos: {len(cambios['nuevos'])} nuevos, {len(cambios['modificados'])} modificados, "
+          f"{len(cambios['eliminados'])} eliminados")
+    cambiados = cambios["nuevos"] + cambios["modificados"] + cambios["eliminados"]
+    for relativa in cambiados[:20]:
+        print(f"  {relativa}")
+    if len(cambiados) > 20:
+        print(f"  ... y {len(cambiados) - 20} más")
+    print(f"{'Etapa':<24}{'Reconstruidos':>14}{'Reutilizados':>14}{'Tiempo':>10}")
+    for etapa in resultado["etapas"]:
+        tiempo = f"{etapa['segundos']:.1f} s"
+        if "segundos_pared" in etapa:
+            tiempo += f" ({etapa['segundos_pared']:.1f} s en paralelo)"
+        print(f"{etapa['etapa']:<24}{etapa['reconstruidos']:>14}{etapa['reutilizados']:>14}   {tiempo}")
+    print(f"Total: {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
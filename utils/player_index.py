@@ -0,0 +1,183 @@
+"""Índice de jugadores de un dataset: de nombre o etiqueta única a posición de fila."""
+import numpy as np
+import pandas as pd
+
+# Columnas de la clave estable (además del nombre) y de las etiquetas
+COLUMNAS_CLAVE = ["Team", "Birthday", "Birth country"]
+COLUMNAS_ETIQUETA = ["Team", "season", "league", "Birthday", "Birth country"]
+
+
+class IndiceJugadores:
+    """Posiciones de fila de cada jugador de un dataset."""
+
+    def __init__(self, data, col_nombres):
+        """
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos de los jugadores
+            col_nombres (str): Columna con los nombres de los jugadores
+        """
+        self.col_nombres = col_nombres
+        columnas = [col_nombres] + [c for c in dict.fromkeys(COLUMNAS_CLAVE + COLUMNAS_ETIQUETA)
+                                    if c in data.columns and c != col_nombres]
+        claves = data[columnas].reset_index(drop=True)
+        claves[col_nombres] = claves[col_nombres].astype(str)
+        self._claves = claves
+        self._etiqueta_indice = pd.Index(data.index)
+
+        # Nombre -> primera posición y, solo para los nombres repetidos, todas sus posiciones
+        codigos, nombres = pd.factorize(claves[col_nombres].to_numpy(dtype=object))
+        _, primeras = np.unique(codigos, return_index=True)
+        self._primera = dict(zip(nombres, primeras.tolist()))
+        conteos = np.bincount(codigos, minlength=len(nombres))
+        filas_repetidas = np.flatnonzero(conteos[codigos] > 1)
+        codigos_repetidos = codigos[filas_repetidas]
+        orden = np.argsort(codigos_repetidos, kind="stable")
+        repetidos = np.unique(codigos_repetidos)
+        self._repetidos = dict(zip(nombres[repetidos],
+                                   np.split(filas_repetidas[orden], np.cumsum(conteos[repetidos])[:-1])))
+        self.etiquetas_filas = self._construir_etiquetas()
+        self._por_etiqueta = {etiqueta: posicion for posicion, etiqueta in enumerate(self.etiquetas_filas)}
+        # Clave estable -> primera posición (se recorre al revés para que gane la primera)
+        tuplas = self._tuplas(COLUMNAS_CLAVE)
+        self._por_clave = dict(zip(reversed(tuplas), range(len(tuplas) - 1, -1, -1)))
+
+    def _tuplas(self, columnas, filas=None):
+        tabla = self._claves if filas is None else self._claves.iloc[filas]
+        presentes = [self.col_nombres] + [c for c in columnas if c in tabla.columns]
+        valores = [tabla[c].astype(object).where(tabla[c].notna(), None) for c in presentes]
+        return list(zip(*valores))
+
+    def _construir_etiquetas(self):
+        nombres = self._claves[self.col_nombres]
+        repetidos = nombres.duplicated(keep=False).to_numpy()
+        etiquetas = nombres.to_numpy(dtype=object).copy()
+        if not repetidos.any():
+            return etiquetas.tolist()
+
+        # Detalle de los nombres repetidos: columnas disponibles no nulas, separadas por comas
+        tabla = self._claves[repetidos]
+        detalle = np.full(len(tabla), "", dtype=object)
+        for columna in [c for c in COLUMNAS_ETIQUETA if c in tabla.columns]:
+            parte = tabla[columna].astype(str).where(tabla[columna].notna(), "").to_numpy(dtype=object)
+            detalle = np.where(detalle == "", parte, np.where(parte == "", detalle, detalle + ", " + parte))
+        base = tabla[self.col_nombres].to_numpy(dtype=object)
+        con_detalle = np.where(detalle == "", base, base + " (" + detalle + ")")
+
+        # Si dos filas siguen coincidiendo, se numeran a partir de la segunda
+        numero = pd.Series(con_detalle).groupby(con_detalle, sort=False).cumcount().to_numpy() + 1
+        etiquetas[repetidos] = [e if n == 1 else f"{e} #{n}" for e, n in zip(con_detalle, numero)]
+        return etiquetas.tolist()
+
+    def __len__(self):
+        return len(self._claves)
+
+    def __contains__(self, jugador):
+        try:
+            self.posicion(jugador)
+        except KeyError:
+            return False
+        return True
+
+    def posicion(self, jugador):
+        """
+        Devuelve la posición de fila de un jugador.
+
+        Args:
+            jugador (str | tuple): Etiqueta, nombre (la primera fila si se repite)
+                o clave estable ``(nombre, equipo, fecha, país)``
+
+        Returns:
+            int: Posición de la fila
+
+        Raises:
+            KeyError: Si el jugador no está en los datos
+        """
+        if isinstance(jugador, tuple):
+            return self._por_clave[jugador]
+        if jugador in self._por_etiqueta:
+            return self._por_etiqueta[jugador]
+        return self._primera[str(jugador)]
+
+    def posiciones(self, nombre):
+        """Devuelve todas las posiciones de fila con un nombre (vacío si no existe)."""
+        nombre = str(nombre)
+        if nombre in self._repetidos:
+            return self._repetidos[nombre]
+        if nombre in self._primera:
+            return np.array([self._primera[nombre]])
+        return np.array([], dtype=np.intp)
+
+    def nombre(self, jugador):
+        """Devuelve el nombre de un jugador a partir de su etiqueta, nombre o clave."""
+        return self._claves.at[self.posicion(jugador), self.col_nombres]
+
+    def clave(self, jugador):
+        """Devuelve la clave estable ``(nombre, equipo, fecha, país)`` de un jugador."""
+        return self._tuplas(COLUMNAS_CLAVE, [self.posicion(jugador)])[0]
+
+    def candidatos(self, nombre):
+        """
+        Devuelve los jugadores que comparten un nombre, para elegir entre ellos.
+
+        Returns:
+            DataFrame: Etiqueta y columnas de la clave de cada fila con ese nombre,
+            indexado por posición de fila
+        """
+        posiciones = self.posiciones(nombre)
+        candidatos = self._claves.iloc[posiciones].copy()
+        candidatos.insert(0, "Etiqueta", [self.etiquetas_filas[p] for p in posiciones])
+        return candidatos
+
+    def etiquetas(self, filas=None):
+        """
+        Devuelve las etiquetas para un selector de jugadores.
+
+        Args:
+            filas (Index, optional): Índice de un subconjunto filtrado de los datos
+                (por ejemplo ``data_filtrada.index``). Por defecto, todas las filas.
+
+        Returns:
+            list: Una etiqueta por fila, en el orden de los datos
+        """
+        if filas is None:
+            return list(self.etiquetas_filas)
+        posiciones = self._etiqueta_indice.get_indexer(filas)
+        return [self.etiquetas_filas[p] for p in posiciones if p >= 0]
+
+    def fila(self, data, jugador, columnas):
+        """
+        Devuelve los valores de un jugador sin recorrer los datos.
+
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos con los que se construyó el índice
+            jugador (str | tuple): Etiqueta, nombre o clave del jugador
+            columnas (list): Columnas a devolver
+
+        Returns:
+            Series: Valores del jugador en ``columnas``
+        """
+        posicion = self.posicion(jugador)
+        if isinstance(data, pd.DataFrame):
+            return data.iloc[posicion, data.columns.get_indexer(columnas)]
+        return data[list(columnas)].iloc[posicion]
+
+    def filas(self, data, jugadores, columnas):
+        """
+        Devuelve los valores de varios jugadores con una sola selección de filas.
+
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos con los que se construyó el índice
+            jugadores (list): Etiquetas, nombres o claves de los jugadores
+            columnas (list): Columnas a devolver
+
+        Returns:
+            DataFrame: Una fila por jugador (en el orden pedido) indexada por ``jugadores``
+        """
+        posiciones = [self.posicion(j) for j in jugadores]
+        if isinstance(data, pd.DataFrame):
+            valores = data.iloc[posiciones, data.columns.get_indexer(columnas)]
+        else:
+            valores = data[list(columnas)].iloc[posiciones]
+        valores.index = pd.Index(list(jugadores))
+        return valores
+
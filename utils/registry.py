@@ -0,0 +1,206 @@
+"""
+Registro de datasets compartidos por todas las sesiones del proceso, con una sola
+carga por clave (single-flight).
+
+Guarda lo que devuelve el cargador (un DataFrame o un ``MarcoPerezoso``), no una
+tabla de Arrow, y cada sesión recibe una copia superficial (copy-on-write).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import config
+from utils.lazy_frame import MarcoPerezoso
+
+_lock = threading.Lock()
+_cargadores = {}
+_huellas = {}
+_locks_clave = {}
+_datasets = OrderedDict()
+
+
+class _Entrada:
+    def __init__(self, datos, segundos_carga):
+        self.datos = datos
+        self.cargado = time.time()
+        self.segundos_carga = segundos_carga
+        self.accesos = 0
+        self.huella = None
+        self.derivados = {}
+        self.locks_derivados = {}
+        self.lock_derivados = threading.Lock()
+
+
+def _vista(datos):
+    """Copia superficial de un DataFrame compartido (los marcos perezosos ya copian sus columnas)."""
+    if isinstance(datos, pd.DataFrame):
+        return datos.copy(deep=False)
+    return datos
+
+
+def obtener(clave, cargador=None, calcular_huella=None):
+    """
+    Devuelve el dataset de una clave, cargándolo una sola vez por proceso.
+
+    Args:
+        clave (tuple): Identificador del dataset, por ejemplo ("github", "23-24", "La Liga")
+        cargador (callable, optional): Función sin argumentos que carga los datos.
+            Se recuerda para poder recargar el dataset si se libera de memoria.
+        calcular_huella (callable, optional): Función que recibe los datos
+            cargados y devuelve su huella (ver ``utils.result_cache``). Se
+            recuerda con el cargador y se llama en cada carga.
+
+    Returns:
+        DataFrame | MarcoPerezoso: Vista de los datos compartidos, o None si la
+        clave no tiene cargador o la carga falla
+    """
+    with _lock:
+        if cargador is not None:
+            _cargadores[clave] = cargador
+        if calcular_huella is not None:
+            _huellas[clave] = calcular_huella
+        if clave in _datasets:
+            entrada = _datasets[clave]
+            entrada.accesos += 1
+            _datasets.move_to_end(clave)
+            return _vista(entrada.datos)
+        cargador = _cargadores.get(clave)
+        if cargador is None:
+            return None
+        lock_clave = _locks_clave.setdefault(clave, threading.Lock())
+
+    with lock_clave:
+        # Otra sesión pudo completar la carga mientras esperábamos
+        with _lock:
+            if clave in _datasets:
+                entrada = _datasets[clave]
+                entrada.accesos += 1
+                return _vista(entrada.datos)
+
+        inicio = time.perf_counter()
+        datos = cargador()
+        if datos is None:
+            return None
+        entrada = _Entrada(datos, time.perf_counter() - inicio)
+        entrada.accesos = 1
+        calcular_huella = _huellas.get(clave)
+        if calcular_huella is not None:
+            entrada.huella = calcular_huella(datos)
+
+        with _lock:
+            _datasets[clave] = entrada
+            while len(_datasets) > config.REGISTRY_MAX_DATASETS:
+                _datasets.popitem(last=False)
+    return _vista(datos)
+
+
+def huella(clave):
+    """
+    Devuelve la huella de los datos cargados de una clave.
+
+    Se calcula al cargar el dataset a partir del contenido leído, así que
+    cambia si el dataset se recarga con otro contenido.
+
+    Args:
+        clave (tuple): Clave del dataset en el registro
+
+    Returns:
+        str: Huella, o None si el dataset no está cargado o no tiene huella
+    """
+    with _lock:
+        entrada = _datasets.get(clave)
+    return entrada.huella if entrada is not None else None
+
+
+def derivado(clave, nombre, calcular):
+    """
+    Devuelve un resultado calculado a partir de un dataset, calculándolo una sola vez.
+
+    Los resultados derivados (por ejemplo, la matriz de percentiles) se guardan
+    con el dataset y se liberan con él. Cada nombre tiene su propio lock: un
+    cálculo lento no bloquea los demás derivados del dataset, y ``calcular``
+    puede pedir otros derivados.
+
+    Args:
+        clave (tuple): Clave del dataset en el registro
+        nombre (str): Nombre del resultado derivado
+        calcular (callable): Función que recibe los datos y calcula el resultado
+
+    Returns:
+        object: Resultado derivado, o None si el dataset no está disponible
+    """
+    datos = obtener(clave)
+    if datos is None:
+        return None
+    with _lock:
+        entrada = _datasets.get(clave)
+    if entrada is None:
+        return calcular(datos)
+
+    with entrada.lock_derivados:
+        if nombre in entrada.derivados:
+            return entrada.derivados[nombre]
+        lock_nombre = entrada.locks_derivados.setdefault(nombre, threading.Lock())
+
+    # Single-flight por nombre: solo una sesión calcula cada derivado
+    with lock_nombre:
+        with entrada.lock_derivados:
+            if nombre in entrada.derivados:
+                return entrada.derivados[nombre]
+        resultado = calcular(entrada.datos)
+        with entrada.lock_derivados:
+            entrada.derivados[nombre] = resultado
+        return resultado
+
+
+def liberar(clave):
+    """Libera de memoria un dataset; se recargará con su cargador si se vuelve a pedir."""
+    with _lock:
+        _datasets.pop(clave, None)
+
+
+def memoria_datos(datos):
+    """
+    Calcula la memoria ocupada por un dataset.
+
+    Args:
+        datos (DataFrame | MarcoPerezoso): Datos cargados
+
+    Returns:
+        int: Bytes ocupados (para un marco perezoso, columnas leídas más el
+        archivo Parquet en memoria)
+    """
+    if isinstance(datos, MarcoPerezoso):
+        return datos.memoria_cargada() + datos.bytes_fuente()
+    return int(datos.memory_usage(deep=True).sum())
+
+
+def estadisticas_registro():
+    """
+    Resume los datasets compartidos cargados en el proceso.
+
+    Returns:
+        DataFrame: Una fila por dataset con filas, columnas leídas, memoria,
+        tiempo de carga y número de accesos
+    """
+    with _lock:
+        entradas = list(_datasets.items())
+
+    filas = []
+    for clave, entrada in entradas:
+        datos = entrada.datos
+        if isinstance(datos, MarcoPerezoso):
+            columnas = f"{len(datos.columnas_cargadas())}/{datos.shape[1]}"
+        else:
+            columnas = f"{datos.shape[1]}/{datos.shape[1]}"
+        filas.append({
+            "Dataset": " · ".join(str(parte) for parte in clave),
+            "Filas": len(datos),
+            "Columnas leídas": columnas,
+            "Memoria (MB)": round(memoria_datos(datos) / 1e6, 2),
+            "Carga (s)": round(entrada.segundos_carga, 2),
+            "Accesos": entrada.accesos
+        })
+    return pd.DataFrame(filas, columns=["Dataset", "Filas", "Columnas leídas", "Memoria (MB)", "Carga (s)", "Accesos"])
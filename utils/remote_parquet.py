@@ -0,0 +1,206 @@
+"""
+Lectura de archivos Parquet remotos con peticiones HTTP ``Range``: solo se
+descargan el pie y los fragmentos de columna que se leen.
+"""
+import bisect
+import hashlib
+import io
+import re
+import threading
+
+import config
+from utils.http_client import cliente as cliente_http, descargar_en_paralelo
+
+_PATRON_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class ArchivoRemoto(io.RawIOBase):
+    """Archivo remoto de solo lectura que descarga bajo demanda los rangos de bytes leídos."""
+
+    def __init__(self, url, cliente=None, bytes_pie=None, timeout=None):
+        """
+        Args:
+            url (str): URL del archivo
+            cliente (ClienteHTTP, optional): Cliente HTTP (por defecto el compartido)
+            bytes_pie (int, optional): Bytes finales a descargar al abrir. Por
+                defecto ``config.REMOTE_PARQUET_FOOTER_BYTES``.
+            timeout (float, optional): Tiempo máximo de espera de cada petición
+
+        Raises:
+            requests.exceptions.RequestException: Si el archivo no se puede descargar
+        """
+        super().__init__()
+        self.url = url
+        self._cliente = cliente if cliente is not None else cliente_http()
+        self._timeout = timeout
+        self._inicios = []
+        self._bloques = []
+        self._lock = threading.Lock()
+        self._posicion = 0
+        self.peticiones = 0
+        self.bytes_descargados = 0
+
+        bytes_pie = bytes_pie or config.REMOTE_PARQUET_FOOTER_BYTES
+        response = self._pedir({"Range": f"bytes=-{bytes_pie}"})
+        if response.status_code == 206:
+            inicio, _, total = map(int, _PATRON_CONTENT_RANGE.match(response.headers["Content-Range"]).groups())
+            self.tamano = total
+        else:
+            # El servidor ignoró Range y devolvió el archivo completo
+            inicio = 0
+            self.tamano = len(response.content)
+        self._guardar(inicio, response.content)
+        # Identifica el contenido sin descargarlo: el ETag o, si no lo hay, el pie
+        self.version = response.headers.get("ETag") or hashlib.sha256(
+            str(self.tamano).encode("ascii") + response.content
+        ).hexdigest()
+
+    def _pedir(self, headers):
+        kwargs = {"headers": headers}
+        if self._timeout is not None:
+            kwargs["timeout"] = self._timeout
+        response = self._cliente.get(self.url, **kwargs)
+        response.raise_for_status()
+        with self._lock:
+            self.peticiones += 1
+            self.bytes_descargados += len(response.content)
+        return response
+
+    def _guardar(self, inicio, datos):
+        with self._lock:
+            i = bisect.bisect_left(self._inicios, inicio)
+            self._inicios.insert(i, inicio)
+            self._bloques.insert(i, datos)
+
+    def _buscar(self, inicio, fin):
+        """Devuelve los bytes [inicio, fin) si un bloque descargado los contiene."""
+        with self._lock:
+            i = bisect.bisect_right(self._inicios, inicio) - 1
+            # Los bloques pueden solaparse: se prueba hacia atrás desde el más cercano
+            while i >= 0:
+                desde = self._inicios[i]
+                if desde + len(self._bloques[i]) >= fin:
+                    return self._bloques[i][inicio - desde:fin - desde]
+                i -= 1
+        return None
+
+    def _descargar_rango(self, rango):
+        inicio, fin = rango
+        response = self._pedir({"Range": f"bytes={inicio}-{fin - 1}"})
+        if response.status_code == 206:
+            self._guardar(inicio, response.content)
+        else:
+            self._guardar(0, response.content)
+        return {"tamano": len(response.content)}
+
+    def leer_rango(self, inicio, fin):
+        """
+        Devuelve los bytes [inicio, fin) del archivo, descargándolos si hace falta.
+
+        Args:
+            inicio (int): Primer byte
+            fin (int): Byte siguiente al último
+
+        Returns:
+            bytes: Contenido del rango
+        """
+        fin = min(fin, self.tamano)
+        if inicio >= fin:
+            return b""
+        datos = self._buscar(inicio, fin)
+        if datos is None:
+            self._descargar_rango((inicio, fin))
+            datos = self._buscar(inicio, fin)
+        return datos
+
+    def precargar(self, rangos):
+        """
+        Descarga en paralelo varios rangos de bytes, uniendo los que están cerca.
+
+        Args:
+            rangos (list): Tuplas (inicio, fin) de bytes que se van a leer
+        """
+        pendientes = sorted((inicio, min(fin, self.tamano)) for inicio, fin in rangos
+                            if self._buscar(inicio, min(fin, self.tamano)) is None)
+        agrupados = []
+        for inicio, fin in pendientes:
+            if agrupados and inicio - agrupados[-1][1] <= config.REMOTE_PARQUET_COALESCE_BYTES:
+                agrupados[-1][1] = max(agrupados[-1][1], fin)
+            else:
+                agrupados.append([inicio, fin])
+        if agrupados:
+            _, errores = descargar_en_paralelo([tuple(r) for r in agrupados], self._descargar_rango)
+            if errores:
+                raise next(iter(errores.values()))
+
+    def precargar_columnas(self, metadata, columnas):
+        """
+        Precarga los fragmentos de las columnas indicadas en todos los grupos de filas.
+
+        Args:
+            metadata (FileMetaData): Metadatos del pie del archivo
+            columnas (list): Nombres de las columnas que se van a leer
+        """
+        self.precargar(rangos_columnas(metadata, columnas))
+
+    # --- Interfaz de archivo ---
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._posicion
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._posicion = offset
+        elif whence == io.SEEK_CUR:
+            self._posicion += offset
+        elif whence == io.SEEK_END:
+            self._posicion = self.tamano + offset
+        else:
+            raise ValueError(f"whence no válido: {whence}")
+        return self._posicion
+
+    def readinto(self, buffer):
+        datos = self.leer_rango(self._posicion, self._posicion + len(buffer))
+        buffer[:len(datos)] = datos
+        self._posicion += len(datos)
+        return len(datos)
+
+    def read(self, size=-1):
+        fin = self.tamano if size is None or size < 0 else self._posicion + size
+        datos = self.leer_rango(self._posicion, fin)
+        self._posicion += len(datos)
+        return datos
+
+    def size(self):
+        return self.tamano
+
+
+def rangos_columnas(metadata, columnas):
+    """
+    Calcula los rangos de bytes de los fragmentos de columna de un archivo Parquet.
+
+    Args:
+        metadata (FileMetaData): Metadatos del pie del archivo
+        columnas (list): Nombres de las columnas
+
+    Returns:
+        list: Tuplas (inicio, fin) con un rango por columna y grupo de filas
+    """
+    buscadas = set(columnas)
+    indices = [i for i in range(metadata.num_columns) if metadata.schema.column(i).name in buscadas]
+    rangos = []
+    for rg in range(metadata.num_row_groups):
+        grupo = metadata.row_group(rg)
+        for i in indices:
+            fragmento = grupo.column(i)
+            inicio = fragmento.data_page_offset
+            if fragmento.has_dictionary_page and fragmento.dictionary_page_offset is not None:
+                inicio = min(inicio, fragmento.dictionary_page_offset)
+            rangos.append((inicio, inicio + fragmento.total_compressed_size))
+    return rangos
@@ -0,0 +1,399 @@
+"""
+Informes de scouting individuales y en lote, guardados por versión del dataset.
+
+Uso:
+    python -m utils.reports --temporada 24-25 --liga "La Liga" [--equipo "Real Madrid"]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import config
+from utils.catalog import ruta_repositorio
+from utils.data_processing import identificar_fortalezas_debilidades
+from utils.feature_store import MatrizEstandarizada, features_similitud, obtener_matriz
+from utils.percentiles import MatrizPercentiles
+from utils.player_index import IndiceJugadores, COLUMNAS_CLAVE, COLUMNAS_ETIQUETA
+from utils.similarity import MotorSimilitud
+from utils.tracing import trazar
+
+VERSION_INFORME = 2
+NUM_SIMILARES = 3
+NUM_METRICAS_PERFIL = 8
+
+# Palabras clave de las métricas para el resumen y las recomendaciones
+CLAVES_OFENSIVAS = ['Goal', 'Assist', 'xG', 'Attack', 'Shot', 'Pass']
+CLAVES_DEFENSIVAS = ['Tackle', 'Intercept', 'Block', 'Recover', 'Aerial', 'Defen']
+CLAVES_TECNICAS = ['Dribble', 'Control', 'Touch', 'Technique', 'Carry']
+RECOMENDACIONES = [
+    (['Goal', 'Finish', 'Shot', 'xG'], "Entrenar la definición con ejercicios de tiro a portería desde diferentes ángulos."),
+    (['Assist', 'Key', 'Pass', 'Cross', 'xA'], "Trabajar en la precisión de pases y ejercicios de visión periférica."),
+    (['Tackle', 'Intercept', 'Block', 'Defen'], "Mejorar posicionamiento defensivo y timing en las entradas."),
+    (['Dribble', 'Carry', 'Progress'], "Realizar ejercicios de control y conducción a alta velocidad."),
+]
+
+
+def ruta_directorio_informes(directorio=None):
+    """Devuelve el directorio de informes (``config.REPORTS_DIR``)."""
+    return ruta_repositorio(config.REPORTS_DIR, directorio)
+
+
+def columnas_informe(data, col_nombres, num_cols):
+    """Columnas de los datos que usa un informe (nombre, clave, etiqueta y métricas)."""
+    extra = [c for c in dict.fromkeys(COLUMNAS_CLAVE + COLUMNAS_ETIQUETA)
+             if c in data.columns and c != col_nombres and c not in num_cols]
+    return [col_nombres] + extra + list(num_cols)
+
+
+def version_datos(data, columnas):
+    """
+    Calcula la versión de un dataset: una huella de su contenido.
+
+    Args:
+        data (DataFrame | MarcoPerezoso): Datos de los jugadores
+        columnas (list): Columnas que usan los informes
+
+    Returns:
+        str: Hash hexadecimal de las columnas, sus valores y la versión del informe
+    """
+    huella = hashlib.sha256(json.dumps([VERSION_INFORME, NUM_SIMILARES, list(columnas)]).encode())
+    huella.update(pd.util.hash_pandas_object(data[list(columnas)], index=False).to_numpy().tobytes())
+    return huella.hexdigest()[:16]
+
+
+def categoria_jugador(promedio_percentil):
+    """Devuelve la categoría de ``config.PLAYER_CATEGORIES`` que corresponde a un percentil promedio."""
+    for categoria, umbral in sorted(config.PLAYER_CATEGORIES.items(), key=lambda x: x[1], reverse=True):
+        if promedio_percentil >= umbral:
+            return categoria
+    return "en desarrollo"
+
+
+def _contiene(metricas, claves):
+    texto = ' '.join(metricas)
+    return any(x in texto for x in claves)
+
+
+def construir_informe(jugador, nombre, analisis, similares):
+    """
+    Construye el informe de un jugador a partir de su análisis de percentiles.
+
+    Args:
+        jugador (str): Etiqueta del jugador
+        nombre (str): Nombre del jugador
+        analisis (dict): Resultado de ``identificar_fortalezas_debilidades``
+        similares (DataFrame): Jugadores similares (columnas ``Jugador`` y ``Similitud``)
+
+    Returns:
+        dict: Informe serializable en JSON
+    """
+    fortalezas = analisis['fortalezas']
+    debilidades = analisis['debilidades']
+    percentiles = {m: {'valor': float(p['valor']), 'percentil': float(p['percentil'])}
+                   for m, p in analisis['percentiles'].items()}
+    promedio = float(analisis['promedio_percentil'])
+    categoria = categoria_jugador(promedio)
+
+    resumen = [f"**{jugador}** presenta un perfil **{categoria}** con un percentil promedio de {promedio:.1f}%."]
+    if _contiene(fortalezas, CLAVES_OFENSIVAS):
+        resumen.append("Sus fortalezas principales están en áreas ofensivas y de creación.")
+    if _contiene(fortalezas, CLAVES_DEFENSIVAS):
+        resumen.append("Destaca en aspectos defensivos y de recuperación.")
+    if _contiene(fortalezas, CLAVES_TECNICAS):
+        resumen.append("Muestra una gran capacidad técnica y control del balón.")
+
+    # Métricas más alejadas de la mediana para el radar del perfil
+    perfil = sorted(percentiles, key=lambda m: abs(percentiles[m]['percentil'] - 50), reverse=True)[:NUM_METRICAS_PERFIL]
+
+    recomendaciones = []
+    for d in debilidades[:3]:
+        consejo = next((texto for claves, texto in RECOMENDACIONES if any(x in d for x in claves)), None)
+        recomendaciones.append({'metrica': d, 'consejo': consejo})
+
+    conclusion = [
+        f"{jugador} es un jugador con un perfil {categoria}.",
+        "Sus principales fortalezas están en " + ", ".join(fortalezas[:3]) + "." if fortalezas
+        else "No presenta fortalezas claras en las métricas analizadas.",
+        "Podría mejorar en " + ", ".join(debilidades[:3]) + "." if debilidades
+        else "No presenta debilidades claras en las métricas analizadas.",
+    ]
+    if promedio >= 70:
+        conclusion.append("El jugador muestra un gran potencial y podría ser una excelente incorporación.")
+    elif promedio >= 40:
+        conclusion.append("El jugador presenta un perfil equilibrado con margen de mejora.")
+    else:
+        conclusion.append("El jugador necesita desarrollo en múltiples áreas para alcanzar un nivel competitivo.")
+
+    return {
+        'version': VERSION_INFORME,
+        'jugador': jugador,
+        'nombre': nombre,
+        'categoria': categoria,
+        'promedio_percentil': promedio,
+        'resumen': " ".join(resumen),
+        'fortalezas': fortalezas,
+        'debilidades': debilidades,
+        'percentiles': percentiles,
+        'perfil': perfil,
+        'similares': [{'jugador': j, 'similitud': float(s)}
+                      for j, s in zip(similares['Jugador'], similares['Similitud'])],
+        'recomendaciones': recomendaciones,
+        'conclusion': " ".join(conclusion),
+    }
+
+
+def informe_markdown(informe):
+    """
+    Convierte un informe en texto Markdown para exportarlo.
+
+    Args:
+        informe (dict): Informe de ``construir_informe``
+
+    Returns:
+        str: Informe en Markdown
+    """
+    percentiles = informe['percentiles']
+    linea = lambda m: f"- **{m}**: {percentiles[m]['valor']:.2f} (Percentil {percentiles[m]['percentil']:.1f}%)"
+    partes = [f"# Informe de {informe['jugador']}", "", informe['resumen'], "", "## Fortalezas"]
+    partes += [linea(m) for m in informe['fortalezas']] or ["- No se identificaron fortalezas claras"]
+    partes += ["", "## Áreas de mejora"]
+    partes += [linea(m) for m in informe['debilidades']] or ["- No se identificaron debilidades claras"]
+    partes += ["", "## Jugadores similares"]
+    partes += [f"- **{s['jugador']}** (Similitud: {s['similitud']:.2f})" for s in informe['similares']] or \
+              ["- No se encontraron jugadores con perfiles similares"]
+    if informe['recomendaciones']:
+        partes += ["", "## Recomendaciones"]
+        for r in informe['recomendaciones']:
+            partes.append(f"- Desarrollar **{r['metrica']}** mediante entrenamiento específico.")
+            if r['consejo']:
+                partes.append(f"  - {r['consejo']}")
+    partes += ["", "## Conclusión", informe['conclusion'], ""]
+    return "\n".join(partes)
+
+
+class GeneradorInformes:
+    """Percentiles, índice y motor de similitud compartidos por los informes de un dataset."""
+
+    def __init__(self, data, col_nombres, num_cols=None, matriz=None, indice=None, caracteristicas=None):
+        """
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos de los jugadores
+            col_nombres (str): Columna con los nombres de los jugadores
+            num_cols (list, optional): Métricas del informe (por defecto todas las numéricas)
+            matriz (MatrizPercentiles, optional): Matriz de percentiles de ``data``
+                (ver ``utils.data_loader.obtener_percentiles``)
+            indice (IndiceJugadores, optional): Índice de jugadores de ``data``
+            caracteristicas (MatrizEstandarizada, optional): Métricas de la
+                similitud ya estandarizadas (por defecto se calculan en memoria)
+        """
+        if num_cols is None:
+            num_cols = data.select_dtypes(include='number').columns.tolist()
+        self.data = data
+        self.col_nombres = col_nombres
+        self.num_cols = list(num_cols)
+        self.matriz = MatrizPercentiles(data, self.num_cols) if matriz is None else matriz
+        self.indice = IndiceJugadores(data, col_nombres) if indice is None else indice
+        # La edad, los minutos y demás columnas de contexto no cuentan para la similitud
+        features = features_similitud(data, self.num_cols)
+        if caracteristicas is None or caracteristicas.features != features or len(caracteristicas) != len(data):
+            caracteristicas = obtener_matriz(data, features)
+        self.caracteristicas = caracteristicas
+        self.motor = MotorSimilitud(data[[col_nombres]], features, col_nombres, self.indice, caracteristicas)
+        self._version = None
+
+    @property
+    def version(self):
+        """Versión del dataset (se calcula la primera vez que se pide)."""
+        if self._version is None:
+            self._version = version_datos(self.data, columnas_informe(self.data, self.col_nombres, self.num_cols))
+        return self._version
+
+    def informe(self, jugador):
+        """
+        Genera el informe de un jugador.
+
+        Args:
+            jugador (str): Etiqueta o nombre del jugador
+
+        Returns:
+            dict: Informe de ``construir_informe``
+        """
+        analisis = identificar_fortalezas_debilidades(self.data, jugador, self.col_nombres, self.num_cols, self.matriz)
+        similares = self.motor.similares(jugador, NUM_SIMILARES)
+        return construir_informe(jugador, str(self.indice.nombre(jugador)), analisis, similares)
+
+
+def ruta_informe(directorio, version, clave):
+    """
+    Devuelve la ruta del informe guardado de un jugador.
+
+    Args:
+        directorio (str): Directorio de informes
+        version (str): Versión del dataset (``version_datos``)
+        clave (tuple): Clave estable del jugador (``IndiceJugadores.clave``)
+    """
+    nombre = hashlib.sha1(json.dumps(clave, default=str, ensure_ascii=False).encode()).hexdigest()
+    return os.path.join(directorio, version, f"{nombre}.json")
+
+
+def _leer_informe(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            informe = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return informe if informe.get('version') == VERSION_INFORME else None
+
+
+def _guardar_informe(ruta, informe):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(informe, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+# Generador de cada proceso del pool (se construye una vez en ``_iniciar_proceso``)
+_generador_proceso = None
+
+
+def _iniciar_proceso(data, col_nombres, num_cols, ruta_caracteristicas=None):
+    global _generador_proceso
+    caracteristicas = MatrizEstandarizada.cargar(ruta_caracteristicas) if ruta_caracteristicas else None
+    _generador_proceso = GeneradorInformes(data, col_nombres, num_cols, caracteristicas=caracteristicas)
+
+
+def _generar_lote(jugadores):
+    return [(j, _generador_proceso.informe(j)) for j in jugadores]
+
+
+@trazar()
+def generar_informes(data, jugadores, col_nombres, num_cols=None, generador=None,
+                     procesos=None, directorio=None, progreso=None):
+    """
+    Genera los informes de varios jugadores, reutilizando los ya guardados.
+
+    Los informes pendientes se generan en el proceso actual si son pocos (menos
+    de ``config.REPORTS_MIN_PARALLEL``) o si ``procesos`` es 1, y si no en un
+    pool de procesos que reciben solo las columnas que usan los informes.
+
+    Args:
+        data (DataFrame | MarcoPerezoso): Datos de los jugadores
+        jugadores (list): Etiquetas o nombres de los jugadores
+        col_nombres (str): Columna con los nombres de los jugadores
+        num_cols (list, optional): Métricas del informe (por defecto todas las numéricas)
+        generador (GeneradorInformes, optional): Generador ya construido para ``data``
+        procesos (int, optional): Procesos del pool. Por defecto
+            ``config.REPORTS_PROCESSES`` o, si es None, el número de CPU.
+        directorio (str, optional): Directorio de informes
+        progreso (callable, optional): Función ``progreso(hechos, total)``
+
+    Returns:
+        dict: ``informes`` (jugador -> informe, en el orden pedido), ``generados``,
+        ``reutilizados`` y ``version`` del dataset
+    """
+    if generador is None:
+        generador = GeneradorInformes(data, col_nombres, num_cols)
+    num_cols = generador.num_cols
+    directorio = ruta_directorio_informes(directorio)
+    version = generador.version
+    jugadores = list(dict.fromkeys(jugadores))
+    rutas = {j: ruta_informe(directorio, version, generador.indice.clave(j)) for j in jugadores}
+
+    informes = {}
+    for j in jugadores:
+        informe = _leer_informe(rutas[j])
+        if informe is not None:
+            informe['jugador'] = j
+            informes[j] = informe
+    reutilizados = len(informes)
+    pendientes = [j for j in jugadores if j not in informes]
+
+    def guardar(jugador, informe):
+        _guardar_informe(rutas[jugador], informe)
+        informes[jugador] = informe
+        if progreso is not None:
+            progreso(len(informes), len(jugadores))
+
+    if progreso is not None:
+        progreso(len(informes), len(jugadores))
+    procesos = procesos or config.REPORTS_PROCESSES or os.cpu_count() or 1
+    if procesos <= 1 or len(pendientes) < config.REPORTS_MIN_PARALLEL:
+        for j in pendientes:
+            guardar(j, generador.informe(j))
+    elif pendientes:
+        # Solo las columnas de los informes, en un DataFrame que se envía una vez por proceso
+        datos = data[columnas_informe(data, col_nombres, num_cols)]
+        lotes = [pendientes[i:i + config.REPORTS_BATCH_SIZE]
+                 for i in range(0, len(pendientes), config.REPORTS_BATCH_SIZE)]
+        # "spawn": no se hereda el estado (hilos, locks) del servidor de Streamlit
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(min(procesos, len(lotes)), mp_context=contexto,
+                                 initializer=_iniciar_proceso,
+                                 initargs=(datos, col_nombres, num_cols, generador.caracteristicas.ruta)) as pool:
+            for futuro in as_completed([pool.submit(_generar_lote, lote) for lote in lotes]):
+                for j, informe in futuro.result():
+                    guardar(j, informe)
+
+    return {
+        'informes': {j: informes[j] for j in jugadores},
+        'generados': len(pendientes),
+        'reutilizados': reutilizados,
+        'version': version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera informes de scouting en lote.")
+    parser.add_argument("--temporada", required=True, help="Temporada, por ejemplo 24-25")
+    parser.add_argument("--liga", action="append", help="Liga (se puede repetir; por defecto todas)")
+    parser.add_argument("--equipo", help="Solo los jugadores de un equipo")
+    parser.add_argument("--jugadores", nargs="+", help="Lista corta de jugadores (nombres o etiquetas)")
+    parser.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument("--salida", help="Directorio donde exportar los informes en Markdown")
+    args = parser.parse_args()
+
+    from utils.catalog import cargar_manifiesto, verificar_archivos
+    from utils.dataset import cargar_multiliga
+    from utils.result_cache import huella_dataset
+
+    inicio = time.perf_counter()
+    data = cargar_multiliga([args.temporada], args.liga).reset_index(drop=True)
+    col_nombres = config.DEFAULT_COLUMNS["nombres"]
+    # Métricas estandarizadas guardadas por huella: los procesos del pool las abren sin recalcularlas
+    archivos = [a for a in cargar_manifiesto()["archivos"]
+                if a["temporada"] == args.temporada and (not args.liga or a["liga"] in args.liga)]
+    huella = huella_dataset(("informes", args.temporada, sorted(args.liga or [])), verificar_archivos(archivos))
+    generador = GeneradorInformes(data, col_nombres,
+                                  caracteristicas=obtener_matriz(data, features_similitud(data), huella))
+    if args.jugadores:
+        jugadores = args.jugadores
+    elif args.equipo:
+        jugadores = generador.indice.etiquetas(data.index[data["Team"] == args.equipo])
+    else:
+        jugadores = generador.indice.etiquetas()
+    print(f"{len(data)} jugadores cargados en {time.perf_counter() - inicio:.1f} s; "
+          f"{len(jugadores)} informes pedidos")
+
+    inicio = time.perf_counter()
+    resultado = generar_informes(data, jugadores, col_nombres, generador=generador, procesos=args.procesos)
+    print(f"{resultado['generados']} informes generados y {resultado['reutilizados']} reutilizados "
+          f"en {time.perf_counter() - inicio:.1f} s ({ruta_directorio_informes()}/{resultado['version']})")
+
+    if args.salida:
+        os.makedirs(args.salida, exist_ok=True)
+        for j, informe in resultado['informes'].items():
+            nombre = "".join(c if c.isalnum() or c in " -_" else "_" for c in j).strip()
+            with open(os.path.join(args.salida, f"{nombre}.md"), "w", encoding="utf-8") as f:
+                f.write(informe_markdown(informe))
+        print(f"Informes exportados a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
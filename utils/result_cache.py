@@ -0,0 +1,188 @@
+"""
+Caché LRU de resultados derivados, compartida por el proceso, con clave
+``(huella del dataset, nombre, argumentos)``.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+def huella_dataset(clave, archivos=()):
+    """
+    Calcula la huella de un dataset sin leer sus datos.
+
+    Args:
+        clave (tuple): Clave del dataset en ``utils.registry`` (incluye temporadas,
+            ligas, filtro y opciones de carga)
+        archivos (list): Archivos de origen (``ruta`` y ``sha256`` o versión de su contenido)
+
+    Returns:
+        str: Huella hexadecimal
+    """
+    hashes = sorted(f"{a['ruta']}:{a['sha256']}" for a in archivos)
+    return hashlib.sha1(json.dumps([list(map(str, clave)), hashes]).encode("utf-8")).hexdigest()[:16]
+
+
+def tamano_aproximado(valor):
+    """Estima los bytes que ocupa un resultado (DataFrame, Series, array o contenedores de ellos)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        memoria = valor.memory_usage(deep=True)
+        return int(memoria.sum() if isinstance(memoria, pd.Series) else memoria)
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(k) + tamano_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamano_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def _congelar(valor):
+    """Convierte los argumentos de una llamada en una clave hashable."""
+    if isinstance(valor, (list, tuple, pd.Index)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_congelar(v) for v in valor)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (pd.DataFrame, pd.Series, np.ndarray)):
+        raise TypeError("Los datos no forman parte de la clave: usa la huella del dataset")
+    return valor
+
+
+def _copiar(valor):
+    # Los resultados se comparten entre sesiones: las páginas reciben una copia que pueden modificar
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy()
+    if isinstance(valor, tuple):
+        return tuple(_copiar(v) for v in valor)
+    return valor
+
+
+class CacheResultados:
+    """Caché LRU de resultados con un presupuesto de memoria."""
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Memoria máxima de los resultados guardados
+        """
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._aciertos = 0
+        self._fallos = 0
+        self._expulsiones = 0
+        self._segundos_ahorrados = 0.0
+
+    def obtener(self, clave, calcular):
+        """
+        Devuelve el resultado de una clave, calculándolo si no está guardado.
+
+        Args:
+            clave (tuple): Clave hashable del resultado
+            calcular (callable): Función sin argumentos que calcula el resultado
+
+        Returns:
+            object: Resultado (los DataFrame y Series, copiados)
+        """
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                valor, _, segundos = self._entradas[clave]
+                self._aciertos += 1
+                self._segundos_ahorrados += segundos
+                return _copiar(valor)
+
+        # Se calcula fuera del lock: dos sesiones pueden calcular a la vez la misma clave
+        inicio = time.perf_counter()
+        valor = calcular()
+        segundos = time.perf_counter() - inicio
+        tamano = tamano_aproximado(valor)
+
+        with self._lock:
+            self._fallos += 1
+            if tamano <= self.max_bytes and clave not in self._entradas:
+                self._entradas[clave] = (valor, tamano, segundos)
+                self._bytes += tamano
+                while self._bytes > self.max_bytes:
+                    _, (_, tamano_expulsado, _) = self._entradas.popitem(last=False)
+                    self._bytes -= tamano_expulsado
+                    self._expulsiones += 1
+        return _copiar(valor)
+
+    def limpiar(self):
+        """Elimina todos los resultados (las estadísticas se conservan)."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """
+        Resume el uso de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos, expulsiones, resultados
+            guardados, memoria usada y máxima, y segundos de cálculo ahorrados
+        """
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "tasa_aciertos": round(self._aciertos / consultas, 3) if consultas else None,
+                "expulsiones": self._expulsiones,
+                "resultados": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "segundos_ahorrados": round(self._segundos_ahorrados, 3),
+            }
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def cache():
+    """Devuelve la caché de resultados del proceso (``config.RESULT_CACHE_MAX_BYTES``)."""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheResultados(config.RESULT_CACHE_MAX_BYTES)
+        return _cache
+
+
+def memoizar(huella, nombre, argumentos, calcular):
+    """
+    Devuelve un resultado derivado de un dataset, calculándolo una vez por huella y argumentos.
+
+    Args:
+        huella (str): Huella del dataset (``huella_dataset``). Si es None no se
+            guarda nada y se calcula siempre.
+        nombre (str): Nombre del cálculo (por ejemplo ``"similares"``)
+        argumentos (tuple): Argumentos del cálculo, sin los datos (listas y
+            diccionarios se convierten en tuplas)
+        calcular (callable): Función sin argumentos que calcula el resultado
+
+    Returns:
+        object: Resultado del cálculo
+    """
+    if huella is None:
+        return calcular()
+    return cache().obtener((huella, nombre, _congelar(argumentos)), calcular)
+
+
+def estadisticas():
+    """Estadísticas de la caché de resultados del proceso (ver ``CacheResultados.estadisticas``)."""
+    return cache().estadisticas()
@@ -0,0 +1,345 @@
+"""
+Servicio de consultas de scouting sin Streamlit (búsqueda, perfil, percentiles,
+comparación y similares), con respuestas serializables a JSON.
+"""
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+from utils import registry
+from utils.catalog import cargar_manifiesto, estructura_desde_manifiesto, verificar_archivos
+from utils.data_processing import (calcular_percentiles, comparar_jugadores_datos,
+                                   encontrar_jugadores_similares, identificar_fortalezas_debilidades)
+from utils.dataset import cargar_multiliga
+from utils.feature_store import obtener_matriz
+from utils.name_search import BuscadorNombres, normalizar_nombre
+from utils.percentiles import MatrizPercentiles
+from utils.player_index import IndiceJugadores
+from utils.reports import categoria_jugador
+from utils.result_cache import huella_dataset, memoizar
+from utils.tracing import trazar
+
+
+def a_json(valor):
+    """
+    Convierte un resultado en tipos de Python serializables a JSON.
+
+    Los DataFrame pasan a listas de registros, las Series a diccionarios, los
+    escalares de NumPy a números de Python y los nulos a None.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return [a_json(r) for r in valor.to_dict("records")]
+    if isinstance(valor, pd.Series):
+        return {str(k): a_json(v) for k, v in valor.items()}
+    if isinstance(valor, dict):
+        return {str(k): a_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [a_json(v) for v in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, (pd.Timestamp, datetime.date)):
+        return valor.isoformat()
+    if valor is None or valor is pd.NA or valor is pd.NaT:
+        return None
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None
+    return valor
+
+
+class DatasetScouting:
+    """Consultas sobre un dataset de varias ligas y temporadas."""
+
+    def __init__(self, clave, archivos, cargador, col_nombres, directorio=None):
+        """
+        Args:
+            clave (tuple): Clave del dataset en ``utils.registry``
+            archivos (list): Entradas del manifiesto de los archivos de origen
+            cargador (callable): Función sin argumentos que carga los datos
+            col_nombres (str): Columna con los nombres de los jugadores
+            directorio (str, optional): Directorio de los archivos Parquet
+        """
+        self.clave = clave
+        self.col_nombres = col_nombres
+        self._cargador = cargador
+        self._calcular_huella = lambda datos: huella_dataset(clave, verificar_archivos(archivos, directorio))
+
+    @property
+    def datos(self):
+        """Datos del dataset (una vista de los compartidos), cargados la primera vez que se piden."""
+        datos = registry.obtener(self.clave, self._cargador, self._calcular_huella)
+        if datos is None:
+            raise LookupError(f"No se pudo cargar el dataset {self.clave}")
+        return datos
+
+    @property
+    def huella(self):
+        """Huella de los datos cargados (ver ``utils.result_cache``), calculada por el registro al cargarlos."""
+        # La huella se calcula al cargar los datos: se cargan si hace falta
+        self.datos
+        return registry.huella(self.clave)
+
+    def _derivado(self, nombre, calcular):
+        # El cargador se registra antes: el dataset pudo liberarse del registro
+        registry.obtener(self.clave, self._cargador, self._calcular_huella)
+        return registry.derivado(self.clave, nombre, calcular)
+
+    @property
+    def indice(self):
+        """Índice de jugadores (ver ``utils.player_index``), compartido con el dataset."""
+        return self._derivado(f"jugadores:{self.col_nombres}", lambda datos: IndiceJugadores(datos, self.col_nombres))
+
+    @property
+    def matriz(self):
+        """Matriz de percentiles (ver ``utils.percentiles``), compartida con el dataset."""
+        return self._derivado("percentiles", MatrizPercentiles)
+
+    def _nombres_normalizados(self, datos):
+        return pd.Series([normalizar_nombre(n) for n in datos[self.col_nombres].astype(str)], index=datos.index)
+
+    def _metricas(self, metricas, por_defecto):
+        """Comprueba las métricas pedidas o usa las de ``config.DEFAULT_COLUMNS`` disponibles."""
+        numericas = set(self.datos.select_dtypes(include="number").columns)
+        if not metricas:
+            metricas = [m for m in config.DEFAULT_COLUMNS[por_defecto] if m in numericas]
+        desconocidas = [m for m in metricas if m not in numericas]
+        if desconocidas:
+            raise ValueError(f"Métricas no numéricas o inexistentes: {', '.join(desconocidas)}")
+        return list(metricas)
+
+    def _etiqueta(self, jugador):
+        """Etiqueta única de un jugador (acepta también su nombre). KeyError si no existe."""
+        indice = self.indice
+        return indice.etiquetas_filas[indice.posicion(jugador)]
+
+    def resumen(self):
+        """Clave, huella, filas y columnas del dataset."""
+        datos = self.datos
+        return {
+            "clave": list(self.clave),
+            "huella": self.huella,
+            "filas": len(datos),
+            "columnas": len(datos.columns),
+        }
+
+    @trazar("servicio:buscar")
+    def buscar(self, texto, limite=None):
+        """
+        Busca jugadores del dataset cuyo nombre contiene un texto (sin distinguir tildes ni mayúsculas).
+
+        Args:
+            texto (str): Nombre o parte del nombre
+            limite (int, optional): Resultados máximos (por defecto ``config.NAME_SEARCH_MAX_RESULTS``)
+
+        Returns:
+            list: Etiqueta y columnas de identificación de cada jugador, de más a menos minutos
+        """
+        limite = config.NAME_SEARCH_MAX_RESULTS if limite is None else limite
+        if limite < 1:
+            raise ValueError("limite debe ser al menos 1")
+        consulta = normalizar_nombre(texto)
+        if not consulta:
+            raise ValueError("La búsqueda está vacía")
+
+        def calcular():
+            datos = self.datos
+            nombres = self._derivado(f"nombres_normalizados:{self.col_nombres}", self._nombres_normalizados)
+            encontrados = datos.index[nombres.str.contains(consulta, regex=False).to_numpy()]
+            columnas = [c for c in dict.fromkeys(config.DEFAULT_COLUMNS["info"] + ["season", "league", "Minutes played"])
+                        if c in datos.columns]
+            resultado = datos.loc[encontrados, columnas]
+            if "Minutes played" in resultado.columns:
+                resultado = resultado.sort_values("Minutes played", ascending=False, kind="stable")
+            resultado = resultado.head(limite)
+            resultado.insert(0, "Jugador", self.indice.etiquetas(resultado.index))
+            return resultado.reset_index(drop=True)
+
+        return a_json(memoizar(self.huella, "buscar", (consulta, limite), calcular))
+
+    @trazar("servicio:perfil")
+    def perfil(self, jugador):
+        """
+        Perfil de un jugador: datos de identificación, fortalezas, debilidades y categoría.
+
+        Args:
+            jugador (str): Etiqueta o nombre del jugador
+
+        Returns:
+            dict: Jugador, datos, fortalezas y debilidades (percentil >= 80 / <= 20 en
+            todas las métricas numéricas), percentil promedio y categoría
+        """
+        etiqueta = self._etiqueta(jugador)
+
+        def calcular():
+            datos = self.datos
+            num_cols = datos.select_dtypes(include="number").columns.tolist()
+            analisis = identificar_fortalezas_debilidades(datos, etiqueta, self.col_nombres, num_cols, self.matriz)
+            columnas = [c for c in dict.fromkeys(config.DEFAULT_COLUMNS["info"] + ["season", "league", "Minutes played"])
+                        if c in datos.columns]
+            return {
+                "jugador": etiqueta,
+                "datos": self.indice.fila(datos, etiqueta, columnas),
+                "fortalezas": analisis["fortalezas"],
+                "debilidades": analisis["debilidades"],
+                "promedio_percentil": analisis["promedio_percentil"],
+                "categoria": categoria_jugador(analisis["promedio_percentil"]),
+            }
+
+        return a_json(memoizar(self.huella, "perfil", (etiqueta,), calcular))
+
+    @trazar("servicio:percentiles")
+    def percentiles(self, jugador, metricas=None):
+        """
+        Percentiles de un jugador frente a todos los jugadores del dataset.
+
+        Args:
+            jugador (str): Etiqueta o nombre del jugador
+            metricas (list, optional): Métricas (por defecto las de ``percentiles_general``)
+
+        Returns:
+            list: Métrica, valor y percentil de cada métrica
+        """
+        etiqueta = self._etiqueta(jugador)
+        metricas = self._metricas(metricas, "percentiles_general")
+        resultado = memoizar(
+            self.huella, "percentiles", (etiqueta, metricas, self.col_nombres),
+            lambda: calcular_percentiles(self.datos, etiqueta, metricas, self.col_nombres, self.matriz)
+        )
+        return a_json(resultado.drop(columns=["Color"]))
+
+    @trazar("servicio:comparar")
+    def comparar(self, jugador1, jugador2, metricas=None):
+        """
+        Compara dos jugadores.
+
+        Args:
+            jugador1 (str): Etiqueta o nombre del primer jugador
+            jugador2 (str): Etiqueta o nombre del segundo jugador
+            metricas (list, optional): Métricas (por defecto las de ``percentiles_general``)
+
+        Returns:
+            list: Métrica, valor de cada jugador, diferencia y diferencia porcentual
+        """
+        etiqueta1, etiqueta2 = self._etiqueta(jugador1), self._etiqueta(jugador2)
+        if etiqueta1 == etiqueta2:
+            raise ValueError("Los dos jugadores son el mismo")
+        metricas = self._metricas(metricas, "percentiles_general")
+        resultado = memoizar(
+            self.huella, "comparacion", (etiqueta1, etiqueta2, metricas, self.col_nombres),
+            lambda: comparar_jugadores_datos(self.datos, etiqueta1, etiqueta2, metricas, self.col_nombres, self.indice)
+        )
+        return a_json(resultado)
+
+    @trazar("servicio:similares")
+    def similares(self, jugador, features=None, n=10):
+        """
+        Jugadores más similares a uno dado en el dataset.
+
+        Args:
+            jugador (str): Etiqueta o nombre del jugador
+            features (list, optional): Métricas de la similitud (por defecto las de ``percentiles_general``)
+            n (int): Número de jugadores similares
+
+        Returns:
+            list: Jugador y similitud de los ``n`` más similares
+        """
+        etiqueta = self._etiqueta(jugador)
+        features = self._metricas(features, "percentiles_general")
+        if n < 1:
+            raise ValueError("n debe ser al menos 1")
+
+        def calcular():
+            datos = self.datos
+            return encontrar_jugadores_similares(
+                datos[[self.col_nombres]], etiqueta, features, n, self.col_nombres, self.indice,
+                obtener_matriz(datos, features, self.huella)
+            )
+
+        return a_json(memoizar(self.huella, "similares", (etiqueta, features, n, self.col_nombres), calcular))
+
+
+class ServicioScouting:
+    """Punto de entrada del servicio: datasets por alcance y búsqueda en todo el corpus."""
+
+    def __init__(self, directorio=None, col_nombres=None):
+        """
+        Args:
+            directorio (str, optional): Directorio de los archivos Parquet
+            col_nombres (str, optional): Columna con los nombres de los jugadores
+                (por defecto ``config.DEFAULT_COLUMNS["nombres"]``)
+        """
+        self.directorio = directorio
+        self.col_nombres = col_nombres or config.DEFAULT_COLUMNS["nombres"]
+        self.manifiesto = cargar_manifiesto(directorio)
+        self.estructura = estructura_desde_manifiesto(self.manifiesto)
+        self._buscador = None
+        self._lock = threading.Lock()
+
+    def temporadas(self):
+        """Temporadas disponibles, de la más reciente a la más antigua."""
+        return [t["nombre"] for t in self.estructura["temporadas"]]
+
+    def ligas(self, temporada):
+        """Ligas disponibles en una temporada."""
+        return [liga["nombre"] for liga in self.estructura["ligas"].get(temporada, [])]
+
+    def dataset(self, temporadas=None, ligas=None, min_minutos=0):
+        """
+        Devuelve un dataset de varias ligas y temporadas (se carga en la primera consulta).
+
+        Args:
+            temporadas (list, optional): Temporadas (por defecto la más reciente)
+            ligas (list, optional): Ligas (vacío o None = todas)
+            min_minutos (int): Minutos jugados mínimos
+
+        Returns:
+            DatasetScouting: Dataset con las consultas
+
+        Raises:
+            ValueError: Si alguna temporada o liga no existe
+        """
+        temporadas = list(temporadas) if temporadas else self.temporadas()[:1]
+        ligas = sorted(ligas) if ligas else []
+        desconocidas = [t for t in temporadas if t not in self.estructura["ligas"]]
+        if desconocidas:
+            raise ValueError(f"Temporadas desconocidas: {', '.join(desconocidas)}")
+        archivos = [a for a in self.manifiesto["archivos"]
+                    if a["temporada"] in temporadas and (not ligas or a["liga"] in ligas)]
+        if not archivos:
+            raise ValueError("Ninguna de las ligas pedidas existe en esas temporadas")
+
+        # Misma clave que la carga de varias ligas de la aplicación
+        clave = ("multiliga", ", ".join(temporadas), ", ".join(ligas) or "todas", f">= {min_minutos} min")
+        filtro = [("Minutes played", ">=", min_minutos)] if min_minutos > 0 else None
+        cargador = lambda: cargar_multiliga(temporadas=temporadas, ligas=ligas or None, filtro=filtro,
+                                            directorio=self.directorio)
+        return DatasetScouting(clave, archivos, cargador, self.col_nombres, self.directorio)
+
+    @trazar("servicio:buscar_todas")
+    def buscar_todas(self, texto, limite=None):
+        """
+        Busca un nombre en todas las ligas y temporadas con el buscador de ``utils.name_search``.
+
+        Args:
+            texto (str): Nombre o parte del nombre (admite erratas)
+            limite (int, optional): Resultados máximos
+
+        Returns:
+            list: Jugador, equipo, liga, temporada y coincidencia de cada resultado
+
+        Raises:
+            FileNotFoundError: Si el buscador no se ha construido
+            ValueError: Si ``limite`` es menor que 1
+        """
+        if limite is not None and limite < 1:
+            raise ValueError("limite debe ser al menos 1")
+        with self._lock:
+            if self._buscador is None:
+                self._buscador = BuscadorNombres.cargar()
+        return a_json(self._buscador.buscar(texto, limite))
+
+    def datasets_cargados(self):
+        """Datasets del registro del proceso (ver ``utils.registry.estadisticas_registro``)."""
+        return a_json(registry.estadisticas_registro())
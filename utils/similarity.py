@@ -0,0 +1,157 @@
+"""
+Motor de similitud coseno entre jugadores sobre métricas estandarizadas (un
+valor nulo cuenta como la media de la métrica).
+"""
+import numpy as np
+import pandas as pd
+
+from utils.player_index import IndiceJugadores
+
+
+class MotorSimilitud:
+    """Matriz de características normalizada para consultar jugadores similares."""
+
+    def __init__(self, data, features, col_nombres, indice=None, estandarizada=None):
+        """
+        Args:
+            data (DataFrame | MarcoPerezoso): Datos de los jugadores
+            features (list): Características para calcular la similitud
+            col_nombres (str): Columna con los nombres de los jugadores
+            indice (IndiceJugadores, optional): Índice de jugadores de los datos
+                completos (si ``data`` es una proyección de columnas)
+            estandarizada (MatrizEstandarizada, optional): Características ya
+                estandarizadas de ``data`` (ver ``utils.feature_store``); con
+                ella ``data`` solo necesita la columna de nombres
+
+        Raises:
+            ValueError: Si ``estandarizada`` es de otras características
+        """
+        self.features = list(features)
+        self.indice = IndiceJugadores(data, col_nombres) if indice is None else indice
+        self.nombres = np.asarray(data[col_nombres].astype(str))
+        self.etiquetas = np.asarray(self.indice.etiquetas_filas, dtype=object)
+        if estandarizada is None:
+            self.matriz = normalizar_matriz(data[self.features].to_numpy(dtype=np.float64))
+        elif estandarizada.features != self.features:
+            raise ValueError("La matriz estandarizada no corresponde a las características pedidas")
+        else:
+            self.matriz = estandarizada.vectores()
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def vector(self, jugador):
+        """Devuelve el vector normalizado de un jugador (KeyError si no existe)."""
+        return self.matriz[self.indice.posicion(jugador)]
+
+    def puntuaciones(self, jugadores):
+        """
+        Calcula la similitud coseno de todos los jugadores con uno o varios de referencia.
+
+        Args:
+            jugadores (list): Nombres de los jugadores de referencia
+
+        Returns:
+            ndarray: Matriz (jugadores de referencia × jugadores) de similitudes
+        """
+        consultas = np.vstack([self.vector(j) for j in jugadores])
+        return consultas @ self.matriz.T
+
+    def similares(self, jugadores, k):
+        """
+        Devuelve los k jugadores más similares a cada jugador de referencia.
+
+        Args:
+            jugadores (str | list): Etiqueta o etiquetas de los jugadores de referencia
+            k (int): Número de jugadores similares por referencia
+
+        Returns:
+            DataFrame: Columnas ``Jugador`` (etiqueta) y ``Similitud`` (y
+            ``Referencia`` si se consultan varios jugadores), de mayor a menor similitud
+        """
+        varios = not isinstance(jugadores, str)
+        jugadores = list(jugadores) if varios else [jugadores]
+        puntuaciones = self.puntuaciones(jugadores)
+
+        resultados = []
+        for jugador, fila in zip(jugadores, puntuaciones):
+            # El jugador de referencia no cuenta como similar a sí mismo
+            fila = np.where(self.nombres == str(self.indice.nombre(jugador)), -np.inf, fila)
+            seleccion = top_k(fila, k)
+            resultados.append(pd.DataFrame({
+                "Referencia": jugador,
+                "Jugador": self.etiquetas[seleccion],
+                "Similitud": fila[seleccion].astype(float)
+            }))
+
+        resultado = pd.concat(resultados, ignore_index=True)
+        return resultado if varios else resultado.drop(columns="Referencia")
+
+
+def parametros_normalizacion(valores):
+    """
+    Calcula la media y la desviación de cada característica, ignorando los nulos.
+
+    Args:
+        valores (ndarray): Matriz (jugadores × características)
+
+    Returns:
+        tuple: (media, desviacion); las métricas sin datos o constantes tienen
+        media 0 y desviación 1
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    if len(valores) == 0:
+        return np.zeros(valores.shape[1]), np.ones(valores.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.nanmean(valores, axis=0)
+        desviacion = np.nanstd(valores, axis=0)
+    desviacion = np.where(np.isfinite(desviacion) & (desviacion > 0), desviacion, 1.0)
+    media = np.where(np.isfinite(media), media, 0.0)
+    return media, desviacion
+
+
+def normalizar_matriz(valores, media=None, desviacion=None):
+    """
+    Estandariza las columnas y normaliza las filas de una matriz de características.
+
+    Args:
+        valores (ndarray): Matriz (jugadores × características), con posibles NaN
+        media (ndarray, optional): Media de cada característica. Por defecto se
+            calcula sobre ``valores`` (ver ``parametros_normalizacion``).
+        desviacion (ndarray, optional): Desviación de cada característica
+
+    Returns:
+        ndarray: Matriz float32 con filas de norma 1 (o 0 si la fila no tiene datos)
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    if media is None or desviacion is None:
+        media, desviacion = parametros_normalizacion(valores)
+
+    z = (valores - media) / desviacion
+    z[~np.isfinite(z)] = 0.0
+
+    normas = np.linalg.norm(z, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return (z / normas).astype(np.float32)
+
+
+def top_k(puntuaciones, k):
+    """
+    Devuelve las posiciones de los k valores más altos, ordenadas de mayor a menor.
+
+    Usa una selección parcial (O(n)) y solo ordena los k elegidos. Los valores
+    -inf (excluidos) no se devuelven.
+
+    Args:
+        puntuaciones (ndarray): Puntuación de cada jugador
+        k (int): Número de posiciones a devolver
+
+    Returns:
+        ndarray: Posiciones de los k mejores
+    """
+    validas = np.count_nonzero(puntuaciones > -np.inf)
+    k = min(k, validas)
+    if k <= 0:
+        return np.array([], dtype=int)
+    candidatos = np.argpartition(-puntuaciones, k - 1)[:k]
+    return candidatos[np.argsort(-puntuaciones[candidatos], kind="stable")]
@@ -0,0 +1,432 @@
+"""
+Escaneo de similitud de una lista de jugadores objetivo contra todo el corpus,
+en un pool de procesos y reanudable por archivo.
+
+Uso:
+    python -m utils.similarity_scan --objetivos objetivos.csv --temporadas 2024 24-25 --k 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import config
+from utils.ann_index import features_grupo
+from utils.catalog import cargar_manifiesto, clave_temporada, ruta_repositorio
+from utils.dataset import COLUMNA_LIGA, COLUMNA_TEMPORADA, cargar_multiliga, esquema_unificado
+from utils.name_search import normalizar_nombre
+from utils.similarity import normalizar_matriz, top_k
+
+VERSION_ESCANEO = 1
+COLUMNA_ID = "Wyscout id"
+COLUMNA_MINUTOS = "Minutes played"
+COLUMNAS_IDENTIDAD = [COLUMNA_ID, "Player", "Team", COLUMNA_MINUTOS, COLUMNA_LIGA, COLUMNA_TEMPORADA]
+COLUMNAS_OBJETIVOS = [COLUMNA_ID, "Team", COLUMNA_LIGA, COLUMNA_TEMPORADA]
+
+
+def ruta_directorio_escaneos(directorio=None):
+    """Devuelve el directorio de las partes (``config.SIMILARITY_SCAN_DIR``)."""
+    return ruta_repositorio(config.SIMILARITY_SCAN_DIR, directorio)
+
+
+def leer_objetivos(ruta):
+    """
+    Lee la lista de jugadores objetivo.
+
+    Args:
+        ruta (str): CSV con la columna ``Player`` (u otra primera columna con los
+            nombres) y columnas opcionales para desambiguar, o archivo de texto
+            con un nombre por línea
+
+    Returns:
+        DataFrame: Columna ``Player`` y las columnas de ``COLUMNAS_OBJETIVOS`` presentes
+    """
+    if ruta.lower().endswith(".csv"):
+        objetivos = pd.read_csv(ruta, dtype=str)
+        if "Player" not in objetivos.columns:
+            objetivos = objetivos.rename(columns={objetivos.columns[0]: "Player"})
+        objetivos = objetivos[["Player"] + [c for c in COLUMNAS_OBJETIVOS if c in objetivos.columns]]
+    else:
+        with open(ruta, encoding="utf-8") as f:
+            objetivos = pd.DataFrame({"Player": [linea.strip() for linea in f]})
+    objetivos = objetivos[objetivos["Player"].fillna("").str.strip() != ""]
+    if objetivos.empty:
+        raise ValueError(f"La lista de objetivos está vacía: {ruta}")
+    return objetivos.reset_index(drop=True)
+
+
+def archivos_ambito(manifiesto, temporadas=None, ligas=None):
+    """
+    Entradas del manifiesto de un ámbito de temporadas y ligas, en el orden del catálogo.
+
+    Args:
+        manifiesto (dict): Manifiesto del catálogo
+        temporadas (list, optional): Temporadas (por defecto, la más reciente)
+        ligas (list, optional): Ligas (todas si es None)
+
+    Returns:
+        list: Entradas de los archivos del ámbito
+
+    Raises:
+        ValueError: Si una temporada no existe o el ámbito no tiene archivos
+    """
+    disponibles = sorted(manifiesto["temporadas"], key=clave_temporada)
+    temporadas = [disponibles[-1]] if not temporadas else list(temporadas)
+    desconocidas = [t for t in temporadas if t not in disponibles]
+    if desconocidas:
+        raise ValueError(f"Temporadas desconocidas: {', '.join(desconocidas)}")
+    archivos = [a for a in manifiesto["archivos"]
+                if a["temporada"] in temporadas and (not ligas or a["liga"] in ligas)]
+    if not archivos:
+        raise ValueError("No hay archivos en el ámbito indicado")
+    return archivos
+
+
+def _leer_archivo(temporada, liga, features, min_minutos, directorio):
+    data = cargar_multiliga([temporada], [liga], columnas=COLUMNAS_IDENTIDAD + features, directorio=directorio,
+                            filtro=[(COLUMNA_MINUTOS, ">=", min_minutos)] if min_minutos else None)
+    # Una métrica vacía en un archivo puede llegar como texto en el esquema común
+    valores = data[features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    return data[COLUMNAS_IDENTIDAD], valores
+
+
+def momentos_archivo(temporada, liga, features, min_minutos, nombres, estadisticas=True, directorio=None):
+    """
+    Etapa 1 de un archivo: momentos de las métricas y filas candidatas a objetivo.
+
+    Args:
+        temporada (str): Temporada del archivo
+        liga (str): Liga del archivo
+        features (list): Métricas de la similitud
+        min_minutos (int): Minutos mínimos de las filas
+        nombres (set): Nombres normalizados de los objetivos
+        estadisticas (bool): Si el archivo forma parte del ámbito del escaneo
+            (si no, solo se buscan objetivos en él)
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        tuple: (filas, suma y suma de cuadrados por métrica, o None si
+        ``estadisticas`` es False; DataFrame de candidatos con sus métricas)
+    """
+    identidad, valores = _leer_archivo(temporada, liga, features, min_minutos, directorio)
+    momentos = None
+    if estadisticas:
+        validos = np.isfinite(valores)
+        ceros = np.where(validos, valores, 0.0)
+        momentos = (validos.sum(axis=0), ceros.sum(axis=0), (ceros ** 2).sum(axis=0))
+
+    coincide = identidad["Player"].astype(str).map(normalizar_nombre).isin(nombres).to_numpy()
+    candidatos = identidad[coincide].reset_index(drop=True)
+    candidatos[features] = valores[coincide]
+    return momentos, candidatos
+
+
+def combinar_momentos(momentos, n_features):
+    """
+    Media y desviación (poblacional) del ámbito a partir de los momentos por archivo.
+
+    Como ``utils.similarity.parametros_normalizacion``, las métricas sin datos o
+    constantes tienen media 0 y desviación 1.
+    """
+    n = np.zeros(n_features)
+    suma = np.zeros(n_features)
+    cuadrados = np.zeros(n_features)
+    for filas, s, c in momentos:
+        n += filas
+        suma += s
+        cuadrados += c
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = suma / n
+        varianza = cuadrados / n - media ** 2
+    # Con sumas de cuadrados, una métrica constante deja un residuo de redondeo en lugar de 0
+    varianza = np.where(varianza > 1e-12 * np.maximum(media ** 2, 1.0), varianza, 0.0)
+    desviacion = np.sqrt(varianza)
+    desviacion = np.where(np.isfinite(desviacion) & (desviacion > 0), desviacion, 1.0)
+    media = np.where(np.isfinite(media), media, 0.0)
+    return media, desviacion
+
+
+def resolver_objetivos(objetivos, candidatos):
+    """
+    Asigna a cada objetivo de la lista una fila del corpus.
+
+    Args:
+        objetivos (DataFrame): Lista de objetivos (``leer_objetivos``)
+        candidatos (DataFrame): Filas cuyo nombre coincide con algún objetivo
+
+    Returns:
+        tuple: (DataFrame de objetivos resueltos con su fila y la columna
+        ``objetivo``, lista de avisos para los no encontrados y los ambiguos)
+    """
+    claves = candidatos["Player"].astype(str).map(normalizar_nombre)
+    resueltos, avisos = [], []
+    for i, objetivo in objetivos.iterrows():
+        filas = candidatos[claves == normalizar_nombre(objetivo["Player"])]
+        for columna in COLUMNAS_OBJETIVOS:
+            valor = objetivo.get(columna)
+            if isinstance(valor, str) and valor.strip():
+                filas = filas[filas[columna].astype(str).map(normalizar_nombre) == normalizar_nombre(valor)]
+        if filas.empty:
+            avisos.append(f"No encontrado: {objetivo['Player']}")
+            continue
+        if filas[COLUMNA_ID].nunique(dropna=False) > 1:
+            avisos.append(f"Ambiguo: {objetivo['Player']} ({filas[COLUMNA_ID].nunique(dropna=False)} jugadores); "
+                          f"se usa el de más minutos")
+        fila = filas.sort_values(COLUMNA_MINUTOS, ascending=False, kind="stable").iloc[0].copy()
+        fila["objetivo"] = i
+        resueltos.append(fila)
+    return pd.DataFrame(resueltos).reset_index(drop=True), avisos
+
+
+def similares_archivo(temporada, liga, features, min_minutos, media, desviacion, vectores, excluidos, k, ruta,
+                      directorio=None):
+    """
+    Etapa 2 de un archivo: los k jugadores más similares a cada objetivo, guardados como una parte.
+
+    Args:
+        temporada (str): Temporada del archivo
+        liga (str): Liga del archivo
+        features (list): Métricas de la similitud
+        min_minutos (int): Minutos mínimos de las filas
+        media (ndarray): Media de cada métrica en el ámbito
+        desviacion (ndarray): Desviación de cada métrica en el ámbito
+        vectores (ndarray): Vectores normalizados de los objetivos (objetivos × métricas)
+        excluidos (list): Wyscout id de cada objetivo (el propio jugador no cuenta como similar)
+        k (int): Jugadores similares por objetivo
+        ruta (str): Archivo de la parte
+        directorio (str, optional): Directorio de los archivos Parquet
+
+    Returns:
+        tuple: (filas leídas, segundos)
+    """
+    inicio = time.perf_counter()
+    identidad, valores = _leer_archivo(temporada, liga, features, min_minutos, directorio)
+    puntuaciones = vectores @ normalizar_matriz(valores, media, desviacion).T
+    ids = identidad[COLUMNA_ID].to_numpy()
+
+    partes = []
+    for objetivo, (fila, excluido) in enumerate(zip(puntuaciones, excluidos)):
+        if not pd.isna(excluido):
+            fila = np.where(ids == excluido, -np.inf, fila)
+        seleccion = top_k(fila, k)
+        parte = identidad.iloc[seleccion].reset_index(drop=True)
+        parte.insert(0, "objetivo", objetivo)
+        parte["similitud"] = fila[seleccion].astype(float)
+        partes.append(parte)
+    parte = pd.concat(partes, ignore_index=True)
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    parte.to_parquet(temporal, index=False)
+    os.replace(temporal, ruta)
+    return len(identidad), time.perf_counter() - inicio
+
+
+def huella_escaneo(features, min_minutos, k, media, desviacion, vectores, excluidos):
+    """Hash de los parámetros de un escaneo (cambiar cualquiera invalida sus partes)."""
+    datos = json.dumps({
+        "version": VERSION_ESCANEO, "features": features, "min_minutos": min_minutos, "k": k,
+        "excluidos": [None if pd.isna(e) else str(e) for e in excluidos],
+    }, sort_keys=True).encode()
+    contenido = b"".join(np.ascontiguousarray(a).tobytes() for a in (media, desviacion, vectores))
+    return hashlib.sha1(datos + contenido).hexdigest()[:16]
+
+
+def ruta_parte(directorio_escaneo, archivo):
+    """Ruta de la parte de un archivo (por su ruta y su hash) dentro de un escaneo."""
+    clave = hashlib.sha1(f"{archivo['ruta']}|{archivo['sha256']}".encode()).hexdigest()[:20]
+    return os.path.join(directorio_escaneo, f"{clave}.parquet")
+
+
+def _progreso(etapa, hechos, total, inicio):
+    transcurrido = time.perf_counter() - inicio
+    restante = transcurrido / hechos * (total - hechos) if hechos else 0.0
+    print(f"\r{etapa}: {hechos}/{total} archivos ({100 * hechos / total:.0f}%) · "
+          f"{transcurrido:.0f} s · quedan ~{restante:.0f} s ", end="", file=sys.stderr, flush=True)
+    if hechos == total:
+        print(file=sys.stderr)
+
+
+def _en_pool(pool, funcion, tareas, etapa):
+    """Ejecuta las tareas en el pool y devuelve sus resultados en el orden de ``tareas``."""
+    inicio = time.perf_counter()
+    futuros = {pool.submit(funcion, *args): i for i, args in enumerate(tareas)}
+    resultados = [None] * len(tareas)
+    try:
+        for hechos, futuro in enumerate(as_completed(futuros), start=1):
+            resultados[futuros[futuro]] = futuro.result()
+            _progreso(etapa, hechos, len(tareas), inicio)
+    except KeyboardInterrupt:
+        # Solo se esperan las tareas en curso (sus partes se guardan completas)
+        for futuro in futuros:
+            futuro.cancel()
+        raise
+    return resultados
+
+
+def escanear(objetivos, features, temporadas=None, ligas=None, min_minutos=None, k=None,
+             temporadas_objetivo=None, procesos=None, directorio=None, directorio_escaneos=None):
+    """
+    Busca los k jugadores más similares a cada objetivo en un ámbito de ligas y temporadas.
+
+    Args:
+        objetivos (DataFrame): Lista de objetivos (``leer_objetivos``)
+        features (list): Métricas de la similitud
+        temporadas (list, optional): Temporadas del ámbito (por defecto, la más reciente)
+        ligas (list, optional): Ligas del ámbito (todas si es None)
+        min_minutos (int, optional): Minutos mínimos de las filas (por defecto
+            ``config.SIMILARITY_SCAN_MIN_MINUTES``)
+        k (int, optional): Jugadores similares por objetivo (por defecto ``config.SIMILARITY_SCAN_K``)
+        temporadas_objetivo (list, optional): Temporadas en las que se buscan los
+            objetivos (por defecto, las del ámbito)
+        procesos (int, optional): Procesos del pool (por defecto
+            ``config.SIMILARITY_SCAN_PROCESSES`` o, si es None, uno por CPU)
+        directorio (str, optional): Directorio de los archivos Parquet
+        directorio_escaneos (str, optional): Directorio de las partes
+
+    Returns:
+        dict: ``resultados`` (DataFrame con objetivo, rango, jugador similar y
+        similitud), ``avisos`` y ``etapas`` (archivos procesados, reutilizados y segundos)
+
+    Raises:
+        ValueError: Si una métrica no existe en el corpus o no se resuelve ningún objetivo
+    """
+    features = list(dict.fromkeys(features))
+    min_minutos = config.SIMILARITY_SCAN_MIN_MINUTES if min_minutos is None else min_minutos
+    k = k or config.SIMILARITY_SCAN_K
+    procesos = procesos or config.SIMILARITY_SCAN_PROCESSES or os.cpu_count() or 1
+
+    manifiesto = cargar_manifiesto(directorio)
+    ambito = archivos_ambito(manifiesto, temporadas, ligas)
+    busqueda = ambito if not temporadas_objetivo else archivos_ambito(manifiesto, temporadas_objetivo)
+    disponibles = set(esquema_unificado(manifiesto, ambito).names)
+    desconocidas = [f for f in features if f not in disponibles]
+    if desconocidas:
+        raise ValueError(f"Métricas desconocidas: {', '.join(desconocidas)}")
+
+    en_ambito = {a["ruta"] for a in ambito}
+    archivos = ambito + [a for a in busqueda if a["ruta"] not in en_ambito]
+    en_busqueda = {a["ruta"] for a in busqueda}
+    nombres = set(objetivos["Player"].map(normalizar_nombre))
+    etapas = []
+
+    with ProcessPoolExecutor(min(procesos, len(archivos))) as pool:
+        # 1. Momentos del ámbito y candidatos a objetivo
+        inicio = time.perf_counter()
+        tareas = [(a["temporada"], a["liga"], features, min_minutos,
+                   nombres if a["ruta"] in en_busqueda else set(), a["ruta"] in en_ambito, directorio)
+                  for a in archivos]
+        resultados = _en_pool(pool, momentos_archivo, tareas, "Estadísticas")
+        media, desviacion = combinar_momentos([m for m, _ in resultados if m is not None], len(features))
+        resueltos, avisos = resolver_objetivos(objetivos, pd.concat([c for _, c in resultados], ignore_index=True))
+        if resueltos.empty:
+            raise ValueError("No se ha encontrado ningún objetivo en el corpus")
+        etapas.append({"etapa": "estadisticas", "procesados": len(archivos), "reutilizados": 0,
+                       "segundos": time.perf_counter() - inicio})
+
+        # 2. Los k mejores por archivo, como partes reutilizables
+        inicio = time.perf_counter()
+        vectores = normalizar_matriz(resueltos[features].to_numpy(dtype=np.float64), media, desviacion)
+        excluidos = resueltos[COLUMNA_ID].tolist()
+        directorio_escaneo = os.path.join(ruta_directorio_escaneos(directorio_escaneos),
+                                          huella_escaneo(features, min_minutos, k, media, desviacion,
+                                                         vectores, excluidos))
+        rutas = [ruta_parte(directorio_escaneo, a) for a in ambito]
+        pendientes = [(a, r) for a, r in zip(ambito, rutas) if not os.path.exists(r)]
+        tareas = [(a["temporada"], a["liga"], features, min_minutos, media, desviacion, vectores, excluidos, k, r,
+                   directorio) for a, r in pendientes]
+        if tareas:
+            _en_pool(pool, similares_archivo, tareas, "Similitud")
+        etapas.append({"etapa": "similitud", "procesados": len(tareas), "reutilizados": len(ambito) - len(tareas),
+                       "segundos": time.perf_counter() - inicio})
+
+    # 3. Los k mejores globales de cada objetivo
+    inicio = time.perf_counter()
+    partes = pd.concat([pd.read_parquet(r) for r in rutas], ignore_index=True)
+    partes = partes.sort_values(["objetivo", "similitud"], ascending=[True, False], kind="stable")
+    partes = partes.groupby("objetivo", sort=False).head(k)
+    partes.insert(1, "rango", partes.groupby("objetivo").cumcount() + 1)
+
+    referencia = resueltos[["objetivo"] + COLUMNAS_IDENTIDAD].rename(columns={
+        "objetivo": "indice", "Player": "objetivo", COLUMNA_ID: "objetivo_id", "Team": "objetivo_equipo",
+        COLUMNA_MINUTOS: "objetivo_minutos", COLUMNA_LIGA: "objetivo_liga",
+        COLUMNA_TEMPORADA: "objetivo_temporada"})[[
+        "indice", "objetivo", "objetivo_equipo", "objetivo_liga", "objetivo_temporada", "objetivo_minutos",
+        "objetivo_id"]]
+    partes["indice"] = resueltos["objetivo"].to_numpy()[partes.pop("objetivo").to_numpy()]
+    resultado = referencia.merge(partes, on="indice").sort_values(["indice", "rango"], kind="stable")
+    resultado = resultado.drop(columns="indice").reset_index(drop=True)
+    etapas.append({"etapa": "union", "procesados": len(rutas), "reutilizados": 0,
+                   "segundos": time.perf_counter() - inicio})
+    return {"resultados": resultado, "avisos": avisos, "etapas": etapas}
+
+
+def guardar_resultados(resultados, ruta):
+    """Escribe los resultados en Parquet o, si la ruta termina en ``.csv``, en CSV."""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(carpeta, exist_ok=True)
+    if ruta.lower().endswith(".csv"):
+        resultados.to_csv(ruta, index=False)
+    else:
+        resultados.to_parquet(ruta, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Busca los jugadores más similares a una lista de objetivos en varias ligas y temporadas.")
+    parser.add_argument("--objetivos", required=True,
+                        help="CSV con la columna Player (y opcionalmente Team, league, season o Wyscout id) "
+                             "o archivo de texto con un nombre por línea")
+    metricas = parser.add_mutually_exclusive_group()
+    metricas.add_argument("--metricas", nargs="+",
+                          help="Métricas de la similitud (por defecto las de percentiles_general)")
+    metricas.add_argument("--grupo", choices=list(config.POSITION_GROUPS),
+                          help="Usar las métricas del índice de similitud para un grupo de posiciones")
+    parser.add_argument("--temporadas", nargs="+", help="Temporadas del ámbito (por defecto, la más reciente)")
+    parser.add_argument("--ligas", nargs="+", help="Ligas del ámbito (por defecto todas)")
+    parser.add_argument("--temporadas-objetivo", nargs="+",
+                        help="Temporadas en las que buscar los objetivos (por defecto, las del ámbito)")
+    parser.add_argument("--min-minutos", type=int, default=None,
+                        help="Minutos mínimos (por defecto config.SIMILARITY_SCAN_MIN_MINUTES)")
+    parser.add_argument("--k", type=int, default=None,
+                        help="Jugadores similares por objetivo (por defecto config.SIMILARITY_SCAN_K)")
+    parser.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, uno por CPU)")
+    parser.add_argument("--salida", default="similares.parquet",
+                        help="Archivo de resultados (.parquet o .csv)")
+    parser.add_argument("--directorio", default=None,
+                        help="Directorio de los archivos Parquet (por defecto config.PARQUET_DIR)")
+    args = parser.parse_args(argv)
+
+    if args.grupo:
+        features = features_grupo(args.grupo)
+    else:
+        features = args.metricas or config.DEFAULT_COLUMNS["percentiles_general"]
+
+    try:
+        resultado = escanear(leer_objetivos(args.objetivos), features, args.temporadas, args.ligas,
+                             args.min_minutos, args.k, args.temporadas_objetivo, args.procesos, args.directorio)
+    except KeyboardInterrupt:
+        print("\nInterrumpido: las partes terminadas se reutilizarán al repetir el mismo comando.",
+              file=sys.stderr)
+        sys.exit(130)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for aviso in resultado["avisos"]:
+        print(aviso)
+    for etapa in resultado["etapas"]:
+        print(f"{etapa['etapa']:<14} {etapa['procesados']:>5} procesados  {etapa['reutilizados']:>5} reutilizados"
+              f"  {etapa['segundos']:8.2f} s")
+    resultados = resultado["resultados"]
+    guardar_resultados(resultados, args.salida)
+    print(f"{len(resultados[['objetivo', 'objetivo_id']].drop_duplicates())} objetivos · {len(resultados)} filas → {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Trazas de tiempos por rerun: secciones de cada página y tramos anidados de ``utils``."""
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+import config
+from utils.catalog import ruta_repositorio
+
+# Cada sesión de Streamlit ejecuta sus reruns en su propio hilo
+_local = threading.local()
+_lock_archivo = threading.Lock()
+
+
+def ruta_trazas(ruta=None):
+    """Devuelve el archivo de trazas (``config.TRACES_FILE``)."""
+    return ruta_repositorio(config.TRACES_FILE, ruta)
+
+
+def _traza_actual():
+    return getattr(_local, "traza", None)
+
+
+def iniciar_traza(pagina, activa=True):
+    """
+    Abre la traza del rerun actual.
+
+    Si el rerun anterior terminó sin ``finalizar_traza`` (por ejemplo con
+    ``st.stop()``), sus tramos se guardan antes marcados como detenidos.
+
+    Args:
+        pagina (str): Nombre de la página
+        activa (bool): Si es False no se registra nada en este rerun
+    """
+    if _traza_actual() is not None:
+        finalizar_traza(detenida=True)
+    if not activa:
+        return
+    _local.traza = {
+        "id": uuid.uuid4().hex[:12],
+        "pagina": pagina,
+        "fecha": datetime.datetime.now().isoformat(timespec="milliseconds"),
+        "inicio": time.perf_counter(),
+        "tramos": [],
+        "pila": [],
+    }
+
+
+def _abrir(traza, nombre, atributos):
+    pila = traza["pila"]
+    registro = {
+        "id": len(traza["tramos"]),
+        "nombre": nombre,
+        "padre": pila[-1]["id"] if pila else None,
+        "nivel": len(pila),
+        "inicio": time.perf_counter(),
+        "duracion_ms": None,
+    }
+    if atributos:
+        registro["atributos"] = atributos
+    traza["tramos"].append(registro)
+    pila.append(registro)
+    return registro
+
+
+def _cerrar(traza, registro):
+    if registro["duracion_ms"] is not None:
+        return
+    registro["duracion_ms"] = (time.perf_counter() - registro["inicio"]) * 1000
+    if registro in traza["pila"]:
+        # Cierra también los tramos hijos que hayan quedado abiertos
+        while traza["pila"]:
+            abierto = traza["pila"].pop()
+            if abierto is registro:
+                break
+            _cerrar(traza, abierto)
+
+
+@contextmanager
+def tramo(nombre, **atributos):
+    """
+    Registra un tramo con nombre en la traza activa del hilo.
+
+    Args:
+        nombre (str): Nombre del tramo
+        **atributos: Datos adicionales del tramo (serializables a JSON)
+    """
+    traza = _traza_actual()
+    if traza is None:
+        yield
+        return
+    registro = _abrir(traza, nombre, atributos)
+    try:
+        yield
+    except BaseException as e:
+        # Incluye st.stop() y st.rerun(), que se implementan con excepciones
+        registro["error"] = type(e).__name__
+        raise
+    finally:
+        _cerrar(traza, registro)
+
+
+def trazar(nombre=None):
+    """
+    Decorador que registra cada llamada a una función como un tramo.
+
+    Args:
+        nombre (str, optional): Nombre del tramo (por defecto, el de la función)
+    """
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _traza_actual() is None:
+                return funcion(*args, **kwargs)
+            with tramo(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def seccion(nombre):
+    """
+    Cierra la sección anterior de la página y abre una nueva.
+
+    Solo se usa en el nivel superior del script de la página (no dentro de un ``tramo``).
+
+    Args:
+        nombre (str): Nombre de la sección
+    """
+    traza = _traza_actual()
+    if traza is None:
+        return
+    if traza["pila"]:
+        _cerrar(traza, traza["pila"][0])
+    _abrir(traza, nombre, None)
+
+
+def _guardar_tramos(traza, tramos, total_ms, detenida):
+    lineas = []
+    for t in tramos:
+        linea = {
+            "traza": traza["id"],
+            "pagina": traza["pagina"],
+            "fecha": traza["fecha"],
+            "tramo": t["id"],
+            "nombre": t["nombre"],
+            "padre": t["padre"],
+            "nivel": t["nivel"],
+            "inicio_ms": round(t["inicio_ms"], 3),
+            "duracion_ms": round(t["duracion_ms"], 3),
+            "total_ms": round(total_ms, 3),
+        }
+        for clave in ("atributos", "error"):
+            if clave in t:
+                linea[clave] = t[clave]
+        if detenida:
+            linea["detenida"] = True
+        lineas.append(json.dumps(linea, ensure_ascii=False, default=str))
+    if not lineas:
+        return
+
+    ruta = ruta_trazas()
+    with _lock_archivo:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        if os.path.exists(ruta) and os.path.getsize(ruta) > config.TRACES_MAX_BYTES:
+            os.replace(ruta, f"{ruta}.1")
+        with open(ruta, "a", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+
+
+def finalizar_traza(detenida=False):
+    """
+    Cierra la traza activa del hilo y guarda sus tramos en ``config.TRACES_FILE``.
+
+    Args:
+        detenida (bool): Si el rerun terminó antes del final de la página
+
+    Returns:
+        dict: Página, duración total (ms) y tramos de la traza, o None si no había traza activa
+    """
+    traza = _traza_actual()
+    if traza is None:
+        return None
+    _local.traza = None
+    while traza["pila"]:
+        _cerrar(traza, traza["pila"][0])
+
+    total_ms = (time.perf_counter() - traza["inicio"]) * 1000
+    tramos = []
+    for t in traza["tramos"]:
+        t = dict(t)
+        t["inicio_ms"] = (t.pop("inicio") - traza["inicio"]) * 1000
+        tramos.append(t)
+    try:
+        _guardar_tramos(traza, tramos, total_ms, detenida)
+    except OSError:
+        # Las trazas son de diagnóstico: un disco de solo lectura no debe romper la página
+        pass
+    return {"id": traza["id"], "pagina": traza["pagina"], "total_ms": total_ms, "tramos": tramos}
+
+
+def resumen_traza(traza):
+    """
+    Tabla de tiempos de una traza para el panel de la barra lateral.
+
+    Args:
+        traza (dict): Traza devuelta por ``finalizar_traza``
+
+    Returns:
+        DataFrame: Tramo (indentado por nivel), duración, porcentaje del rerun y
+        tiempo propio (sin los tramos hijos), con una fila final para el tiempo sin medir
+    """
+    tramos = traza["tramos"]
+    total = traza["total_ms"]
+    hijos = {}
+    for t in tramos:
+        if t["padre"] is not None:
+            hijos[t["padre"]] = hijos.get(t["padre"], 0.0) + t["duracion_ms"]
+    medido = sum(t["duracion_ms"] for t in tramos if t["padre"] is None)
+
+    filas = [{
+        "Tramo": "· " * t["nivel"] + t["nombre"] + (f" ({t['error']})" if "error" in t else ""),
+        "ms": round(t["duracion_ms"], 1),
+        "%": round(100 * t["duracion_ms"] / total, 1) if total else 0.0,
+        "Propio (ms)": round(t["duracion_ms"] - hijos.get(t["id"], 0.0), 1),
+    } for t in tramos]
+    filas.append({
+        "Tramo": "Sin medir",
+        "ms": round(total - medido, 1),
+        "%": round(100 * (total - medido) / total, 1) if total else 0.0,
+        "Propio (ms)": round(total - medido, 1),
+    })
+    return pd.DataFrame(filas)
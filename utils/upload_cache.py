@@ -0,0 +1,118 @@
+"""Caché en disco de los CSV/Excel subidos, convertidos a Parquet por hash de su contenido."""
+import hashlib
+import io
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from utils.catalog import ruta_repositorio
+
+
+def ruta_directorio_subidas(directorio=None):
+    """Devuelve (y crea si hace falta) el directorio de la caché de subidas."""
+    directorio = ruta_repositorio(config.UPLOAD_CACHE_DIR, directorio)
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def leer_subida(nombre, contenido):
+    """
+    Analiza un archivo CSV o Excel subido.
+
+    Args:
+        nombre (str): Nombre del archivo (se usa su extensión)
+        contenido (bytes): Contenido del archivo
+
+    Returns:
+        DataFrame: Datos del archivo
+    """
+    if nombre.lower().endswith(".csv"):
+        try:
+            # Lector de pyarrow: analiza el CSV en varios hilos
+            return pd.read_csv(io.BytesIO(contenido), engine="pyarrow")
+        except ValueError:
+            # CSV que el lector de pyarrow no admite (separador ambiguo, comillas...)
+            return pd.read_csv(io.BytesIO(contenido))
+    return pd.read_excel(io.BytesIO(contenido))
+
+
+def _tabla_arrow(df):
+    """Convierte un DataFrame a tabla Arrow; las columnas de tipos mezclados pasan a texto."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mezcladas = {c: df[c].map(lambda v: v if pd.isna(v) else str(v))
+                     for c in df.select_dtypes(include="object").columns}
+        return pa.Table.from_pandas(df.assign(**mezcladas), preserve_index=False)
+
+
+def cachear_subida(nombre, contenido, directorio=None):
+    """
+    Devuelve el archivo Parquet en caché de una subida, analizándola solo si no existe.
+
+    Args:
+        nombre (str): Nombre del archivo subido
+        contenido (bytes): Contenido del archivo
+        directorio (str, optional): Directorio de la caché
+
+    Returns:
+        dict: ``ruta`` del Parquet en caché, ``sha256`` del contenido subido y
+        ``origen`` ("cache" o "analizado")
+    """
+    directorio = ruta_directorio_subidas(directorio)
+    sha256 = hashlib.sha256(contenido).hexdigest()
+    ruta = os.path.join(directorio, f"{sha256}.parquet")
+
+    if os.path.exists(ruta):
+        # La fecha de modificación marca el último uso para la expulsión
+        os.utime(ruta)
+        return {"ruta": ruta, "sha256": sha256, "origen": "cache"}
+
+    tabla = _tabla_arrow(leer_subida(nombre, contenido))
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    os.close(descriptor)
+    try:
+        pq.write_table(tabla, temporal, compression="zstd")
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    expulsar(directorio, conservar=ruta)
+    return {"ruta": ruta, "sha256": sha256, "origen": "analizado"}
+
+
+def expulsar(directorio=None, max_bytes=None, conservar=None):
+    """
+    Elimina los archivos usados hace más tiempo hasta que la caché quepa en el límite.
+
+    Args:
+        directorio (str, optional): Directorio de la caché
+        max_bytes (int, optional): Tamaño máximo. Por defecto ``config.UPLOAD_CACHE_MAX_BYTES``.
+        conservar (str, optional): Ruta que no se debe eliminar (la subida actual)
+    """
+    directorio = ruta_directorio_subidas(directorio)
+    max_bytes = config.UPLOAD_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    archivos = []
+    for nombre in os.listdir(directorio):
+        if nombre.endswith(".parquet"):
+            ruta = os.path.join(directorio, nombre)
+            estado = os.stat(ruta)
+            archivos.append((estado.st_mtime, estado.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in archivos)
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        if ruta == conservar:
+            continue
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except OSError:
+            pass
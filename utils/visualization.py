@@ -4,22 +4,28 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.data_processing import normalizar_para_radar
+from utils.tracing import trazar
 
-def grafico_radar_jugador(data, jugador, categorias, col_nombres):
+@trazar()
+def grafico_radar_jugador(data, jugador, categorias, col_nombres, indice=None):
     """
     Crea un gráfico de radar para un jugador.
     
     Args:
         data (DataFrame): DataFrame con los datos
-        jugador (str): Nombre del jugador
+        jugador (str): Etiqueta o nombre del jugador
         categorias (list): Lista de categorías para el gráfico
         col_nombres (str): Nombre de la columna que contiene los nombres de los jugadores
+        indice (IndiceJugadores, optional): Índice de jugadores de ``data``
         
     Returns:
         Figure: Objeto de figura Plotly
     """
     # Preparar datos para el gráfico de radar
-    values = data[data[col_nombres] == jugador][categorias].values[0].tolist()
+    if indice is None:
+        values = data[data[col_nombres] == jugador][categorias].values[0].tolist()
+    else:
+        values = indice.fila(data, jugador, categorias).tolist()
     
     # Crear figura
     fig = go.Figure()
@@ -41,6 +47,7 @@ def grafico_radar_jugador(data, jugador, categorias, col_nombres):
     
     return fig
 
+@trazar()
 def grafico_comparacion_barras(comp_data, jugador1, jugador2):
     """
     Crea un gráfico de barras para comparar dos jugadores.
@@ -64,6 +71,7 @@ def grafico_comparacion_barras(comp_data, jugador1, jugador2):
     
     return fig
 
+@trazar()
 def grafico_radar_comparacion(comp_data, jugador1, jugador2):
     """
     Crea un gráfico de radar para comparar dos jugadores.
@@ -107,6 +115,41 @@ def grafico_radar_comparacion(comp_data, jugador1, jugador2):
     
     return fig
 
+@trazar()
+def grafico_radar_lista(normalizados):
+    """
+    Crea un gráfico de radar con una lista corta de jugadores.
+    
+    Args:
+        normalizados (DataFrame): Valores normalizados (jugadores × métricas), por
+            ejemplo ``ComparacionJugadores.normalizados()``
+        
+    Returns:
+        Figure: Objeto de figura Plotly
+    """
+    fig = go.Figure()
+    
+    for jugador, fila in normalizados.iterrows():
+        fig.add_trace(go.Scatterpolar(
+          r=fila.to_numpy(),
+          theta=normalizados.columns,
+          fill='toself',
+          opacity=0.5,
+          name=jugador
+        ))
+    
+    fig.update_layout(
+      polar=dict(
+        radialaxis=dict(
+          visible=True,
+          range=[0, 1]
+        )),
+      showlegend=True
+    )
+    
+    return fig
+
+@trazar()
 def grafico_percentiles_barras(percentiles_df):
     """
     Crea un gráfico de barras para visualizar percentiles.
@@ -143,6 +186,7 @@ def grafico_percentiles_barras(percentiles_df):
     
     return fig
 
+@trazar()
 def grafico_distribucion_metrica(data, metrica, valor_jugador, jugador):
     """
     Crea un histograma para visualizar la distribución de una métrica.
@@ -166,6 +210,7 @@ def grafico_distribucion_metrica(data, metrica, valor_jugador, jugador):
     
     return fig
 
+@trazar()
 def grafico_similitud_barras(similarity_df, jugador_ref):
     """
     Crea un gráfico de barras para visualizar la similitud entre jugadores.
@@ -183,6 +228,7 @@ def grafico_similitud_barras(similarity_df, jugador_ref):
     
     return fig
 
+@trazar()
 def grafico_radar_perfil(categories, values, jugador):
     """
     Crea un gráfico de radar para visualizar el perfil de un jugador.